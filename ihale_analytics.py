@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Columnar analytics over bulk tender search results
+Loads formatted search_tenders rows into NumPy column arrays and computes
+aggregates server-side, so only the aggregate is returned to the MCP client
+"""
+
+from datetime import date
+from typing import Dict, Any, List, Optional, Literal
+
+import numpy as np
+
+from ihale_canonical import parse_tender_datetime
+from ihale_text import fold
+
+# Column name -> extractor over a formatted tender from EKAPClient.search_tenders
+COLUMN_EXTRACTORS = {
+    "type": lambda tender: (tender.get("type") or {}).get("description"),
+    "status": lambda tender: (tender.get("status") or {}).get("description"),
+    "province": lambda tender: tender.get("province"),
+    "method": lambda tender: tender.get("method"),
+    "authority": lambda tender: tender.get("authority"),
+}
+
+
+class TenderTable:
+    """Column-oriented table of tenders backed by NumPy arrays"""
+    
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+    
+    @classmethod
+    def from_tenders(cls, tenders: List[Dict[str, Any]]) -> "TenderTable":
+        """Build a table from formatted search_tenders rows"""
+        columns = {
+            name: np.array([extract(tender) or "Unknown" for tender in tenders], dtype=str)
+            for name, extract in COLUMN_EXTRACTORS.items()
+        }
+        tender_dates: List[Optional[date]] = []
+        for tender in tenders:
+            parsed = parse_tender_datetime(tender.get("tender_datetime"))
+            tender_dates.append(parsed.date() if parsed else None)
+        columns["tender_date"] = np.array(tender_dates, dtype="datetime64[D]")
+        return cls(columns)
+    
+    def __len__(self) -> int:
+        return len(self.columns["tender_date"])
+    
+    def value_counts(self, column: str, top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Count rows per distinct value of a column, most frequent first"""
+        if column not in self.columns:
+            raise KeyError(f"Unknown column: {column}")
+        if len(self) == 0:
+            return []
+        values, counts = np.unique(self.columns[column], return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        if top is not None:
+            order = order[:top]
+        return [{"value": str(values[i]), "count": int(counts[i])} for i in order]
+    
+    def date_histogram(self, interval: Literal["day", "week", "month"] = "day") -> List[Dict[str, Any]]:
+        """Count rows per tender-date bucket in chronological order"""
+        dates = self.columns["tender_date"]
+        dates = dates[~np.isnat(dates)]
+        if len(dates) == 0:
+            return []
+        
+        if interval == "month":
+            buckets = dates.astype("datetime64[M]")
+        elif interval == "week":
+            # 1970-01-01 was a Thursday; shift so buckets start on Monday
+            day_numbers = dates.astype(np.int64)
+            buckets = dates - ((day_numbers + 3) % 7).astype("timedelta64[D]")
+        else:
+            buckets = dates
+        
+        values, counts = np.unique(buckets, return_counts=True)
+        return [{"bucket": str(value), "count": int(count)} for value, count in zip(values, counts)]
+
+
+def aggregate_tender_list(
+    tenders: List[Dict[str, Any]],
+    group_by: List[str],
+    date_histogram: Optional[Literal["day", "week", "month"]] = None,
+    top_authorities: int = 10
+) -> Dict[str, Any]:
+    """Compute group-by counts, a date histogram and top authorities for tenders"""
+    
+    table = TenderTable.from_tenders(tenders)
+    
+    result: Dict[str, Any] = {
+        "group_counts": {column: table.value_counts(column) for column in group_by}
+    }
+    if date_histogram:
+        result["date_histogram"] = {
+            "interval": date_histogram,
+            "buckets": table.date_histogram(date_histogram)
+        }
+    if top_authorities:
+        result["top_authorities"] = table.value_counts("authority", top=top_authorities)
+    
+    return result
+
+
+# Categorical fields the local query engine filters and counts on, and its sort keys
+FACET_FIELDS = ("type", "status", "province", "method", "authority")
+LOCAL_SORT_FIELDS = ("tender_datetime", "document_count", "id")
+
+
+class _Facet:
+    """Dictionary-encoded categorical column; masks are built with a lookup table over codes"""
+    
+    def __init__(self, values: List[str]):
+        self.vocab, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+        self.codes = codes.astype(np.int32)
+        self.keys = [fold(value) for value in self.vocab]
+    
+    def mask(self, values: List[str]) -> np.ndarray:
+        wanted = {fold(value) for value in values}
+        lookup = np.fromiter((key in wanted for key in self.keys), dtype=bool, count=len(self.keys))
+        return lookup[self.codes]
+    
+    def counts(self, mask: np.ndarray, top: int) -> List[Dict[str, Any]]:
+        counts = np.bincount(self.codes[mask], minlength=len(self.vocab))
+        order = np.argsort(-counts, kind="stable")[:top]
+        return [{"value": str(self.vocab[i]), "count": int(counts[i])} for i in order if counts[i]]
+
+
+class _MultiValued:
+    """Multi-valued column (e.g. OKAS codes) as (row, value code) pairs"""
+    
+    def __init__(self, rows_values: List[List[str]], row_count: int):
+        pair_rows = np.repeat(np.arange(row_count), [len(values) for values in rows_values])
+        flat = [value for values in rows_values for value in values]
+        self.row_count = row_count
+        self.vocab, codes = np.unique(np.array(flat, dtype=str), return_inverse=True)
+        self.pair_rows = pair_rows
+        self.pair_codes = codes.astype(np.int32)
+    
+    def _rows_matching(self, lookup: np.ndarray) -> np.ndarray:
+        """Count per row of values selected by `lookup`"""
+        if len(self.pair_codes) == 0:
+            return np.zeros(self.row_count, dtype=np.int64)
+        return np.bincount(self.pair_rows[lookup[self.pair_codes]], minlength=self.row_count)
+    
+    def mask_any(self, lookup: np.ndarray) -> np.ndarray:
+        return self._rows_matching(lookup) > 0
+    
+    def mask_all(self, lookups: List[np.ndarray]) -> np.ndarray:
+        mask = np.ones(self.row_count, dtype=bool)
+        for lookup in lookups:
+            mask &= self._rows_matching(lookup) > 0
+        return mask
+
+
+def _parse_bound(value: str) -> np.datetime64:
+    parsed = parse_tender_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Unparseable datetime: {value!r}")
+    return np.datetime64(parsed, "m")
+
+
+def _minutes_of_day(value: str) -> int:
+    try:
+        hours, minutes = value.split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        raise ValueError(f"Expected HH:MM, got {value!r}") from None
+
+
+class LocalTenderIndex:
+    """Vectorized filter/sort engine over locally synced tenders
+    
+    Each facet is dictionary-encoded and filtered through a boolean lookup
+    table, multi-valued fields (OKAS codes, characteristics) through
+    (row, value) pair arrays, so arbitrary AND/OR/NOT filter trees reduce to
+    NumPy mask operations over all rows.
+    
+    Filter nodes are {"and": [...]}, {"or": [...]}, {"not": {...}} or a leaf
+    {"field": ..., <operator>: ...}:
+      type/status/province/method/authority: in, not_in
+      okas: prefix, in
+      characteristic: any, all, none
+      tender_datetime: gte, gt, lte, lt (datetime or date strings)
+      tender_time: gte, lt (HH:MM time of day)
+      document_count, id: gte, gt, lte, lt, in
+      name: contains
+    """
+    
+    def __init__(self, tenders: List[Dict[str, Any]], details: Dict[int, Dict[str, Any]]):
+        self.rows = tenders
+        count = len(tenders)
+        self.ids = np.array([tender.get("id") or 0 for tender in tenders], dtype=np.int64)
+        self.document_counts = np.array([tender.get("document_count") or 0 for tender in tenders], dtype=np.int64)
+        self.facets = {
+            name: _Facet([COLUMN_EXTRACTORS[name](tender) or "Unknown" for tender in tenders])
+            for name in FACET_FIELDS
+        }
+        datetimes = [parse_tender_datetime(tender.get("tender_datetime")) for tender in tenders]
+        self.tender_datetimes = np.array(datetimes, dtype="datetime64[m]")
+        self.tender_minutes = np.where(
+            np.isnat(self.tender_datetimes), -1,
+            (self.tender_datetimes - self.tender_datetimes.astype("datetime64[D]")).astype(np.int64)
+        )
+        self.names = np.array([fold(tender.get("name") or "") for tender in tenders], dtype=str)
+        
+        tender_details = [details.get(tender.get("id")) or {} for tender in tenders]
+        self.okas = _MultiValued(
+            [[okas["code"] for okas in detail.get("okas_codes", []) if okas.get("code")] for detail in tender_details],
+            count
+        )
+        self.characteristics = _MultiValued(
+            [[fold(text) for text in detail.get("characteristics", []) if text] for detail in tender_details],
+            count
+        )
+        self.with_details = int(sum(1 for detail in tender_details if detail))
+    
+    @classmethod
+    def from_store(cls, store) -> "LocalTenderIndex":
+        return cls(list(store.iter_tenders()), dict(store.iter_details()))
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def evaluate(self, node: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Boolean mask of rows matching a filter tree (all rows for None)"""
+        if not node:
+            return np.ones(len(self), dtype=bool)
+        if "and" in node:
+            mask = np.ones(len(self), dtype=bool)
+            for child in node["and"]:
+                mask &= self.evaluate(child)
+            return mask
+        if "or" in node:
+            mask = np.zeros(len(self), dtype=bool)
+            for child in node["or"]:
+                mask |= self.evaluate(child)
+            return mask
+        if "not" in node:
+            return ~self.evaluate(node["not"])
+        return self._leaf(node)
+    
+    def _leaf(self, node: Dict[str, Any]) -> np.ndarray:
+        field = node.get("field")
+        operators = {key: value for key, value in node.items() if key != "field"}
+        if not operators:
+            raise ValueError(f"Filter on {field!r} has no operator")
+        mask = np.ones(len(self), dtype=bool)
+        
+        for operator, operand in operators.items():
+            values = operand if isinstance(operand, list) else [operand]
+            if not values:
+                raise ValueError(f"Filter on {field!r} {operator!r} has no values")
+            
+            if field in self.facets and operator in ("in", "not_in"):
+                selected = self.facets[field].mask([str(value) for value in values])
+                mask &= selected if operator == "in" else ~selected
+            
+            elif field == "okas" and operator in ("prefix", "in"):
+                vocab = self.okas.vocab
+                lookup = np.zeros(len(vocab), dtype=bool)
+                for value in values:
+                    lookup |= np.char.startswith(vocab, str(value)) if operator == "prefix" else vocab == str(value)
+                mask &= self.okas.mask_any(lookup)
+            
+            elif field == "characteristic" and operator in ("any", "all", "none"):
+                vocab = self.characteristics.vocab
+                lookups = [np.char.find(vocab, fold(str(value))) >= 0 for value in values]
+                if operator == "all":
+                    mask &= self.characteristics.mask_all(lookups)
+                else:
+                    matched = self.characteristics.mask_any(np.logical_or.reduce(lookups))
+                    mask &= matched if operator == "any" else ~matched
+            
+            elif field == "tender_datetime" and operator in ("gte", "gt", "lte", "lt"):
+                bound = _parse_bound(str(operand))
+                if operator in ("lte", "gt") and len(str(operand).strip()) <= 10:
+                    # A bare date as an upper/exclusive bound covers the whole day
+                    bound = bound + np.timedelta64(1439, "m")
+                column = self.tender_datetimes
+                mask &= {"gte": column >= bound, "gt": column > bound, "lte": column <= bound, "lt": column < bound}[operator]
+            
+            elif field == "tender_time" and operator in ("gte", "lt"):
+                bound = _minutes_of_day(str(operand))
+                minutes = self.tender_minutes
+                mask &= (minutes >= bound) if operator == "gte" else (minutes >= 0) & (minutes < bound)
+            
+            elif field in ("document_count", "id") and operator in ("gte", "gt", "lte", "lt", "in"):
+                column = self.document_counts if field == "document_count" else self.ids
+                if operator == "in":
+                    mask &= np.isin(column, np.array(values, dtype=np.int64))
+                else:
+                    bound = int(operand)
+                    mask &= {"gte": column >= bound, "gt": column > bound, "lte": column <= bound, "lt": column < bound}[operator]
+            
+            elif field == "name" and operator == "contains":
+                for value in values:
+                    mask &= np.char.find(self.names, fold(str(value))) >= 0
+            
+            else:
+                raise ValueError(f"Unsupported filter: {field!r} {operator!r}")
+        
+        return mask
+    
+    def query(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50,
+        facets: Optional[List[str]] = None,
+        facet_top: int = 10
+    ) -> Dict[str, Any]:
+        """Filter, sort and page the index; optionally count facet values of the matches"""
+        mask = self.evaluate(where)
+        matched = np.flatnonzero(mask)
+        
+        if sort_by:
+            descending = sort_by.startswith("-")
+            field = sort_by.lstrip("-")
+            if field not in LOCAL_SORT_FIELDS:
+                raise ValueError(f"Cannot sort by {field!r}")
+            if field == "tender_datetime":
+                keys = self.tender_datetimes[matched].astype(np.int64)
+                # Missing datetimes sort last in either direction
+                missing = np.isnat(self.tender_datetimes[matched])
+                keys = np.where(missing, np.iinfo(np.int64).min if descending else np.iinfo(np.int64).max, keys)
+            else:
+                keys = (self.document_counts if field == "document_count" else self.ids)[matched]
+            order = np.argsort(-keys if descending and field != "tender_datetime" else keys, kind="stable")
+            if descending and field == "tender_datetime":
+                order = order[::-1]
+            matched = matched[order]
+        
+        page = matched[offset:offset + limit]
+        result: Dict[str, Any] = {
+            "matched_count": int(len(matched)),
+            "tenders": [self.rows[i] for i in page],
+            "offset": offset,
+            "next_offset": offset + limit if offset + limit < len(matched) else None
+        }
+        if facets:
+            unknown = sorted(set(facets) - set(FACET_FIELDS))
+            if unknown:
+                raise ValueError(f"Unknown facets: {', '.join(unknown)}")
+            result["facet_counts"] = {name: self.facets[name].counts(mask, facet_top) for name in facets}
+        return result
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Pluggable tender data backends
+The tools only need the operations in TenderBackend. EKAPClient (live HTTP,
+or recording to / replaying from a cassette, see ihale_cassette) and
+SnapshotClient (an offline snapshot file) implement them directly, and
+layers wrap another backend to add behaviour: CacheLayer caches results,
+StoreLayer answers from the local TenderStore before asking the backend
+below it. A stack is described by a spec such as "cache,store,live"
+(outermost first, IHALE_BACKEND) and built once at startup, so each layer
+can be switched on, off or benchmarked on its own
+"""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Protocol
+
+from ihale_cache import cache_key, cached, create_cache, create_document_url_cache
+from ihale_canonical import PAGING_FIELDS, CanonicalQuery
+from ihale_deadline import expired
+
+
+class TenderBackend(Protocol):
+    """Operations the MCP tools and bulk jobs need from a source of tender data"""
+
+    # Response cache and request scheduler, if the backend has them (for metrics and prefetching)
+    cache: Any
+    scheduler: Any
+    # True when the backend can't reach EKAP (e.g. document downloads are unavailable)
+    offline: bool
+
+    async def search_tenders(self, skip: int = 0, limit: int = 10, **search_params) -> Dict[str, Any]: ...
+
+    def iter_tender_pages(
+        self, max_results: Optional[int] = None, page_size: int = 100, concurrency: int = 4, **search_params
+    ) -> AsyncIterator[Dict[str, Any]]: ...
+
+    async def search_all_tenders(
+        self, max_results: Optional[int] = None, page_size: int = 100, concurrency: int = 4, **search_params
+    ) -> Dict[str, Any]: ...
+
+    async def search_okas_codes(
+        self, search_term: str = "", kalem_turu: Optional[Literal[1, 2, 3]] = None, limit: int = 50
+    ) -> Dict[str, Any]: ...
+
+    async def search_authorities(self, search_term: str = "", limit: int = 50) -> Dict[str, Any]: ...
+
+    async def get_reference_catalogs(self, okas_limit: int = 50000, authority_limit: int = 200000) -> Dict[str, Any]: ...
+
+    async def get_tender_announcements(self, tender_id: int) -> Dict[str, Any]: ...
+
+    async def get_tender_details(self, tender_id: int, convert_announcements: bool = True) -> Dict[str, Any]: ...
+
+    async def get_tender_document_urls(
+        self, tender_ids: List[int], islem_id: str = "1", cache_only: bool = False, concurrency: int = 8
+    ) -> Dict[str, Any]: ...
+
+    async def get_tender_document_url(self, tender_id: int, islem_id: str = "1") -> Dict[str, Any]: ...
+
+    def get_cached_document_url(self, tender_id: int, islem_id: str = "1") -> Optional[str]: ...
+
+    async def aclose(self) -> None: ...
+
+
+async def iter_search_pages(
+    search_tenders: Callable[..., Awaitable[Dict[str, Any]]],
+    max_results: Optional[int] = None,
+    page_size: int = 100,
+    concurrency: int = 4,
+    **search_params
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every page of a tender search in order, fetching pages concurrently
+
+    The first page is fetched alone to learn the total count; the remaining
+    pages are requested in windows of `concurrency` so at most that many pages
+    are held in memory at once. Iteration stops after a page that returned an
+    error (the error page itself is yielded so callers can report it).
+    """
+
+    # Bulk callers don't need per-tender document URL lookups unless they ask
+    search_params.setdefault("include_document_urls", False)
+    search_params.pop("skip", None)
+    search_params.pop("limit", None)
+
+    first_take = page_size if max_results is None else max(0, min(page_size, max_results))
+    first_page = await search_tenders(skip=0, limit=first_take, **search_params)
+    yield first_page
+    if first_page.get("error"):
+        return
+
+    total = first_page.get("total_count", 0)
+    if max_results is not None:
+        total = min(total, max_results)
+
+    async def fetch_page(skip: int) -> Dict[str, Any]:
+        return await search_tenders(
+            skip=skip,
+            limit=min(page_size, total - skip),
+            **search_params
+        )
+
+    skips = list(range(first_take, total, page_size))
+    for start in range(0, len(skips), concurrency):
+        window = skips[start:start + concurrency]
+        pages = await asyncio.gather(*(fetch_page(skip) for skip in window))
+        for page in pages:
+            yield page
+            if page.get("error"):
+                return
+
+
+async def collect_search_pages(pages: AsyncIterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Collect the pages of a tender search (see iter_search_pages) into one result
+
+    An error page is returned as is, unless time ran out after some pages
+    arrived: those are returned marked partial. A search answered from a
+    broader one keeps the pages' `subsumed_by`.
+    """
+    tenders: List[Dict[str, Any]] = []
+    total_count = 0
+    subsumed_by = None
+    async for page in pages:
+        if page.get("error"):
+            if tenders and expired():
+                # Out of time: return the pages collected so far
+                return {"tenders": tenders, "total_count": total_count, "returned_count": len(tenders), "partial": True}
+            return page
+        total_count = page.get("total_count", total_count)
+        tenders.extend(page.get("tenders", []))
+        subsumed_by = page.get("subsumed_by", subsumed_by)
+
+    result = {"tenders": tenders, "total_count": total_count, "returned_count": len(tenders)}
+    if subsumed_by is not None:
+        result["subsumed_by"] = subsumed_by
+    return result
+
+
+async def resolve_document_urls(
+    get_cached_url: Callable[[int, str], Optional[str]],
+    get_url: Callable[[int, str], Awaitable[Dict[str, Any]]],
+    tender_ids: List[int],
+    islem_id: str = "1",
+    cache_only: bool = False,
+    concurrency: int = 8
+) -> Dict[str, Any]:
+    """Resolve document URLs for many tenders concurrently, using cached URLs first"""
+    semaphore = asyncio.Semaphore(concurrency)
+    document_urls: Dict[int, Optional[str]] = {}
+    errors: Dict[int, str] = {}
+    from_cache = 0
+
+    async def resolve(tender_id: int) -> None:
+        nonlocal from_cache
+        cached_url = get_cached_url(tender_id, islem_id)
+        if cached_url or cache_only:
+            document_urls[tender_id] = cached_url
+            from_cache += cached_url is not None
+            return
+        async with semaphore:
+            doc_result = await get_url(tender_id, islem_id)
+        if doc_result.get("success"):
+            document_urls[tender_id] = doc_result.get("document_url")
+        else:
+            document_urls[tender_id] = None
+            errors[tender_id] = doc_result.get("error", "Unknown error")
+
+    unique_ids = list(dict.fromkeys(tender_ids))
+    await asyncio.gather(*(resolve(tender_id) for tender_id in unique_ids))
+
+    result = {
+        "document_urls": {tender_id: document_urls.get(tender_id) for tender_id in unique_ids},
+        "resolved_count": sum(1 for url in document_urls.values() if url),
+        "from_cache_count": from_cache,
+        "errors": errors,
+        "cache_only": cache_only
+    }
+    if errors and expired():
+        result["partial"] = True
+    return result
+
+
+class BackendLayer:
+    """A backend that passes every operation to the backend it wraps
+
+    Subclasses override the operations they change. Paged searches go
+    through this layer's own search_tenders, so an overridden search also
+    applies to them; anything else (attributes such as `scheduler`) is
+    looked up on the wrapped backend.
+    """
+
+    def __init__(self, inner: TenderBackend):
+        self.inner = inner
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    async def search_tenders(self, skip: int = 0, limit: int = 10, **search_params) -> Dict[str, Any]:
+        return await self.inner.search_tenders(skip=skip, limit=limit, **search_params)
+
+    def iter_tender_pages(
+        self,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+        concurrency: int = 4,
+        **search_params
+    ) -> AsyncIterator[Dict[str, Any]]:
+        return iter_search_pages(self.search_tenders, max_results, page_size, concurrency, **search_params)
+
+    async def search_all_tenders(
+        self,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+        concurrency: int = 4,
+        **search_params
+    ) -> Dict[str, Any]:
+        return await collect_search_pages(self.iter_tender_pages(max_results, page_size, concurrency, **search_params))
+
+    async def search_okas_codes(
+        self,
+        search_term: str = "",
+        kalem_turu: Optional[Literal[1, 2, 3]] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        return await self.inner.search_okas_codes(search_term=search_term, kalem_turu=kalem_turu, limit=limit)
+
+    async def search_authorities(self, search_term: str = "", limit: int = 50) -> Dict[str, Any]:
+        return await self.inner.search_authorities(search_term=search_term, limit=limit)
+
+    async def get_reference_catalogs(self, okas_limit: int = 50000, authority_limit: int = 200000) -> Dict[str, Any]:
+        return await self.inner.get_reference_catalogs(okas_limit=okas_limit, authority_limit=authority_limit)
+
+    async def get_tender_announcements(self, tender_id: int) -> Dict[str, Any]:
+        return await self.inner.get_tender_announcements(tender_id)
+
+    async def get_tender_details(self, tender_id: int, convert_announcements: bool = True) -> Dict[str, Any]:
+        return await self.inner.get_tender_details(tender_id, convert_announcements=convert_announcements)
+
+    async def get_tender_document_urls(
+        self,
+        tender_ids: List[int],
+        islem_id: str = "1",
+        cache_only: bool = False,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        return await resolve_document_urls(
+            self.get_cached_document_url, self.get_tender_document_url,
+            tender_ids, islem_id, cache_only, concurrency
+        )
+
+    def get_cached_document_url(self, tender_id: int, islem_id: str = "1") -> Optional[str]:
+        return self.inner.get_cached_document_url(tender_id, islem_id)
+
+    async def get_tender_document_url(self, tender_id: int, islem_id: str = "1") -> Dict[str, Any]:
+        return await self.inner.get_tender_document_url(tender_id, islem_id=islem_id)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class CacheLayer(BackendLayer):
+    """Cache the results of the wrapped backend (see ihale_cache)
+
+    Searches are keyed by their CanonicalQuery, like EKAPClient's built-in
+    cache, and concurrent identical calls share one fetch. `kind` picks the
+    cache like IHALE_CACHE (memory, sqlite or none), which is the default;
+    with none, calls pass straight through.
+    """
+
+    def __init__(self, inner: TenderBackend, kind: Optional[str] = None):
+        super().__init__(inner)
+        self.cache = create_cache(kind)
+        self.document_url_cache = create_document_url_cache(kind)
+        self._inflight = {}
+
+    async def search_tenders(self, skip: int = 0, limit: int = 10, **search_params) -> Dict[str, Any]:
+        include_document_urls = search_params.pop("include_document_urls", True)
+        document_urls_from_cache_only = search_params.pop("document_urls_from_cache_only", False)
+        for name in PAGING_FIELDS:
+            search_params.pop(name, None)
+        query = CanonicalQuery.from_params(search_params)
+        return await self._search_page(query.filters, skip, limit, include_document_urls, document_urls_from_cache_only)
+
+    @cached("search")
+    async def _search_page(
+        self,
+        query: Dict[str, Any],
+        skip: int,
+        limit: int,
+        include_document_urls: bool,
+        document_urls_from_cache_only: bool
+    ) -> Dict[str, Any]:
+        return await self.inner.search_tenders(
+            skip=skip,
+            limit=limit,
+            include_document_urls=include_document_urls,
+            document_urls_from_cache_only=document_urls_from_cache_only,
+            **CanonicalQuery(query).to_params()
+        )
+
+    @cached("okas")
+    async def search_okas_codes(
+        self,
+        search_term: str = "",
+        kalem_turu: Optional[Literal[1, 2, 3]] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        return await self.inner.search_okas_codes(search_term=search_term, kalem_turu=kalem_turu, limit=limit)
+
+    @cached("authorities")
+    async def search_authorities(self, search_term: str = "", limit: int = 50) -> Dict[str, Any]:
+        return await self.inner.search_authorities(search_term=search_term, limit=limit)
+
+    @cached("announcements")
+    async def get_tender_announcements(self, tender_id: int) -> Dict[str, Any]:
+        return await self.inner.get_tender_announcements(tender_id)
+
+    @cached("details")
+    async def get_tender_details(self, tender_id: int, convert_announcements: bool = True) -> Dict[str, Any]:
+        return await self.inner.get_tender_details(tender_id, convert_announcements=convert_announcements)
+
+    @cached("document_url", cache_attr="document_url_cache")
+    async def get_tender_document_url(self, tender_id: int, islem_id: str = "1") -> Dict[str, Any]:
+        return await self.inner.get_tender_document_url(tender_id, islem_id=islem_id)
+
+    def get_cached_document_url(self, tender_id: int, islem_id: str = "1") -> Optional[str]:
+        if self.document_url_cache is not None:
+            cached_result = self.document_url_cache.get(
+                cache_key("document_url", {"tender_id": tender_id, "islem_id": islem_id})
+            )
+            if cached_result:
+                return cached_result.get("document_url")
+        return self.inner.get_cached_document_url(tender_id, islem_id)
+
+    async def aclose(self) -> None:
+        for attr in ("cache", "document_url_cache"):
+            cache = getattr(self, attr)
+            if cache is not None:
+                cache.close()
+                setattr(self, attr, None)
+        await self.inner.aclose()
+
+
+class StoreLayer(BackendLayer):
+    """Answer tenders, details and announcements from the local TenderStore first
+
+    Whatever the store lacks is fetched from the wrapped backend; with
+    write_through, successful fetches are stored for next time (and for the
+    local analysis tools).
+    """
+
+    def __init__(self, inner: TenderBackend, path: Optional[str] = None, write_through: bool = False):
+        from ihale_store import TenderStore
+
+        super().__init__(inner)
+        self.store = TenderStore(path)
+        self.write_through = write_through
+
+    def _keep(self, result: Dict[str, Any]) -> bool:
+        return self.write_through and not result.get("error") and not result.get("partial")
+
+    async def get_tender_announcements(self, tender_id: int) -> Dict[str, Any]:
+        stored = self.store.get_announcements(tender_id)
+        if stored is not None:
+            return stored
+        result = await self.inner.get_tender_announcements(tender_id)
+        if self._keep(result):
+            self.store.upsert_announcements(tender_id, result)
+        return result
+
+    async def get_tender_details(self, tender_id: int, convert_announcements: bool = True) -> Dict[str, Any]:
+        stored = self.store.get_details(tender_id)
+        if stored is not None:
+            return stored
+        result = await self.inner.get_tender_details(tender_id, convert_announcements=convert_announcements)
+        # Details without converted announcements would shadow full ones later
+        if convert_announcements and self._keep(result):
+            self.store.upsert_details(tender_id, result)
+        return result
+
+    async def search_tenders(self, skip: int = 0, limit: int = 10, **search_params) -> Dict[str, Any]:
+        result = await self.inner.search_tenders(skip=skip, limit=limit, **search_params)
+        if self._keep(result):
+            self.store.upsert_tenders(result.get("tenders", []))
+        return result
+
+    def get_cached_document_url(self, tender_id: int, islem_id: str = "1") -> Optional[str]:
+        # Stored search rows carry the tender's default (islem 1) document URL
+        tender = self.store.get_tender(tender_id) if islem_id == "1" else None
+        if tender and tender.get("document_url"):
+            return tender["document_url"]
+        return self.inner.get_cached_document_url(tender_id, islem_id)
+
+    async def get_tender_document_url(self, tender_id: int, islem_id: str = "1") -> Dict[str, Any]:
+        document_url = self.get_cached_document_url(tender_id, islem_id)
+        if document_url:
+            return {"document_url": document_url, "tender_id": tender_id, "islem_id": islem_id, "success": True}
+        return await self.inner.get_tender_document_url(tender_id, islem_id=islem_id)
+
+    async def aclose(self) -> None:
+        self.store.close()
+        await self.inner.aclose()
+
+
+def _live_backend(argument: Optional[str]) -> TenderBackend:
+    from ihale_client import EKAPClient
+    from ihale_scheduler import create_scheduler
+    if argument:
+        raise ValueError(f"The live backend takes no argument, got live:{argument}")
+    # No built-in cache: caching is the "cache" layer's job in a configured stack
+    return EKAPClient(scheduler=create_scheduler())
+
+
+def _cassette_backend(mode: str) -> Callable[[Optional[str]], TenderBackend]:
+    def factory(argument: Optional[str]) -> TenderBackend:
+        from ihale_client import EKAPClient
+        from ihale_scheduler import create_scheduler
+        if not argument:
+            raise ValueError(f"The {mode} backend needs a cassette path, e.g. {mode}:/data/ekap.jsonl.gz")
+        # Same request scheduling as live, so replayed workloads keep their concurrency shape
+        return EKAPClient(scheduler=create_scheduler(), cassette_mode=mode, cassette_path=argument)
+    return factory
+
+
+def _snapshot_backend(argument: Optional[str]) -> TenderBackend:
+    from ihale_snapshot import SnapshotClient
+    path = argument or os.environ.get("IHALE_SNAPSHOT")
+    if not path:
+        raise ValueError("The snapshot backend needs a path, e.g. snapshot:/data/ihale-snapshot.db")
+    return SnapshotClient(path)
+
+
+# Backends at the bottom of a stack: name -> factory(argument)
+BACKENDS: Dict[str, Callable[[Optional[str]], TenderBackend]] = {
+    "live": _live_backend,
+    "snapshot": _snapshot_backend,
+    "record": _cassette_backend("record"),
+    "replay": _cassette_backend("replay"),
+}
+
+# Layers wrapping the backend below them: name -> factory(inner, argument)
+LAYERS: Dict[str, Callable[[TenderBackend, Optional[str]], TenderBackend]] = {
+    "cache": lambda inner, argument: CacheLayer(inner, argument),
+    "store": lambda inner, argument: StoreLayer(inner, argument),
+    "store-sync": lambda inner, argument: StoreLayer(inner, argument, write_through=True),
+}
+
+
+def build_backend(spec: str) -> TenderBackend:
+    """Build a backend stack from a spec like "cache,store,live" or "store:/data/ihale.db,snapshot:/data/snap.db"
+
+    Entries are listed outermost first, each as name or name:argument; the
+    last one must be a backend from BACKENDS and the others layers from
+    LAYERS. Raises ValueError for an invalid spec.
+    """
+    entries = [entry.strip() for entry in spec.split(",") if entry.strip()]
+    if not entries:
+        raise ValueError("Empty backend spec")
+
+    def parse(entry: str):
+        name, _, argument = entry.partition(":")
+        return name.strip().lower(), argument.strip() or None
+
+    name, argument = parse(entries[-1])
+    if name not in BACKENDS:
+        raise ValueError(f"Backend spec must end with one of {', '.join(sorted(BACKENDS))}, not {name!r}")
+    backend = BACKENDS[name](argument)
+    for entry in reversed(entries[:-1]):
+        name, argument = parse(entry)
+        if name not in LAYERS:
+            raise ValueError(f"Unknown backend layer {name!r}; expected one of {', '.join(sorted(LAYERS))}")
+        backend = LAYERS[name](backend, argument)
+    return backend
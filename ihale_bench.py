@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the MCP server
+Measures cold start from process launch to the first tools/list response, and
+checks which modules the server imports before it can answer. Also measures
+the peak memory of a tender detail request, buffered and streamed
+"""
+
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, AsyncIterator, List
+
+# Cold start budget (launch -> tools/list response), override with IHALE_STARTUP_BUDGET
+DEFAULT_STARTUP_BUDGET_SECONDS = float(os.environ.get("IHALE_STARTUP_BUDGET", "3.0"))
+
+# Peak RSS growth allowed for one large tender detail request (IHALE_DETAIL_MEMORY_BUDGET_MB)
+DEFAULT_DETAIL_MEMORY_BUDGET_MB = float(os.environ.get("IHALE_DETAIL_MEMORY_BUDGET_MB", "256"))
+
+# Heavy modules that must only be imported on first use, never at server start
+DEFERRED_MODULES = ("markitdown", "bs4", "ijson", "numpy", "pyarrow", "ihale_analytics", "ihale_export")
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import_time(module: str = "ihale_mcp", top: int = 10) -> Dict[str, Any]:
+    """Run `python -X importtime -c "import <module>"` and summarize the result"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_DIR, capture_output=True, text=True, check=True
+    )
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({
+                "module": name,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "top_level": len(indent) == 1
+            })
+
+    total_us = sum(entry["cumulative_us"] for entry in imports if entry["top_level"])
+    loaded = {entry["module"] for entry in imports}
+    slowest = sorted(
+        (entry for entry in imports if entry["top_level"]),
+        key=lambda entry: entry["cumulative_us"], reverse=True
+    )[:top]
+
+    return {
+        "module": module,
+        "total_seconds": round(total_us / 1e6, 4),
+        "slowest_top_level": [
+            {"module": entry["module"], "seconds": round(entry["cumulative_us"] / 1e6, 4)}
+            for entry in slowest
+        ],
+        "deferred_modules_loaded": sorted(
+            name for name in DEFERRED_MODULES
+            if name in loaded
+        )
+    }
+
+
+async def _time_cold_start(timeout: float) -> float:
+    """Launch the stdio server and time until it answers tools/list"""
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "ihale_cli",
+        cwd=PACKAGE_DIR,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+
+    def send(message: Dict[str, Any]) -> None:
+        process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+
+    async def read_response(request_id: int) -> Dict[str, Any]:
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                raise RuntimeError("Server exited before responding")
+            message = json.loads(line)
+            if message.get("id") == request_id:
+                return message
+
+    try:
+        send({
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-06-18",
+                "capabilities": {},
+                "clientInfo": {"name": "ihale-bench", "version": "0"}
+            }
+        })
+        await process.stdin.drain()
+        await asyncio.wait_for(read_response(1), timeout)
+        send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        await process.stdin.drain()
+        response = await asyncio.wait_for(read_response(2), timeout)
+        if "error" in response:
+            raise RuntimeError(f"tools/list failed: {response['error']}")
+        return time.perf_counter() - started
+    finally:
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+
+def measure_cold_start(runs: int = 5, timeout: float = 30.0) -> List[float]:
+    """Time `runs` fresh server launches up to their first tools/list response"""
+    return [asyncio.run(_time_cold_start(timeout)) for _ in range(runs)]
+
+
+def run_startup_benchmark(runs: int = 5, budget_seconds: float = DEFAULT_STARTUP_BUDGET_SECONDS) -> Dict[str, Any]:
+    """Run the import and cold start measurements and check them against the budget"""
+    import_report = measure_import_time()
+    timings = measure_cold_start(runs)
+    median = statistics.median(timings)
+
+    failures = []
+    if median > budget_seconds:
+        failures.append(f"median cold start {median:.3f}s exceeds budget {budget_seconds:.3f}s")
+    if import_report["deferred_modules_loaded"]:
+        failures.append(
+            "deferred modules imported at startup: " + ", ".join(import_report["deferred_modules_loaded"])
+        )
+
+    return {
+        "cold_start_seconds": [round(timing, 4) for timing in timings],
+        "median_seconds": round(median, 4),
+        "budget_seconds": budget_seconds,
+        "imports": import_report,
+        "passed": not failures,
+        "failures": failures
+    }
+
+
+def _synthetic_announcement_html(index: int, size_bytes: int) -> str:
+    """Announcement-like HTML (a heading and table rows) of about `size_bytes`"""
+    parts = [f"<html><body><h1>İhale İlanı {index}</h1><table>"]
+    size = len(parts[0])
+    row = 0
+    while size < size_bytes:
+        cell = (
+            f"<tr><td>Kalem {row}</td><td>Yapım işi kapsamında {row}. kalemin teknik şartnamesi, "
+            f"miktarı ve teslim yeri bilgileri</td><td>{row * 17 % 1000} adet</td></tr>"
+        )
+        parts.append(cell)
+        size += len(cell)
+        row += 1
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+
+async def _synthetic_detail_body(announcements: int, html_bytes: int) -> AsyncIterator[bytes]:
+    """An IhaleDetay response with large announcements, generated one announcement at a time
+
+    The body is never held whole by the benchmark itself, so the measured
+    peak is what the client keeps, not the fake server.
+    """
+    head = {
+        "id": 1, "ikn": "2025/000001", "ihaleAdi": "Bellek ölçümü", "ihaleDurum": "2",
+        "ihaleBilgi": {"ihaleDurumAciklama": "Teklif Vermeye Açık"},
+        "ihaleOzellikList": [{"ihaleOzellik": "TENDER_DETAIL.E_IHALE"}],
+        "ihtiyacKalemiOkasList": [{"kodu": "45000000", "adi": "İnşaat işleri", "koduAdi": "45000000 - İnşaat işleri"}],
+        "idare": {"id": 1, "adi": "Test İdaresi", "il": {"adi": "ANKARA"}, "ilce": {"ilceAdi": "ÇANKAYA"}},
+        "islemlerKuralSeti": {},
+        "dokumanSayisi": 0
+    }
+    yield ('{"item":' + json.dumps(head, ensure_ascii=False)[:-1] + ',"ilanList":[').encode("utf-8")
+    for index in range(announcements):
+        announcement = {
+            "id": index, "ilanTip": "2", "baslik": f"İlan {index}", "ilanTarihi": "2025-01-01T00:00:00",
+            "status": 1, "veriHtml": _synthetic_announcement_html(index, html_bytes)
+        }
+        yield ((", " if index else "") + json.dumps(announcement, ensure_ascii=False)).encode("utf-8")
+    yield b"]}}"
+
+
+def _peak_rss_bytes() -> int:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _memory_worker(mode: str, announcements: int, html_kb: int, convert: bool) -> None:
+    """Run one detail request in this process and print its peak RSS growth as JSON
+
+    Called in a fresh subprocess per measurement, since a process's peak
+    RSS never goes down. A small request first loads markitdown and ijson,
+    so the measured growth is the request's own.
+    """
+    import gc
+    import httpx
+    from ihale_client import EKAPClient
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        small = json.loads(request.content)["ihaleId"] == "0"
+        body = _synthetic_detail_body(1 if small else announcements, 1024 if small else html_kb * 1024)
+        return httpx.Response(200, headers={"Content-Type": "application/json"}, content=body)
+
+    async def run() -> Dict[str, Any]:
+        client = EKAPClient(stream_details=mode == "streaming")
+        client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            await client.get_tender_details(0, convert_announcements=convert)
+            gc.collect()
+            baseline = _peak_rss_bytes()
+            started = time.perf_counter()
+            result = await client.get_tender_details(1, convert_announcements=convert)
+            seconds = time.perf_counter() - started
+            peak = _peak_rss_bytes()
+        finally:
+            await client.aclose()
+        if "error" in result:
+            raise RuntimeError(f"{result['error']}: {result.get('message')}")
+        return {
+            "peak_rss_growth_mb": round((peak - baseline) / 2**20, 2),
+            "peak_rss_mb": round(peak / 2**20, 2),
+            "seconds": round(seconds, 4),
+            "announcements": result["announcements_summary"]["total_count"],
+            "result_mb": round(len(json.dumps(result, ensure_ascii=False).encode("utf-8")) / 2**20, 2)
+        }
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def measure_detail_memory(mode: str, announcements: int, html_kb: int, convert: bool = True) -> Dict[str, Any]:
+    """Peak RSS of one tender detail request ("buffered" or "streaming") in a fresh process"""
+    completed = subprocess.run(
+        [
+            sys.executable, "-c",
+            f"import ihale_bench; ihale_bench._memory_worker({mode!r}, {announcements}, {html_kb}, {convert})"
+        ],
+        cwd=PACKAGE_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_memory_benchmark(
+    runs: int = 3,
+    announcements: int = 20,
+    html_kb: int = 200,
+    convert: bool = True,
+    budget_mb: float = DEFAULT_DETAIL_MEMORY_BUDGET_MB
+) -> Dict[str, Any]:
+    """Measure peak RSS per detail request with and without streaming, and check it against the budget
+
+    The budget applies to the path the server takes: streaming when ijson
+    is installed, buffered otherwise.
+    """
+    from ihale_stream import stream_details_enabled
+
+    streaming = stream_details_enabled(True)
+    modes = ["buffered", "streaming"] if streaming else ["buffered"]
+
+    results: Dict[str, Any] = {}
+    for mode in modes:
+        measurements = [measure_detail_memory(mode, announcements, html_kb, convert) for _ in range(runs)]
+        growth = [measurement["peak_rss_growth_mb"] for measurement in measurements]
+        results[mode] = {
+            "peak_rss_growth_mb": growth,
+            "median_peak_rss_growth_mb": round(statistics.median(growth), 2),
+            "median_seconds": round(statistics.median(measurement["seconds"] for measurement in measurements), 4),
+            "result_mb": measurements[0]["result_mb"]
+        }
+
+    served = "streaming" if streaming else "buffered"
+    failures = []
+    if results[served]["median_peak_rss_growth_mb"] > budget_mb:
+        failures.append(
+            f"median {served} peak RSS growth {results[served]['median_peak_rss_growth_mb']:.1f}MB "
+            f"exceeds budget {budget_mb:.1f}MB"
+        )
+
+    report: Dict[str, Any] = {
+        "payload": {
+            "announcements": announcements,
+            "html_kb_per_announcement": html_kb,
+            "converted": convert
+        },
+        "streaming_available": streaming,
+        "modes": results,
+        "budget_mb": budget_mb,
+        "passed": not failures,
+        "failures": failures
+    }
+    if streaming:
+        buffered_growth = results["buffered"]["median_peak_rss_growth_mb"]
+        if buffered_growth:
+            report["streaming_to_buffered_ratio"] = round(results["streaming"]["median_peak_rss_growth_mb"] / buffered_growth, 3)
+    else:
+        report["note"] = "ijson is not installed (pip install ihale-mcp[streaming]); only the buffered path was measured"
+    return report
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Response size budgets for tool results
+A tool result is measured as compact UTF-8 JSON, walking the structure and
+stopping as soon as the running total passes the budget. Results over
+budget are degraded in steps until they fit: Markdown bodies are dropped
+(previews stay), then long strings are cut to preview length, then lists
+are capped. A `response_truncated` entry records what was removed (kept
+apart from the `truncated` flag some tools set for "more results exist")
+"""
+
+import copy
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# Default response budget in bytes (IHALE_RESPONSE_BUDGET); 0 disables budgets
+DEFAULT_RESPONSE_BUDGET = int(os.environ.get("IHALE_RESPONSE_BUDGET", "100000"))
+
+# Rough bytes per token, for budgets given in tokens
+BYTES_PER_TOKEN = 4
+
+# Fields holding full Markdown bodies; dropped first, their content_preview siblings kept
+MARKDOWN_FIELDS = ("markdown_content",)
+
+# Result key describing what the budget removed
+MARKER_KEY = "response_truncated"
+
+# Length strings are cut to in the second step
+PREVIEW_CHARS = 300
+
+_encode_string = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def json_size(value: Any, limit: Optional[int] = None) -> int:
+    """Size of `value` as compact UTF-8 JSON
+
+    With a limit, measuring stops once the size exceeds it and the partial
+    (already larger) total is returned.
+    """
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            total += len(_encode_string(item).encode("utf-8"))
+        elif isinstance(item, dict):
+            # Braces plus ":" per entry and "," between entries
+            total += 2 + 2 * len(item) - (1 if item else 0)
+            for key, child in item.items():
+                total += len(_encode_string(str(key)).encode("utf-8"))
+                stack.append(child)
+        elif isinstance(item, (list, tuple)):
+            total += 2 + max(0, len(item) - 1)
+            stack.extend(item)
+        elif item is None or isinstance(item, bool):
+            total += 4 if item is None or item else 5
+        else:
+            total += len(str(item))
+        if limit is not None and total > limit:
+            return total
+    return total
+
+
+def _drop_markdown(value: Any) -> int:
+    """Blank Markdown body fields in place; returns how many were dropped"""
+    dropped = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, child in item.items():
+                if key in MARKDOWN_FIELDS and isinstance(child, str) and child:
+                    item[key] = None
+                    dropped += 1
+                else:
+                    stack.append(child)
+        elif isinstance(item, list):
+            stack.extend(item)
+    return dropped
+
+
+def _shorten_strings(value: Any, max_chars: int) -> Tuple[Any, int]:
+    """Copy of `value` with strings longer than max_chars cut; returns (copy, strings cut)"""
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return value[:max_chars] + "…", 1
+        return value, 0
+    if isinstance(value, dict):
+        shortened, cut = {}, 0
+        for key, child in value.items():
+            shortened[key], child_cut = _shorten_strings(child, max_chars)
+            cut += child_cut
+        return shortened, cut
+    if isinstance(value, list):
+        shortened, cut = [], 0
+        for child in value:
+            child, child_cut = _shorten_strings(child, max_chars)
+            shortened.append(child)
+            cut += child_cut
+        return shortened, cut
+    return value, 0
+
+
+def _cap_lists(value: Any, cap: int, path: str, capped: Dict[str, int]) -> Any:
+    """Copy of `value` with every list cut to `cap` items; original lengths go in `capped`"""
+    if isinstance(value, dict):
+        return {key: _cap_lists(child, cap, f"{path}.{key}" if path else key, capped) for key, child in value.items()}
+    if isinstance(value, list):
+        if len(value) > cap:
+            capped[path or "$"] = len(value)
+        return [_cap_lists(child, cap, f"{path}[]", capped) for child in value[:cap]]
+    return value
+
+
+def _longest_list(value: Any) -> int:
+    if isinstance(value, dict):
+        return max((_longest_list(child) for child in value.values()), default=0)
+    if isinstance(value, list):
+        return max([len(value), *(_longest_list(child) for child in value)])
+    return 0
+
+
+def fit_to_budget(result: Dict[str, Any], max_bytes: int) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Degrade `result` until its JSON fits in max_bytes
+
+    Returns the (possibly new) result and a description of what was removed,
+    or None if it already fit. The description is also stored in the
+    result's `response_truncated` entry.
+    """
+    if max_bytes <= 0 or json_size(result, max_bytes) <= max_bytes:
+        return result, None
+
+    original_bytes = json_size(result)
+    marker: Dict[str, Any] = {"budget_bytes": max_bytes, "original_bytes": original_bytes, "steps": []}
+    # Leave room for the marker itself
+    budget = max(0, max_bytes - 512)
+
+    result = copy.deepcopy(result)
+    dropped = _drop_markdown(result)
+    if dropped:
+        marker["steps"].append("markdown_dropped")
+        marker["markdown_fields_dropped"] = dropped
+
+    if json_size(result, budget) > budget:
+        result, cut = _shorten_strings(result, PREVIEW_CHARS)
+        if cut:
+            marker["steps"].append("strings_shortened")
+            marker["strings_shortened"] = cut
+
+    if json_size(result, budget) > budget:
+        # Largest per-list cap that fits, by bisection over the cap
+        low, high = 0, _longest_list(result)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if json_size(_cap_lists(result, middle, "", {}), budget) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        capped: Dict[str, int] = {}
+        result = _cap_lists(result, low, "", capped)
+        if capped:
+            marker["steps"].append("lists_capped")
+            marker["lists_capped"] = capped
+
+    marker["returned_bytes"] = json_size(result)
+    if marker["returned_bytes"] > max_bytes:
+        marker["over_budget"] = True
+    result[MARKER_KEY] = marker
+    return result, marker
+
+
+def budget_from_meta(meta: Any) -> Optional[int]:
+    """Budget requested by a client in the request _meta, in bytes"""
+    if not isinstance(meta, dict):
+        return None
+    for key, scale in (("max_response_bytes", 1), ("max_response_tokens", BYTES_PER_TOKEN)):
+        value = meta.get(key)
+        if value is not None:
+            try:
+                return max(0, int(float(value) * scale))
+            except (TypeError, ValueError):
+                return None
+    return None
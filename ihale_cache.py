@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Response caches for EKAPClient
+An in-process LRU cache for single-process (stdio) use, and a SQLite cache that
+several server worker processes can share
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+
+from ihale_deadline import DeadlineExceeded, expired, within_deadline
+from ihale_profile import CallStats, add_call_stats, collect_call_stats
+from ihale_scheduler import current_request
+from ihale_store import DATA_DIR
+
+# Cache lifetime per EKAPClient method namespace, in seconds
+CACHE_TTLS = {
+    "search": 300,
+    "okas": 86400,
+    "authorities": 86400,
+    "announcements": 3600,
+    "details": 3600,
+    "document_url": 7 * 86400,
+}
+
+
+class MemoryCache:
+    """Bounded in-process LRU cache with per-entry expiry
+
+    Values are stored JSON-encoded so callers can't mutate cached results.
+    """
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return json.loads(payload)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.time() + ttl, json.dumps(value, ensure_ascii=False))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def close(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteCache:
+    """Cache in a SQLite file, shared by every process that opens the same path"""
+
+    # Purge expired rows after this many writes
+    PURGE_INTERVAL = 500
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path).expanduser() if path else DATA_DIR / "cache.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(str(self.path), timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_cache(kind: Optional[str] = None, max_entries: Optional[int] = None):
+    """Build the cache selected by IHALE_CACHE (memory, sqlite or none)"""
+    kind = (kind or os.environ.get("IHALE_CACHE", "memory")).lower()
+    if kind == "none":
+        return None
+    if kind == "sqlite":
+        return SQLiteCache(os.environ.get("IHALE_CACHE_PATH"))
+    if kind == "memory":
+        return MemoryCache(max_entries or int(os.environ.get("IHALE_CACHE_MAX_ENTRIES", "2000")))
+    raise ValueError(f"Unknown IHALE_CACHE backend: {kind}")
+
+
+def create_document_url_cache(kind: Optional[str] = None):
+    """Build the document URL cache; entries are tiny, so it holds many more of them"""
+    return create_cache(kind, max_entries=int(os.environ.get("IHALE_DOCUMENT_URL_CACHE_MAX_ENTRIES", "50000")))
+
+
+def cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    """Stable cache key for a namespace and its call arguments"""
+    return f"{namespace}:" + json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+
+# Result keys that, when set, keep a result out of the cache
+UNCACHEABLE_FLAGS = ("error", "partial", "fuzzy_matches")
+
+
+class _InFlight:
+    """A shared fetch that concurrent callers for the same cache key wait on"""
+
+    def __init__(self, request):
+        self.task: Optional["asyncio.Task"] = None
+        self.request = request
+        # EKAP and conversion time of the fetch, credited to each caller that waits for it
+        self.stats = CallStats()
+        self.waiters = 0
+        self.shared = False
+
+
+def cached(namespace: str, cache_attr: str = "cache") -> Callable:
+    """Cache successful results of an async EKAPClient method in `self.<cache_attr>`
+
+    The key is built from all bound arguments (defaults applied). Results
+    carrying an "error" key, marked "partial", or made of "fuzzy_matches"
+    from the local catalogs (which keep growing, so a later call may match
+    better) are never cached. Concurrent
+    calls with the same key share one fetch (e.g. a foreground call joining a
+    background prefetch); the fetch is cancelled only when every caller
+    waiting on it is cancelled or out of time.
+
+    The fetch runs under the deadline of the call that started it, so that
+    call still gets partial results. A caller joining it waits only until
+    its own deadline, and fetches again itself if the shared result was cut
+    short while it still has time left.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache = getattr(self, cache_attr, None)
+            if cache is None:
+                return await method(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name != "self"}
+            key = cache_key(namespace, params)
+
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+            inflight = self._inflight
+            entry = inflight.get(key)
+            started_here = entry is None
+            if not started_here:
+                entry.shared = True
+                # Don't leave an interactive caller queued behind a prefetch's priority
+                entry.request.boost(current_request().priority)
+            else:
+                entry = _InFlight(current_request())
+
+                async def fetch():
+                    # Collect the fetch's own stats rather than adding to the starting call's,
+                    # which may have given up on it before it finishes
+                    with collect_call_stats(entry.stats):
+                        fetched = await method(self, *args, **kwargs)
+                    target = getattr(self, cache_attr, None)
+                    # Partial results were cut short by a deadline and aren't worth keeping
+                    cacheable = isinstance(fetched, dict) and not any(
+                        fetched.get(flag) for flag in UNCACHEABLE_FLAGS
+                    )
+                    if cacheable and target is not None:
+                        target.set(key, fetched, CACHE_TTLS.get(namespace, 300))
+                    return fetched
+
+                entry.task = asyncio.ensure_future(fetch())
+                inflight[key] = entry
+                entry.task.add_done_callback(
+                    lambda _task, entry=entry: inflight.pop(key, None) if inflight.get(key) is entry else None
+                )
+
+            entry.waiters += 1
+            try:
+                if started_here:
+                    # The fetch already runs under this call's deadline
+                    result = await asyncio.shield(entry.task)
+                else:
+                    result = await within_deadline(asyncio.shield(entry.task))
+            except (asyncio.CancelledError, DeadlineExceeded):
+                if entry.waiters == 1:
+                    entry.task.cancel()
+                raise
+            finally:
+                entry.waiters -= 1
+            add_call_stats(entry.stats)
+
+            if not started_here and isinstance(result, dict) and result.get("partial") and not expired():
+                # Cut short by the starting call's deadline while this call still has time
+                return await wrapper(self, *args, **kwargs)
+
+            # When several callers shared the fetch, each gets its own copy to mutate
+            return copy.deepcopy(result) if entry.shared else result
+
+        return wrapper
+
+    return decorator
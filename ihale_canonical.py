@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Canonical form of tender searches and reuse of fully fetched results
+EKAPClient.search_tenders takes ~50 arguments, and many spellings of the
+same search (reordered lists, default flags spelled out, search scopes with
+no search text) reach the API as different payloads. CanonicalQuery reduces
+them to one form with a stable hash. CompleteResults remembers searches
+whose whole result set was fetched, so a narrower search (a sub-range of
+tender dates, a subset of provinces, types or statuses) can be answered by
+filtering those rows locally instead of calling EKAP again
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ihale_models import REGISTRY
+from ihale_text import fold, normalize_term
+
+# Formats seen in the ihaleTarihSaat field
+TENDER_DATETIME_FORMATS = (
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d",
+)
+
+LIST_FIELDS = (
+    "tender_types", "provinces", "tender_statuses", "tender_methods", "tender_sub_methods",
+    "okas_codes", "authority_ids", "proposal_types", "announcement_types",
+)
+
+BOOLEAN_FIELDS = (
+    "e_ihale", "e_eksiltme_yapilacak_mi", "ortak_alim_mi", "kismi_teklif_mi",
+    "fiyat_disi_unsur_varmi", "ekonomik_mali_yeterlilik_belgeleri_isteniyor_mu",
+    "mesleki_teknik_yeterlilik_belgeleri_isteniyor_mu", "is_deneyimi_gosteren_belgeler_isteniyor_mu",
+    "yerli_istekliye_fiyat_avantaji_uygulanıyor_mu", "yabanci_isteklilere_izin_veriliyor_mu",
+    "alternatif_teklif_verilebilir_mi", "konsorsiyum_katilabilir_mi", "alt_yuklenici_calistirilabilir_mi",
+    "fiyat_farki_verilecek_mi", "avans_verilecek_mi", "cerceve_anlasmasi_mi",
+    "personel_calistirilmasina_dayali_mi",
+)
+
+# Where the search text is looked for; only meaningful with a search text
+SCOPE_FIELDS = (
+    "search_in_ikn", "search_in_title", "search_in_announcement", "search_in_tech_spec",
+    "search_in_admin_spec", "search_in_similar_work", "search_in_location",
+    "search_in_nature_quantity", "search_in_tender_info", "search_in_contract_draft",
+    "search_in_bid_form",
+)
+
+DATE_FIELDS = ("tender_date_start", "tender_date_end", "announcement_date_start", "announcement_date_end")
+
+# search_tenders defaults for arguments that aren't None by default
+DEFAULTS: Dict[str, Any] = {
+    "search_text": "",
+    "search_type": "GirdigimGibi",
+    "order_by": "ihaleTarihi",
+    "sort_order": "desc",
+    **{field: True for field in SCOPE_FIELDS},
+}
+
+# Arguments that change how a page is delivered, not which tenders match
+PAGING_FIELDS = ("skip", "limit", "include_document_urls", "document_urls_from_cache_only")
+
+QUERY_FIELDS = (
+    ("search_text", "search_type", "ikn_year", "ikn_number", "order_by", "sort_order")
+    + DATE_FIELDS + BOOLEAN_FIELDS + LIST_FIELDS + SCOPE_FIELDS
+)
+
+# List filters that can be re-checked against a formatted search row
+_ROW_LIST_FIELDS = ("tender_types", "tender_statuses", "provinces")
+
+
+def parse_tender_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an EKAP tender datetime string, returning None if unparseable"""
+    if not value:
+        return None
+    value = value.strip()
+    for fmt in TENDER_DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _canonical_date(value: Optional[str]) -> Optional[str]:
+    """YYYY-MM-DD, or None for values the API would ignore anyway"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _canonical_list(values: Optional[List[Any]]) -> Optional[List[Any]]:
+    if not values:
+        return None
+    return sorted(set(values), key=lambda value: (str(type(value)), value))
+
+
+class CanonicalQuery:
+    """A tender search reduced to the arguments that change its result
+
+    `filters` holds only non-default values: lists sorted and de-duplicated,
+    invalid dates dropped, and search scope/type dropped when there is no
+    search text. Equal filters mean an identical result list.
+    """
+
+    def __init__(self, filters: Dict[str, Any]):
+        self.filters = filters
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "CanonicalQuery":
+        """Canonical form of EKAPClient.search_tenders keyword arguments"""
+        unknown = set(params) - set(QUERY_FIELDS) - set(PAGING_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown search parameters: {', '.join(sorted(unknown))}")
+
+        filters: Dict[str, Any] = {}
+        search_text = normalize_term(params.get("search_text") or "")
+        if search_text:
+            filters["search_text"] = search_text
+        for field in QUERY_FIELDS:
+            if field == "search_text" or field not in params:
+                continue
+            value = params[field]
+            if field in LIST_FIELDS:
+                value = _canonical_list(value)
+            elif field in DATE_FIELDS:
+                value = _canonical_date(value)
+            elif (field in SCOPE_FIELDS or field == "search_type") and not search_text:
+                continue
+            if value is None or value == DEFAULTS.get(field):
+                continue
+            filters[field] = value
+        return cls(filters)
+
+    def to_params(self) -> Dict[str, Any]:
+        """Full search_tenders keyword arguments (without paging) for this query"""
+        params = {field: DEFAULTS.get(field) for field in QUERY_FIELDS}
+        params.update(self.filters)
+        return params
+
+    @property
+    def key(self) -> str:
+        """Stable hash of the canonical filters"""
+        payload = json.dumps(self.filters, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CanonicalQuery) and self.filters == other.filters
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"CanonicalQuery({self.filters!r})"
+
+    def _tender_date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        start, end = self.filters.get("tender_date_start"), self.filters.get("tender_date_end")
+        return (
+            datetime.strptime(start, "%Y-%m-%d").date() if start else None,
+            datetime.strptime(end, "%Y-%m-%d").date() if end else None,
+        )
+
+    def subsumes(self, other: "CanonicalQuery") -> bool:
+        """True when every tender matching `other` also matches this query,
+        in a way filter_rows can check on formatted search rows"""
+        locally_checked = set(_ROW_LIST_FIELDS) | {"tender_date_start", "tender_date_end"}
+        mine = {field: value for field, value in self.filters.items() if field not in locally_checked}
+        theirs = {field: value for field, value in other.filters.items() if field not in locally_checked}
+        if mine != theirs:
+            return False
+
+        for field in _ROW_LIST_FIELDS:
+            broad, narrow = self.filters.get(field), other.filters.get(field)
+            if broad is not None and (narrow is None or not set(narrow) <= set(broad)):
+                return False
+
+        broad_start, broad_end = self._tender_date_range()
+        narrow_start, narrow_end = other._tender_date_range()
+        if broad_start and (narrow_start is None or narrow_start < broad_start):
+            return False
+        if broad_end and (narrow_end is None or narrow_end > broad_end):
+            return False
+        return True
+
+    def filter_rows(self, rows: List[Dict[str, Any]], broader: "CanonicalQuery") -> Optional[List[Dict[str, Any]]]:
+        """Rows of `broader`'s full result that also match this query
+
+        Only the constraints this query adds over `broader` are checked.
+        Returns None if a row lacks the field a constraint needs, in which
+        case the result can't be derived locally.
+        """
+        checks = []
+        for field, row_value in (
+            ("tender_types", lambda row: (row.get("type") or {}).get("code")),
+            ("tender_statuses", lambda row: (row.get("status") or {}).get("code")),
+        ):
+            wanted = self.filters.get(field)
+            if wanted is not None and wanted != broader.filters.get(field):
+                checks.append((row_value, {str(value) for value in wanted}, str))
+
+        provinces = self.filters.get("provinces")
+        if provinces is not None and provinces != broader.filters.get("provinces"):
+            names = {
+                fold(name) for name in map(REGISTRY.provinces.name_for_api_id, provinces) if name
+            }
+            checks.append((lambda row: row.get("province"), names, fold))
+
+        start, end = self._tender_date_range()
+        broad_start, broad_end = broader._tender_date_range()
+        check_dates = (start, end) != (broad_start, broad_end)
+
+        matched = []
+        for row in rows:
+            keep = True
+            for row_value, wanted, normalize in checks:
+                value = row_value(row)
+                if value is None:
+                    return None
+                if normalize(value) not in wanted:
+                    keep = False
+                    break
+            if keep and check_dates:
+                tender_datetime = parse_tender_datetime(row.get("tender_datetime"))
+                if tender_datetime is None:
+                    return None
+                day = tender_datetime.date()
+                keep = (start is None or day >= start) and (end is None or day <= end)
+            if keep:
+                matched.append(row)
+        return matched
+
+
+class CompleteResults:
+    """Searches whose whole result set has been fetched, for subsumption
+
+    The rows themselves live in the client's response cache (and expire
+    with it); this keeps the queries they belong to, newest first, so a
+    lookup only scans a bounded list of candidates.
+    """
+
+    NAMESPACE = "search_complete"
+
+    def __init__(self, max_queries: int = 64, max_rows: int = 10000):
+        self.max_queries = max_queries
+        self.max_rows = max_rows
+        self._queries: "OrderedDict[str, CanonicalQuery]" = OrderedDict()
+
+    def _cache_key(self, query: CanonicalQuery) -> str:
+        return f"{self.NAMESPACE}:{query.key}"
+
+    def remember(self, cache, query: CanonicalQuery, rows: List[Dict[str, Any]], ttl: float) -> None:
+        """Record `rows` as the complete result of `query`"""
+        if cache is None or len(rows) > self.max_rows:
+            return
+        # Document URLs depend on how the page was requested; they're re-resolved on answer
+        stored = [{key: value for key, value in row.items() if key != "document_url"} for row in rows]
+        cache.set(self._cache_key(query), stored, ttl)
+        self._queries[query.key] = query
+        self._queries.move_to_end(query.key, last=False)
+        while len(self._queries) > self.max_queries:
+            self._queries.popitem()
+
+    def answer(self, cache, query: CanonicalQuery) -> Optional[Tuple[CanonicalQuery, List[Dict[str, Any]]]]:
+        """(broader query, matching rows) if a remembered search covers `query`"""
+        if cache is None:
+            return None
+        for key, broader in list(self._queries.items()):
+            if not broader.subsumes(query):
+                continue
+            rows = cache.get(self._cache_key(broader))
+            if rows is None:
+                # Expired or evicted from the response cache
+                del self._queries[key]
+                continue
+            matched = query.filter_rows(rows, broader)
+            if matched is not None:
+                return broader, matched
+        return None
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Record and replay of EKAP HTTP traffic
+A cassette is a gzip-compressed JSONL file with one request/response pair
+per line: method, URL, JSON payload, status, response headers, body and
+how long the response took. RecordingTransport writes one while passing
+requests through to EKAP; ReplayTransport answers from one without any
+network access, optionally sleeping for each response's recorded latency,
+so production workloads can be profiled and benchmarked locally against
+real payload shapes
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import httpx
+
+# Multiplier for recorded latencies during replay (IHALE_REPLAY_LATENCY); 0 replays instantly
+DEFAULT_REPLAY_LATENCY = float(os.environ.get("IHALE_REPLAY_LATENCY", "0"))
+
+# Response headers that describe the wire encoding, which a replayed body no longer has
+_ENCODING_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMiss(httpx.TransportError):
+    """A replayed request has no recorded response"""
+
+
+def _payload(content: bytes) -> Any:
+    """Request body as JSON if it is JSON, else text"""
+    if not content:
+        return None
+    text = content.decode("utf-8", errors="replace")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def interaction_key(method: str, url: str, payload: Any) -> Tuple[str, str, str]:
+    """Match key of a request: method, URL and the payload with keys sorted"""
+    return method.upper(), url, json.dumps(payload, sort_keys=True, ensure_ascii=False)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Pass requests to `inner` and append each exchange to a cassette
+
+    Each exchange is written as its own complete gzip member (members
+    concatenate) in a single O_APPEND write, so a killed process leaves at
+    most a partly written last entry, several sessions can build up one
+    cassette, and server workers recording to the same file don't
+    interleave their entries.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, path: str):
+        self.inner = inner
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd: Optional[int] = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        payload = _payload(await request.aread())
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - started
+
+        headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() not in _ENCODING_HEADERS]
+        entry: Dict[str, Any] = {
+            "method": request.method,
+            "url": str(request.url),
+            "payload": payload,
+            "status": response.status_code,
+            "headers": headers,
+            "elapsed": round(elapsed, 6),
+            "recorded_at": time.time(),
+        }
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_base64"] = base64.b64encode(body).decode("ascii")
+        member = gzip.compress((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        with self._lock:
+            if self._fd is not None:
+                os.write(self._fd, member)
+                self.recorded += 1
+
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answer requests from a cassette, never touching the network
+
+    Identical requests get their recorded responses in order, and the last
+    one again once those run out. A request that was never recorded raises
+    CassetteMiss, which EKAPClient reports like any other failed request.
+    A last entry cut short by a recorder that was killed is skipped.
+    """
+
+    def __init__(self, path: str, latency: float = DEFAULT_REPLAY_LATENCY):
+        self.path = Path(path).expanduser()
+        self.latency = latency
+        self._interactions: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = {}
+        self.replayed = 0
+        self.misses = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+            try:
+                for line in fh:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Only the cut-off last line of a truncated member can fail to parse
+                        break
+                    key = interaction_key(entry["method"], entry["url"], entry.get("payload"))
+                    self._interactions.setdefault(key, deque()).append(entry)
+            except (EOFError, gzip.BadGzipFile):
+                pass
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._interactions.values())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = interaction_key(request.method, str(request.url), _payload(await request.aread()))
+        entries = self._interactions.get(key)
+        if not entries:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded response for {request.method} {request.url}", request=request)
+        entry = entries.popleft() if len(entries) > 1 else entries[0]
+        if self.latency > 0:
+            await asyncio.sleep(entry.get("elapsed", 0) * self.latency)
+        self.replayed += 1
+        if "body_base64" in entry:
+            body = base64.b64decode(entry["body_base64"])
+        else:
+            body = entry.get("body", "").encode("utf-8")
+        return httpx.Response(entry["status"], headers=entry.get("headers") or [], content=body, request=request)
+
+
+def create_transport(mode: str, path: str, inner: Optional[httpx.AsyncBaseTransport] = None, latency: Optional[float] = None):
+    """The cassette transport for mode "record" (wrapping `inner`) or "replay" """
+    if mode == "record":
+        if inner is None:
+            raise ValueError("Recording needs the transport to record from")
+        return RecordingTransport(inner, path)
+    if mode == "replay":
+        return ReplayTransport(path, DEFAULT_REPLAY_LATENCY if latency is None else latency)
+    raise ValueError(f"Unknown cassette mode: {mode}")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Section-aware chunking of large Markdown texts
+Chunks are addressed by character offset into the full text, so a client can
+page through a document with next_offset. Chunk ends prefer heading, paragraph
+and table-row boundaries, and a chunk starting inside a table repeats the
+table's header rows
+"""
+
+import re
+from typing import Dict, Any, List, Optional
+
+# Default chunk size in characters
+DEFAULT_CHUNK_CHARS = 20000
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+def outline(text: str) -> List[Dict[str, Any]]:
+    """Headings of a Markdown text with their level and character offset"""
+    return [
+        {"level": len(match.group(1)), "title": match.group(2), "offset": match.start()}
+        for match in _HEADING_RE.finditer(text)
+    ]
+
+
+def _is_table_line(line: str) -> bool:
+    return line.lstrip().startswith("|")
+
+
+def _split_point(text: str, start: int, max_chars: int) -> int:
+    """End of the chunk starting at `start`: the best boundary within max_chars
+
+    Boundaries in the second half of the window are preferred in this order:
+    before a heading, at a blank line (paragraph or table end), at any line
+    end (e.g. between table rows). Otherwise the chunk is cut at max_chars.
+    """
+    limit = start + max_chars
+    if limit >= len(text):
+        return len(text)
+
+    window = text[start:limit]
+    min_fill = len(window) // 2
+    for marker in ("\n#", "\n\n", "\n"):
+        position = window.rfind(marker, min_fill)
+        if position > 0:
+            return start + position + 1
+    return limit
+
+
+def _table_header(text: str, offset: int) -> Optional[str]:
+    """Header rows of the table `offset` falls inside, if it doesn't start there"""
+    line_start = text.rfind("\n", 0, offset) + 1
+    line_end = text.find("\n", offset)
+    line = text[line_start:line_end if line_end != -1 else len(text)]
+    if not _is_table_line(line):
+        return None
+
+    # Walk back to the first row of the table
+    table_lines = []
+    position = line_start
+    while position > 0:
+        previous_start = text.rfind("\n", 0, position - 1) + 1
+        previous = text[previous_start:position - 1]
+        if not _is_table_line(previous):
+            break
+        table_lines.append(previous)
+        position = previous_start
+
+    # Need the header row and its separator above us to repeat them
+    if len(table_lines) < 2:
+        return None
+    table_lines.reverse()
+    return "\n".join(table_lines[:2]) + "\n"
+
+
+def chunk_markdown(text: str, offset: int = 0, max_chars: int = DEFAULT_CHUNK_CHARS) -> Dict[str, Any]:
+    """Return the chunk of `text` starting at `offset` and the offset of the next one"""
+    offset = max(0, min(offset, len(text)))
+    end = _split_point(text, offset, max_chars)
+    content = text[offset:end]
+
+    header = _table_header(text, offset) if offset else None
+    if header:
+        content = header + content
+
+    # Nearest heading at or above the chunk start
+    section = None
+    line_end = text.find("\n", offset)
+    for match in _HEADING_RE.finditer(text, 0, line_end if line_end != -1 else len(text)):
+        section = match.group(2)
+
+    return {
+        "content": content,
+        "offset": offset,
+        "next_offset": end if end < len(text) else None,
+        "total_chars": len(text),
+        "section": section,
+        "table_header_repeated": bool(header)
+    }
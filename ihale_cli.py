@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Command line interface for bulk İhale jobs
+Calls EKAPClient directly, without going through an MCP client
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import deque
+from typing import Dict, Any, List, Optional, Iterable, Iterator, AsyncIterator, Callable, Awaitable, TextIO
+
+from ihale_client import EKAPClient
+from ihale_query import prepare_search_params
+
+# Subcommands handled by the CLI; anything else starts the MCP server
+COMMANDS = {"search", "details", "announcements", "okas", "authorities", "sync", "export", "snapshot", "bench"}
+
+
+def _parse_query(query: Optional[str]) -> Dict[str, Any]:
+    """Parse a --query argument: inline JSON or @path to a JSON file"""
+    if not query:
+        return {}
+    if query.startswith("@"):
+        with open(query[1:], "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    return json.loads(query)
+
+
+def _add_query_arguments(parser: argparse.ArgumentParser) -> None:
+    """Search arguments shared by subcommands that run a tender search"""
+    parser.add_argument(
+        "--query",
+        help="search_tenders arguments as JSON, or @file.json "
+             "(e.g. '{\"tender_types\": [2], \"provinces\": [6]}')"
+    )
+    parser.add_argument("--search-text", help="Shortcut for the search_text argument")
+    parser.add_argument("--max-results", type=int, default=None, help="Stop after this many tenders")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent EKAP requests")
+
+
+def _search_params_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    """Build EKAPClient.search_tenders kwargs from parsed CLI arguments"""
+    params = _parse_query(args.query)
+    if args.search_text:
+        params["search_text"] = args.search_text
+    return prepare_search_params(params)
+
+
+def _read_inputs(values: List[str], input_path: Optional[str]) -> Iterator[str]:
+    """Yield positional values, then lines from --input (a file, or - for stdin)
+
+    Reads stdin automatically when nothing else was given and it is piped.
+    Blank lines and lines starting with # are skipped.
+    """
+    yield from values
+    if input_path is None and not values and not sys.stdin.isatty():
+        input_path = "-"
+    if input_path is None:
+        return
+    fh = sys.stdin if input_path == "-" else open(input_path, "r", encoding="utf-8")
+    try:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def _read_ids(values: List[str], input_path: Optional[str]) -> Iterator[int]:
+    """Read tender IDs; each line may be a bare ID or a JSON object with an "id" field"""
+    for value in _read_inputs(values, input_path):
+        if value.startswith("{"):
+            yield int(json.loads(value)["id"])
+        else:
+            yield int(value)
+
+
+async def _map_concurrent(
+    items: Iterable[Any],
+    func: Callable[[Any], Awaitable[Any]],
+    concurrency: int
+) -> AsyncIterator[Any]:
+    """Apply func to items with at most `concurrency` calls in flight, yielding results in input order"""
+    pending = deque()
+    for item in items:
+        pending.append(asyncio.ensure_future(func(item)))
+        if len(pending) >= concurrency:
+            yield await pending.popleft()
+    while pending:
+        yield await pending.popleft()
+
+
+def _write_jsonl(out: TextIO, record: Dict[str, Any]) -> None:
+    out.write(json.dumps(record, ensure_ascii=False))
+    out.write("\n")
+
+
+def _open_output(path: Optional[str]) -> TextIO:
+    if not path or path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8")
+
+
+def _add_id_arguments(parser: argparse.ArgumentParser) -> None:
+    """Input and output arguments for subcommands that take tender IDs"""
+    parser.add_argument("ids", nargs="*", help="Tender IDs (also read from --input or piped stdin)")
+    parser.add_argument("--input", help="File with one tender ID (or search JSONL row) per line; - for stdin")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent EKAP requests")
+    parser.add_argument("--output", "-o", help="JSONL output file (default: stdout)")
+
+
+def _add_term_arguments(parser: argparse.ArgumentParser) -> None:
+    """Input and output arguments for lookup subcommands that take search terms"""
+    parser.add_argument("terms", nargs="*", help="Search terms (also read from --input or piped stdin)")
+    parser.add_argument("--input", help="File with one search term per line; - for stdin")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum results per term (1-500)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent EKAP requests")
+    parser.add_argument("--output", "-o", help="JSONL output file (default: stdout)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ihale-mcp",
+        description="Bulk access to EKAP v2 tender data. Run without a subcommand to start the MCP server."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="Search tenders and emit one JSONL row per tender")
+    _add_query_arguments(search_parser)
+    search_parser.add_argument("--document-urls", action="store_true", help="Resolve document URLs for each tender")
+    search_parser.add_argument("--output", "-o", help="JSONL output file (default: stdout)")
+
+    details_parser = subparsers.add_parser("details", help="Fetch tender details for a list of IDs")
+    _add_id_arguments(details_parser)
+    details_parser.add_argument("--no-markdown", action="store_true", help="Skip HTML-to-Markdown conversion of announcements")
+
+    announcements_parser = subparsers.add_parser("announcements", help="Fetch announcements for a list of tender IDs")
+    _add_id_arguments(announcements_parser)
+
+    okas_parser = subparsers.add_parser("okas", help="Search OKAS codes for a list of terms")
+    _add_term_arguments(okas_parser)
+    okas_parser.add_argument("--kalem-turu", type=int, choices=[1, 2, 3], help="1=Mal, 2=Hizmet, 3=Yapım")
+
+    authorities_parser = subparsers.add_parser("authorities", help="Search authorities for a list of terms")
+    _add_term_arguments(authorities_parser)
+
+    sync_parser = subparsers.add_parser("sync", help="Sync search results (and optionally details) into the local store")
+    _add_query_arguments(sync_parser)
+    sync_parser.add_argument("--db", help="SQLite store path (default: IHALE_DB_PATH or ~/.ihale-mcp/ihale.db)")
+    sync_parser.add_argument("--details", action="store_true", help="Also fetch and store tender details")
+    sync_parser.add_argument("--announcements", action="store_true", help="Also fetch and store tender announcements")
+    sync_parser.add_argument(
+        "--results", action="store_true",
+        help="Parse Sonuç İlanı announcements into the contract award index (implies --details --announcements)"
+    )
+
+    export_parser = subparsers.add_parser("export", help="Stream all results of a search to a file")
+    _add_query_arguments(export_parser)
+    export_parser.add_argument("output", help="Output file path")
+    export_parser.add_argument(
+        "--format", dest="output_format", choices=["jsonl", "csv", "parquet"], default=None,
+        help="Output format (default: inferred from the file extension, else jsonl)"
+    )
+    export_parser.add_argument("--details", action="store_true", help="Join tender detail fields into each row")
+    export_parser.add_argument("--document-urls", action="store_true", help="Resolve document URLs for each tender")
+    export_parser.add_argument("--row-group-size", type=int, default=10000, help="Parquet row group size")
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", help="Write the local store and OKAS/DETSIS reference data to an offline snapshot file"
+    )
+    snapshot_parser.add_argument("output", help="Snapshot file path (serve it with IHALE_SNAPSHOT or --snapshot)")
+    snapshot_parser.add_argument("--db", help="SQLite store path (default: IHALE_DB_PATH or ~/.ihale-mcp/ihale.db)")
+    snapshot_parser.add_argument(
+        "--no-reference-data", action="store_true",
+        help="Don't fetch OKAS codes and DETSIS authorities from EKAP (the snapshot's lookups will be empty)"
+    )
+    snapshot_parser.add_argument("--okas-limit", type=int, default=50000, help="Maximum OKAS codes to fetch")
+    snapshot_parser.add_argument("--authority-limit", type=int, default=200000, help="Maximum authorities to fetch")
+
+    bench_parser = subparsers.add_parser("bench", help="Run performance benchmarks")
+    bench_parser.add_argument(
+        "benchmark", choices=["startup", "memory"],
+        help="startup: cold start to first tools/list response; memory: peak RSS of a large tender detail request"
+    )
+    bench_parser.add_argument("--runs", type=int, default=None, help="Number of measured runs (startup: 5, memory: 3)")
+    bench_parser.add_argument(
+        "--budget", type=float, default=None,
+        help="Fail if the median exceeds this many seconds (startup) or megabytes of RSS growth (memory)"
+    )
+    bench_parser.add_argument("--announcements", type=int, default=20, help="memory: announcements in the synthetic tender")
+    bench_parser.add_argument("--html-kb", type=int, default=200, help="memory: HTML size of each announcement in KB")
+    bench_parser.add_argument("--no-convert", action="store_true", help="memory: skip Markdown conversion")
+
+    return parser
+
+
+def _run_bench(args: argparse.Namespace) -> int:
+    if args.benchmark == "memory":
+        from ihale_bench import run_memory_benchmark, DEFAULT_DETAIL_MEMORY_BUDGET_MB
+
+        report = run_memory_benchmark(
+            runs=args.runs or 3,
+            announcements=args.announcements,
+            html_kb=args.html_kb,
+            convert=not args.no_convert,
+            budget_mb=args.budget if args.budget is not None else DEFAULT_DETAIL_MEMORY_BUDGET_MB
+        )
+    else:
+        from ihale_bench import run_startup_benchmark, DEFAULT_STARTUP_BUDGET_SECONDS
+
+        report = run_startup_benchmark(
+            runs=args.runs or 5,
+            budget_seconds=args.budget if args.budget is not None else DEFAULT_STARTUP_BUDGET_SECONDS
+        )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["passed"] else 1
+
+
+async def _run_export(client: EKAPClient, args: argparse.Namespace) -> int:
+    from ihale_export import export_tenders
+
+    output_format = args.output_format
+    if output_format is None:
+        suffix = args.output.rsplit(".", 1)[-1].lower() if "." in args.output else ""
+        output_format = suffix if suffix in ("jsonl", "csv", "parquet") else "jsonl"
+
+    result = await export_tenders(
+        client,
+        args.output,
+        output_format=output_format,
+        search_params=_search_params_from_args(args),
+        max_results=args.max_results,
+        include_details=args.details,
+        include_document_urls=args.document_urls,
+        concurrency=args.concurrency,
+        row_group_size=args.row_group_size
+    )
+    print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+    return 1 if result.get("error") else 0
+
+
+async def _run_search(client: EKAPClient, args: argparse.Namespace) -> int:
+    out = _open_output(args.output)
+    rows = 0
+    try:
+        async for page in client.iter_tender_pages(
+            max_results=args.max_results,
+            concurrency=args.concurrency,
+            include_document_urls=args.document_urls,
+            **_search_params_from_args(args)
+        ):
+            if page.get("error"):
+                print(json.dumps(page, ensure_ascii=False), file=sys.stderr)
+                return 1
+            for tender in page.get("tenders", []):
+                _write_jsonl(out, tender)
+                rows += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps({"rows_written": rows}), file=sys.stderr)
+    return 0
+
+
+async def _emit_concurrent(
+    args: argparse.Namespace,
+    items: Iterable[Any],
+    func: Callable[[Any], Awaitable[Dict[str, Any]]]
+) -> int:
+    """Run func over items concurrently and write each result as a JSONL row"""
+    out = _open_output(args.output)
+    failures = 0
+    try:
+        async for record in _map_concurrent(items, func, args.concurrency):
+            if record.get("error"):
+                failures += 1
+            _write_jsonl(out, record)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+
+async def _run_details(client: EKAPClient, args: argparse.Namespace) -> int:
+    async def fetch(tender_id: int) -> Dict[str, Any]:
+        result = await client.get_tender_details(tender_id, convert_announcements=not args.no_markdown)
+        result.setdefault("tender_id", tender_id)
+        return result
+
+    return await _emit_concurrent(args, _read_ids(args.ids, args.input), fetch)
+
+
+async def _run_announcements(client: EKAPClient, args: argparse.Namespace) -> int:
+    async def fetch(tender_id: int) -> Dict[str, Any]:
+        result = await client.get_tender_announcements(tender_id)
+        result.setdefault("tender_id", tender_id)
+        return result
+
+    return await _emit_concurrent(args, _read_ids(args.ids, args.input), fetch)
+
+
+async def _run_okas(client: EKAPClient, args: argparse.Namespace) -> int:
+    async def fetch(term: str) -> Dict[str, Any]:
+        return await client.search_okas_codes(search_term=term, kalem_turu=args.kalem_turu, limit=args.limit)
+
+    return await _emit_concurrent(args, _read_inputs(args.terms, args.input), fetch)
+
+
+async def _run_authorities(client: EKAPClient, args: argparse.Namespace) -> int:
+    async def fetch(term: str) -> Dict[str, Any]:
+        return await client.search_authorities(search_term=term, limit=args.limit)
+
+    return await _emit_concurrent(args, _read_inputs(args.terms, args.input), fetch)
+
+
+async def _run_sync(client: EKAPClient, args: argparse.Namespace) -> int:
+    from ihale_store import TenderStore
+
+    if args.results:
+        args.details = args.announcements = True
+        from ihale_results import index_tender_results
+
+    stats = {"tenders": 0, "details": 0, "announcements": 0, "awards": 0, "errors": 0}
+
+    async def fetch_extras(tender_id: int) -> Dict[str, Any]:
+        extras = {"tender_id": tender_id}
+        if args.details:
+            extras["details"] = await client.get_tender_details(tender_id)
+        if args.announcements:
+            extras["announcements"] = await client.get_tender_announcements(tender_id)
+        return extras
+
+    with TenderStore(args.db) as store:
+        async for page in client.iter_tender_pages(
+            max_results=args.max_results,
+            concurrency=args.concurrency,
+            **_search_params_from_args(args)
+        ):
+            if page.get("error"):
+                print(json.dumps(page, ensure_ascii=False), file=sys.stderr)
+                stats["errors"] += 1
+                break
+            tenders = page.get("tenders", [])
+            stats["tenders"] += store.upsert_tenders(tenders)
+
+            if not (args.details or args.announcements):
+                continue
+            tender_ids = [tender["id"] for tender in tenders if tender.get("id") is not None]
+            async for extras in _map_concurrent(tender_ids, fetch_extras, args.concurrency):
+                for key, upsert in (("details", store.upsert_details), ("announcements", store.upsert_announcements)):
+                    if key not in extras:
+                        continue
+                    if extras[key].get("error"):
+                        stats["errors"] += 1
+                    else:
+                        upsert(extras["tender_id"], extras[key])
+                        stats[key] += 1
+                if args.results and not extras["announcements"].get("error"):
+                    details = extras["details"] if not extras["details"].get("error") else None
+                    stats["awards"] += index_tender_results(
+                        store,
+                        extras["tender_id"],
+                        extras["announcements"].get("announcements", []),
+                        details,
+                        store.get_tender(extras["tender_id"])
+                    )["awards"]
+
+        stats["store"] = str(store.path)
+        stats["store_counts"] = store.counts()
+
+    print(json.dumps(stats, ensure_ascii=False))
+    return 1 if stats["errors"] else 0
+
+
+async def _run_snapshot(client: EKAPClient, args: argparse.Namespace) -> int:
+    from ihale_snapshot import build_snapshot
+    from ihale_store import TenderStore
+
+    catalogs: Dict[str, Any] = {"okas_codes": [], "authorities": [], "errors": {}}
+    if not args.no_reference_data:
+        catalogs = await client.get_reference_catalogs(args.okas_limit, args.authority_limit)
+    okas_codes, authorities, errors = catalogs["okas_codes"], catalogs["authorities"], catalogs["errors"]
+
+    with TenderStore(args.db) as store:
+        manifest = build_snapshot(
+            store, args.output, okas_codes, authorities,
+            {"source_store": str(store.path), "reference_errors": errors}
+        )
+    print(json.dumps({"snapshot": args.output, **manifest}, ensure_ascii=False))
+    return 1 if errors else 0
+
+
+HANDLERS = {
+    "search": _run_search,
+    "details": _run_details,
+    "announcements": _run_announcements,
+    "okas": _run_okas,
+    "authorities": _run_authorities,
+    "sync": _run_sync,
+    "export": _run_export,
+    "snapshot": _run_snapshot,
+}
+
+
+async def _run(args: argparse.Namespace) -> int:
+    # IHALE_BACKEND stacks layers (e.g. "store,live") the same way as for the server
+    spec = os.environ.get("IHALE_BACKEND")
+    if spec:
+        from ihale_backend import build_backend
+        client = build_backend(spec)
+    else:
+        client = EKAPClient()
+    try:
+        return await HANDLERS[args.command](client, args)
+    finally:
+        await client.aclose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point: run a CLI subcommand, or the MCP server when none is given"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        # fastmcp is only imported when actually serving
+        from ihale_mcp import main as server_main
+        server_main(argv)
+        return 0
+
+    args = build_parser().parse_args(argv)
+    if args.command == "bench":
+        return _run_bench(args)
+    try:
+        return asyncio.run(_run(args))
+    except (ValueError, OSError) as e:
+        print(f"ihale-mcp: error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,17 +3,67 @@
 EKAP v2 API client for Turkish government tender/procurement data - FIXED VERSION
 """
 
+import asyncio
 import httpx
+import logging
 import ssl
-from typing import Dict, Any, Optional, List, Literal
+import threading
+from typing import Dict, Any, Optional, List, Literal, AsyncIterator, BinaryIO, Callable, Tuple
 from datetime import datetime
 from io import BytesIO
-from markitdown import MarkItDown
+from ihale_backend import collect_search_pages, iter_search_pages, resolve_document_urls
+from ihale_cache import CACHE_TTLS, cached, cache_key
+from ihale_canonical import PAGING_FIELDS, CanonicalQuery, CompleteResults
+from ihale_deadline import DeadlineExceeded, within_deadline
+from ihale_models import REGISTRY
+from ihale_profile import timed
+from ihale_scheduler import Priority, request_context
+from ihale_stream import stream_details_enabled
+from ihale_text import TrigramIndex, normalize_term, turkish_lower, turkish_upper
+
+logger = logging.getLogger("ihale.client")
+
+
+def _term_variants(term: str) -> List[str]:
+    """The term as typed, then its Turkish upper- and lowercase forms"""
+    variants = []
+    for variant in (term, turkish_upper(term), turkish_lower(term)):
+        if variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+def _catalog_matches(
+    catalog: TrigramIndex,
+    term: str,
+    limit: int,
+    predicate: Callable[[Dict[str, Any]], bool] = lambda item: True
+) -> List[Dict[str, Any]]:
+    """Fuzzy catalog hits for `term`, one per entity, tagged with match_score"""
+    matches: List[Dict[str, Any]] = []
+    seen = set()
+    for score, item in catalog.search(term, limit=limit * 3):
+        if id(item) in seen or not predicate(item):
+            continue
+        seen.add(id(item))
+        matches.append({**item, "match_score": score})
+        if len(matches) >= limit:
+            break
+    return matches
+
 
 class EKAPClient:
-    """Client for EKAP v2 API"""
+    """Client for EKAP v2 API (the "live" backend of ihale_backend)"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache=None,
+        scheduler=None,
+        document_url_cache=None,
+        cassette_mode: Optional[Literal["record", "replay"]] = None,
+        cassette_path: Optional[str] = None,
+        stream_details: Optional[bool] = None
+    ):
         self.base_url = "https://ekapv2.kik.gov.tr"
         self.tender_endpoint = "/b_ihalearama/api/Ihale/GetListByParameters"
         self.okas_endpoint = "/b_ihalearama/api/IhtiyacKalemleri/GetAll"
@@ -37,6 +87,42 @@ class EKAPClient:
             'sec-ch-ua-platform': '"macOS"'
         }
         
+        # Optional response cache (see ihale_cache); None disables caching
+        self.cache = cache
+        # Separate long-lived cache for document redirect URLs, which rarely change
+        self.document_url_cache = document_url_cache
+        # Fetches currently running per cache key, shared by concurrent callers
+        self._inflight = {}
+        # Optional RequestScheduler (see ihale_scheduler) gating every outbound request
+        self.scheduler = scheduler
+        
+        # Shared connection pool, created lazily on first request
+        self._http_client: Optional[httpx.AsyncClient] = None
+        
+        # Optional cassette (see ihale_cassette): record every exchange with
+        # EKAP to it, or replay from it without touching the network
+        if cassette_mode is not None and not cassette_path:
+            raise ValueError(f"Cassette mode {cassette_mode!r} needs a cassette path")
+        self.cassette_mode = cassette_mode
+        self.cassette_path = cassette_path
+        self.offline = cassette_mode == "replay"
+        
+        # Parse tender details incrementally (see ihale_stream); None follows
+        # IHALE_STREAM_DETAILS, and either way it needs ijson installed
+        self.stream_details = stream_details
+        
+        # HTML-to-Markdown converter; markitdown is heavy to import, so it is
+        # only loaded the first time an announcement needs converting
+        self._markitdown = None
+        
+        # Every OKAS code and authority seen in API responses, for
+        # typo-tolerant lookups when the API's substring match finds nothing
+        self.okas_catalog: TrigramIndex = TrigramIndex()
+        self.authority_catalog: TrigramIndex = TrigramIndex()
+        
+        # Fully fetched searches that narrower searches can be answered from
+        self.complete_results = CompleteResults()
+        
     def _create_ssl_context(self) -> ssl.SSLContext:
         """Create SSL context that supports older protocols"""
         ssl_context = ssl.create_default_context()
@@ -45,23 +131,137 @@ class EKAPClient:
         ssl_context.verify_mode = ssl.CERT_NONE
         return ssl_context
     
-    async def _make_request(self, endpoint: str, params: dict) -> dict:
-        """Make an API request to EKAP v2"""
-        ssl_context = self._create_ssl_context()
-        
-        async with httpx.AsyncClient(
-            timeout=30.0,
-            verify=ssl_context,
-            http2=False,
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-        ) as client:
-            response = await client.post(
-                f"{self.base_url}{endpoint}",
-                json=params,
-                headers=self.headers
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client, creating it on first use"""
+        if self._http_client is None or self._http_client.is_closed:
+            limits = httpx.Limits(max_keepalive_connections=5, max_connections=10)
+            transport = None
+            if self.cassette_mode is not None:
+                from ihale_cassette import create_transport
+                inner = None
+                if self.cassette_mode == "record":
+                    inner = httpx.AsyncHTTPTransport(verify=self._create_ssl_context(), http2=False, limits=limits)
+                transport = create_transport(self.cassette_mode, self.cassette_path, inner)
+            self._http_client = httpx.AsyncClient(
+                timeout=30.0,
+                verify=self._create_ssl_context(),
+                http2=False,
+                limits=limits,
+                transport=transport
             )
+        return self._http_client
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client and the response cache"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        for attr in ("cache", "document_url_cache"):
+            cache = getattr(self, attr)
+            if cache is not None:
+                cache.close()
+                setattr(self, attr, None)
+    
+    async def _make_request(self, endpoint: str, params: dict) -> dict:
+        """Make an API request to EKAP v2
+        
+        The request (including its wait for a scheduler slot) is cancelled
+        with DeadlineExceeded when the current deadline passes.
+        """
+        with timed("ekap"):
+            return await within_deadline(self._scheduled_request(endpoint, params))
+    
+    async def _scheduled_request(self, endpoint: str, params: dict) -> dict:
+        if self.scheduler is None:
+            return await self._send_request(endpoint, params)
+        async with self.scheduler.slot():
+            return await self._send_request(endpoint, params)
+    
+    async def _stream_request(self, endpoint: str, params: dict, sink: BinaryIO) -> None:
+        """Like _make_request, but copy the raw response body into `sink` instead of decoding it"""
+        with timed("ekap"):
+            await within_deadline(self._scheduled_stream(endpoint, params, sink))
+    
+    async def _scheduled_stream(self, endpoint: str, params: dict, sink: BinaryIO) -> None:
+        if self.scheduler is None:
+            return await self._send_stream_request(endpoint, params, sink)
+        async with self.scheduler.slot():
+            return await self._send_stream_request(endpoint, params, sink)
+    
+    async def _send_request(self, endpoint: str, params: dict) -> dict:
+        """POST a request on the pooled client and decode the JSON response"""
+        client = self._get_http_client()
+        response = await client.post(
+            f"{self.base_url}{endpoint}",
+            json=params,
+            headers=self.headers
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def _send_stream_request(self, endpoint: str, params: dict, sink: BinaryIO) -> None:
+        """POST a request on the pooled client and write the response body to `sink` chunk by chunk"""
+        client = self._get_http_client()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}{endpoint}",
+            json=params,
+            headers=self.headers
+        ) as response:
             response.raise_for_status()
-            return response.json()
+            async for chunk in response.aiter_bytes():
+                sink.write(chunk)
+    
+    def _get_markitdown(self):
+        """Return the shared MarkItDown converter, importing markitdown on first use"""
+        if self._markitdown is None:
+            from markitdown import MarkItDown
+            self._markitdown = MarkItDown()
+        return self._markitdown
+    
+    def _html_to_markdown(self, html_content: str, context: str = "") -> Optional[str]:
+        """Convert announcement HTML to Markdown, returning None on failure"""
+        try:
+            # Create BytesIO from HTML content
+            html_bytes = BytesIO(html_content.encode('utf-8'))
+            result = self._get_markitdown().convert_stream(html_bytes, file_extension=".html")
+            return result.text_content if result else None
+        except Exception as e:
+            # Never print: on the stdio transport stdout carries the MCP protocol
+            logger.warning("Failed to convert HTML to markdown%s: %s", context, e, extra={"event": "markdown_conversion_failed"})
+            return None
+    
+    async def _convert_html_batch(self, html_contents: List[str], context: str = "") -> Tuple[List[Optional[str]], bool]:
+        """Convert announcement HTML to Markdown off the event loop
+        
+        Conversions run one after another in a worker thread, which checks a
+        stop flag between documents: on cancellation or when the deadline
+        passes, the remaining documents are skipped. Returns the Markdown
+        (None where not converted) and whether every document was processed.
+        """
+        markdown: List[Optional[str]] = [None] * len(html_contents)
+        if not any(html_contents):
+            return markdown, True
+        stop = threading.Event()
+        
+        def convert() -> None:
+            for index, html_content in enumerate(html_contents):
+                if stop.is_set():
+                    return
+                if html_content:
+                    markdown[index] = self._html_to_markdown(html_content, context)
+        
+        worker = asyncio.ensure_future(asyncio.to_thread(convert))
+        try:
+            with timed("conversion"):
+                await within_deadline(asyncio.shield(worker))
+        except DeadlineExceeded:
+            stop.set()
+            return markdown, False
+        except asyncio.CancelledError:
+            stop.set()
+            raise
+        return markdown, True
     
     def _format_date_for_api(self, date_str: Optional[str]) -> Optional[str]:
         """Convert YYYY-MM-DD to DD.MM.YYYY format expected by API"""
@@ -126,70 +326,145 @@ class EKAPClient:
         search_in_contract_draft: bool = True,
         search_in_bid_form: bool = True,
         skip: int = 0,
-        limit: int = 10
+        limit: int = 10,
+        include_document_urls: bool = True,
+        document_urls_from_cache_only: bool = False
     ) -> Dict[str, Any]:
-        """Search for Turkish government tenders"""
+        """Search for Turkish government tenders
+        
+        Arguments are reduced to a CanonicalQuery first, so equivalent
+        searches share cache entries. A search covered by an earlier, fully
+        fetched broader search is answered from that search's rows by local
+        filtering (the result then carries `subsumed_by`).
+        """
+        params = dict(locals())
+        del params["self"]
+        for name in PAGING_FIELDS:
+            params.pop(name)
+        query = CanonicalQuery.from_params(params)
+        
+        answer = self.complete_results.answer(self.cache, query)
+        if answer is not None:
+            broader, rows = answer
+            return await self._page_from_rows(
+                rows, broader, skip, limit, include_document_urls, document_urls_from_cache_only
+            )
         
+        result = await self._search_tenders_page(
+            query.filters, skip, limit, include_document_urls, document_urls_from_cache_only
+        )
+        if skip == 0 and not result.get("error") and result["returned_count"] >= result["total_count"]:
+            self.complete_results.remember(self.cache, query, result["tenders"], CACHE_TTLS["search"])
+        return result
+    
+    async def _page_from_rows(
+        self,
+        rows: List[Dict[str, Any]],
+        broader: CanonicalQuery,
+        skip: int,
+        limit: int,
+        include_document_urls: bool,
+        document_urls_from_cache_only: bool
+    ) -> Dict[str, Any]:
+        """A search_tenders page cut from locally filtered rows"""
+        tenders = [dict(row, document_url=None) for row in rows[skip:skip + limit]]
+        partial = False
+        if include_document_urls:
+            document_tender_ids = [
+                tender["id"] for tender in tenders
+                if tender.get("id") and tender.get("document_count", 0) > 0
+            ]
+            if document_tender_ids:
+                with request_context(Priority.ENRICHMENT):
+                    doc_results = await self.get_tender_document_urls(
+                        document_tender_ids,
+                        cache_only=document_urls_from_cache_only
+                    )
+                document_urls = doc_results.get("document_urls", {})
+                for tender in tenders:
+                    tender["document_url"] = document_urls.get(tender["id"])
+                partial = bool(doc_results.get("partial"))
+        result = {
+            "tenders": tenders,
+            "total_count": len(rows),
+            "returned_count": len(tenders),
+            "subsumed_by": broader.key[:16]
+        }
+        if partial:
+            result["partial"] = True
+        return result
+    
+    @cached("search")
+    async def _search_tenders_page(
+        self,
+        query: Dict[str, Any],
+        skip: int,
+        limit: int,
+        include_document_urls: bool,
+        document_urls_from_cache_only: bool
+    ) -> Dict[str, Any]:
+        """Fetch one page of a search given as CanonicalQuery filters"""
+        params = CanonicalQuery(query).to_params()
         
         # Province filtering is now handled by the API directly
         
         # Build API request payload
         api_params = {
-            "searchText": search_text,
+            "searchText": params["search_text"],
             "filterType": None,
-            "ikNdeAra": search_in_ikn,
-            "ihaleAdindaAra": search_in_title,
-            "ihaleIlanindaAra": search_in_announcement,
-            "teknikSartnamedeAra": search_in_tech_spec,
-            "idariSartnamedeAra": search_in_admin_spec,
-            "benzerIsMaddesindeAra": search_in_similar_work,
-            "isinYapilacagiYerMaddesindeAra": search_in_location,
-            "nitelikTurMiktarMaddesindeAra": search_in_nature_quantity,
-            "ihaleBilgilerindeAra": search_in_tender_info,
-            "sozlesmeTasarisindaAra": search_in_contract_draft,
-            "teklifCetvelindeAra": search_in_bid_form,
-            "searchType": search_type,
-            "iknYili": ikn_year,
-            "iknSayi": ikn_number,
-            "ihaleTarihSaatBaslangic": self._format_date_for_api(tender_date_start),
-            "ihaleTarihSaatBitis": self._format_date_for_api(tender_date_end),
-            "ilanTarihSaatBaslangic": self._format_date_for_api(announcement_date_start),
-            "ilanTarihSaatBitis": self._format_date_for_api(announcement_date_end),
+            "ikNdeAra": params["search_in_ikn"],
+            "ihaleAdindaAra": params["search_in_title"],
+            "ihaleIlanindaAra": params["search_in_announcement"],
+            "teknikSartnamedeAra": params["search_in_tech_spec"],
+            "idariSartnamedeAra": params["search_in_admin_spec"],
+            "benzerIsMaddesindeAra": params["search_in_similar_work"],
+            "isinYapilacagiYerMaddesindeAra": params["search_in_location"],
+            "nitelikTurMiktarMaddesindeAra": params["search_in_nature_quantity"],
+            "ihaleBilgilerindeAra": params["search_in_tender_info"],
+            "sozlesmeTasarisindaAra": params["search_in_contract_draft"],
+            "teklifCetvelindeAra": params["search_in_bid_form"],
+            "searchType": params["search_type"],
+            "iknYili": params["ikn_year"],
+            "iknSayi": params["ikn_number"],
+            "ihaleTarihSaatBaslangic": self._format_date_for_api(params["tender_date_start"]),
+            "ihaleTarihSaatBitis": self._format_date_for_api(params["tender_date_end"]),
+            "ilanTarihSaatBaslangic": self._format_date_for_api(params["announcement_date_start"]),
+            "ilanTarihSaatBitis": self._format_date_for_api(params["announcement_date_end"]),
             "yasaKapsami4734List": [],
-            "ihaleTuruIdList": tender_types or [],
-            "ihaleUsulIdList": tender_methods or [],
-            "ihaleUsulAltIdList": tender_sub_methods or [],
-            "ihaleIlIdList": provinces or [],
-            "ihaleDurumIdList": tender_statuses or [],
-            "idareIdList": authority_ids or [],
-            "ihaleIlanTuruIdList": announcement_types or [],
-            "teklifTuruIdList": proposal_types or [],
+            "ihaleTuruIdList": params["tender_types"] or [],
+            "ihaleUsulIdList": params["tender_methods"] or [],
+            "ihaleUsulAltIdList": params["tender_sub_methods"] or [],
+            "ihaleIlIdList": params["provinces"] or [],
+            "ihaleDurumIdList": params["tender_statuses"] or [],
+            "idareIdList": params["authority_ids"] or [],
+            "ihaleIlanTuruIdList": params["announcement_types"] or [],
+            "teklifTuruIdList": params["proposal_types"] or [],
             "asiriDusukTeklifIdList": [],
             "istisnaMaddeIdList": [],
-            "okasBransKodList": okas_codes or [],
+            "okasBransKodList": params["okas_codes"] or [],
             "okasBransAdiList": [],
             "titubbKodList": [],
             "gmdnKodList": [],
             # Boolean filters
-            "eIhale": e_ihale,
-            "eEksiltmeYapilacakMi": e_eksiltme_yapilacak_mi,
-            "ortakAlimMi": ortak_alim_mi,
-            "kismiTeklifMi": kismi_teklif_mi,
-            "fiyatDisiUnsurVarmi": fiyat_disi_unsur_varmi,
-            "ekonomikVeMaliYeterlilikBelgeleriIsteniyorMu": ekonomik_mali_yeterlilik_belgeleri_isteniyor_mu,
-            "meslekiTeknikYeterlilikBelgeleriIsteniyorMu": mesleki_teknik_yeterlilik_belgeleri_isteniyor_mu,
-            "isDeneyimiGosterenBelgelerIsteniyorMu": is_deneyimi_gosteren_belgeler_isteniyor_mu,
-            "yerliIstekliyeFiyatAvantajiUgulaniyorMu": yerli_istekliye_fiyat_avantaji_uygulanıyor_mu,
-            "yabanciIsteklilereIzinVeriliyorMu": yabanci_isteklilere_izin_veriliyor_mu,
-            "alternatifTeklifVerilebilirMi": alternatif_teklif_verilebilir_mi,
-            "konsorsiyumKatilabilirMi": konsorsiyum_katilabilir_mi,
-            "altYukleniciCalistirilabilirMi": alt_yuklenici_calistirilabilir_mi,
-            "fiyatFarkiVerilecekMi": fiyat_farki_verilecek_mi,
-            "avansVerilecekMi": avans_verilecek_mi,
-            "cerceveAnlasmaMi": cerceve_anlasmasi_mi,
-            "personelCalistirilmasinaDayaliMi": personel_calistirilmasina_dayali_mi,
-            "orderBy": order_by,
-            "siralamaTipi": sort_order,
+            "eIhale": params["e_ihale"],
+            "eEksiltmeYapilacakMi": params["e_eksiltme_yapilacak_mi"],
+            "ortakAlimMi": params["ortak_alim_mi"],
+            "kismiTeklifMi": params["kismi_teklif_mi"],
+            "fiyatDisiUnsurVarmi": params["fiyat_disi_unsur_varmi"],
+            "ekonomikVeMaliYeterlilikBelgeleriIsteniyorMu": params["ekonomik_mali_yeterlilik_belgeleri_isteniyor_mu"],
+            "meslekiTeknikYeterlilikBelgeleriIsteniyorMu": params["mesleki_teknik_yeterlilik_belgeleri_isteniyor_mu"],
+            "isDeneyimiGosterenBelgelerIsteniyorMu": params["is_deneyimi_gosteren_belgeler_isteniyor_mu"],
+            "yerliIstekliyeFiyatAvantajiUgulaniyorMu": params["yerli_istekliye_fiyat_avantaji_uygulanıyor_mu"],
+            "yabanciIsteklilereIzinVeriliyorMu": params["yabanci_isteklilere_izin_veriliyor_mu"],
+            "alternatifTeklifVerilebilirMi": params["alternatif_teklif_verilebilir_mi"],
+            "konsorsiyumKatilabilirMi": params["konsorsiyum_katilabilir_mi"],
+            "altYukleniciCalistirilabilirMi": params["alt_yuklenici_calistirilabilir_mi"],
+            "fiyatFarkiVerilecekMi": params["fiyat_farki_verilecek_mi"],
+            "avansVerilecekMi": params["avans_verilecek_mi"],
+            "cerceveAnlasmaMi": params["cerceve_anlasmasi_mi"],
+            "personelCalistirilmasinaDayaliMi": params["personel_calistirilmasina_dayali_mi"],
+            "orderBy": params["order_by"],
+            "siralamaTipi": params["sort_order"],
             "paginationSkip": skip,
             "paginationTake": limit
         }
@@ -198,28 +473,36 @@ class EKAPClient:
             # Make API request
             response_data = await self._make_request(self.tender_endpoint, api_params)
             
-            
             # Parse and format the response
             tenders = response_data.get("list", [])
             total_count = response_data.get("totalCount", 0)
             
             # Province filtering is now handled by the API directly
             
+            # Resolve document URLs for tenders that have documents, concurrently
+            document_urls = {}
+            partial = False
+            if include_document_urls:
+                document_tender_ids = [
+                    tender.get("id") for tender in tenders
+                    if tender.get("id") and tender.get("dokumanSayisi", 0) > 0
+                ]
+                if document_tender_ids:
+                    with request_context(Priority.ENRICHMENT):
+                        # If a document URL fails, the tender is returned without it
+                        doc_results = await self.get_tender_document_urls(
+                            document_tender_ids,
+                            cache_only=document_urls_from_cache_only
+                        )
+                    document_urls = doc_results.get("document_urls", {})
+                    # Out of time before every URL resolved: tenders are returned without them
+                    partial = bool(doc_results.get("partial"))
+            
             # Format each tender for better readability  
             formatted_tenders = []
             for tender in tenders:
                 tender_id = tender.get("id")
-                
-                # Get document URL for this tender
-                document_url = None
-                if tender_id and tender.get("dokumanSayisi", 0) > 0:
-                    try:
-                        doc_result = await self.get_tender_document_url(tender_id)
-                        if doc_result.get("success"):
-                            document_url = doc_result.get("document_url")
-                    except Exception:
-                        # If document URL fails, continue without it
-                        pass
+                document_url = document_urls.get(tender_id)
                 
                 formatted_tender = {
                     "id": tender_id,
@@ -236,6 +519,7 @@ class EKAPClient:
                     },
                     "authority": tender.get("idareAdi"),
                     "province": tender.get("ihaleIlAdi"),
+                    "province_plate": REGISTRY.provinces.plate_for_name(tender.get("ihaleIlAdi")),
                     "tender_datetime": tender.get("ihaleTarihSaat"),
                     "document_count": tender.get("dokumanSayisi", 0),
                     "has_announcement": tender.get("ilanVarMi", False),
@@ -248,6 +532,8 @@ class EKAPClient:
                 "total_count": total_count,
                 "returned_count": len(formatted_tenders)
             }
+            if partial:
+                result["partial"] = True
             
             # Province filtering is now handled by the API directly
             return result
@@ -263,13 +549,62 @@ class EKAPClient:
                 "message": str(e)
             }
     
+    def iter_tender_pages(
+        self,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+        concurrency: int = 4,
+        **search_params
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every page of a tender search in order, fetching pages concurrently
+        
+        See ihale_backend.iter_search_pages.
+        """
+        return iter_search_pages(self.search_tenders, max_results, page_size, concurrency, **search_params)
+    
+    async def search_all_tenders(
+        self,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+        concurrency: int = 4,
+        **search_params
+    ) -> Dict[str, Any]:
+        """Collect all pages of a tender search into a single result
+        
+        See ihale_backend.collect_search_pages. A complete result is kept so
+        narrower searches can be answered from it.
+        """
+        
+        result = await collect_search_pages(self.iter_tender_pages(
+            max_results=max_results,
+            page_size=page_size,
+            concurrency=concurrency,
+            **search_params
+        ))
+        if (
+            not result.get("error") and not result.get("partial") and "subsumed_by" not in result
+            and result["returned_count"] >= result["total_count"]
+        ):
+            self.complete_results.remember(
+                self.cache, CanonicalQuery.from_params(search_params), result["tenders"], CACHE_TTLS["search"]
+            )
+        
+        return result
+    
+    @cached("okas")
     async def search_okas_codes(
         self,
         search_term: str = "",
         kalem_turu: Optional[Literal[1, 2, 3]] = None,
         limit: int = 50
     ) -> Dict[str, Any]:
-        """Search OKAS (public procurement classification) codes"""
+        """Search OKAS (public procurement classification) codes
+        
+        The API matches case-sensitively, so when a term finds nothing its
+        Turkish upper- and lowercase forms are tried as well; if those fail
+        too, close matches from previously seen codes are returned with
+        fuzzy_matches set.
+        """
         
         # Validate limit
         if limit > 500:
@@ -277,6 +612,53 @@ class EKAPClient:
         elif limit < 1:
             limit = 1
         
+        normalized_term = normalize_term(search_term)
+        
+        try:
+            results: List[Dict[str, Any]] = []
+            for term in _term_variants(normalized_term):
+                results = await self._fetch_okas_codes(term, kalem_turu, limit)
+                if results:
+                    break
+            
+            fuzzy = not results and bool(normalized_term)
+            if fuzzy:
+                results = _catalog_matches(
+                    self.okas_catalog, normalized_term, limit,
+                    lambda item: kalem_turu is None or item["item_type"]["code"] == kalem_turu
+                )
+            
+            return {
+                "okas_codes": results,
+                "total_found": len(results),
+                "fuzzy_matches": fuzzy,
+                "search_params": {
+                    "search_term": search_term,
+                    "normalized_term": normalized_term,
+                    "kalem_turu": kalem_turu,
+                    "limit": limit
+                },
+                "item_type_legend": REGISTRY.okas_item_types.legend()
+            }
+            
+        except httpx.HTTPStatusError as e:
+            return {
+                "error": f"API request failed with status {e.response.status_code}",
+                "message": str(e)
+            }
+        except Exception as e:
+            return {
+                "error": "Request failed",
+                "message": str(e)
+            }
+    
+    async def _fetch_okas_codes(
+        self,
+        search_term: str,
+        kalem_turu: Optional[int],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """One OKAS API query, formatted and recorded in the local catalog"""
         # Build API request payload for OKAS search
         okas_params = {
             "loadOptions": {
@@ -313,57 +695,83 @@ class EKAPClient:
         # Set take limit for API
         okas_params["loadOptions"]["take"] = limit
         
-        try:
-            # Make API request to OKAS endpoint
-            response_data = await self._make_request(self.okas_endpoint, okas_params)
+        # Make API request to OKAS endpoint
+        response_data = await self._make_request(self.okas_endpoint, okas_params)
+        
+        # Parse and format the response
+        okas_items = response_data.get("loadResult", {}).get("data", [])
+        
+        # Format each OKAS code for better readability
+        results = []
+        for item in okas_items:
+            kalem_turu_desc = REGISTRY.okas_item_types.description(item.get("kalemTuru"), "Unknown")
             
-            # Parse and format the response
-            okas_items = response_data.get("loadResult", {}).get("data", [])
+            formatted = {
+                "id": item.get("id"),
+                "code": item.get("kod"),
+                "description_tr": item.get("kalemAdi"),
+                "description_en": item.get("kalemAdiEng"),
+                "item_type": {
+                    "code": item.get("kalemTuru"),
+                    "description": kalem_turu_desc
+                },
+                "code_level": item.get("kodLevel"),
+                "parent_id": item.get("parentId"),
+                "has_items": item.get("hasItem", False),
+                "child_count": item.get("childCount", 0)
+            }
+            for name in (formatted["description_tr"], formatted["description_en"], formatted["code"]):
+                if name:
+                    self.okas_catalog.add(name, formatted)
             
-            # Format each OKAS code for better readability
-            results = []
-            for item in okas_items:
-                kalem_turu_desc = {
-                    1: "Mal (Goods)",
-                    2: "Hizmet (Service)", 
-                    3: "Yapım (Construction)"
-                }.get(item.get("kalemTuru"), "Unknown")
-                
-                # Client-side filtering by kalem_turu since API filtering causes 500 errors
-                if kalem_turu is not None and item.get("kalemTuru") != kalem_turu:
-                    continue
-                
-                results.append({
-                    "id": item.get("id"),
-                    "code": item.get("kod"),
-                    "description_tr": item.get("kalemAdi"),
-                    "description_en": item.get("kalemAdiEng"),
-                    "item_type": {
-                        "code": item.get("kalemTuru"),
-                        "description": kalem_turu_desc
-                    },
-                    "code_level": item.get("kodLevel"),
-                    "parent_id": item.get("parentId"),
-                    "has_items": item.get("hasItem", False),
-                    "child_count": item.get("childCount", 0)
-                })
+            # Client-side filtering by kalem_turu since API filtering causes 500 errors
+            if kalem_turu is not None and item.get("kalemTuru") != kalem_turu:
+                continue
             
-            # Apply limit after client-side filtering
-            if len(results) > limit:
-                results = results[:limit]
+            results.append(formatted)
+        
+        # Apply limit after client-side filtering
+        return results[:limit]
+    
+    @cached("authorities")
+    async def search_authorities(
+        self,
+        search_term: str = "",
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """Search Turkish government authorities/institutions
+        
+        Falls back to Turkish case variants of the term and then to close
+        matches from previously seen authorities, like search_okas_codes.
+        """
+        
+        # Validate limit
+        if limit > 500:
+            limit = 500
+        elif limit < 1:
+            limit = 1
+        
+        normalized_term = normalize_term(search_term)
+        
+        try:
+            results: List[Dict[str, Any]] = []
+            for term in _term_variants(normalized_term):
+                results = await self._fetch_authorities(term, limit)
+                if results:
+                    break
+            
+            fuzzy = not results and bool(normalized_term)
+            if fuzzy:
+                results = _catalog_matches(self.authority_catalog, normalized_term, limit)
             
             return {
-                "okas_codes": results,
+                "authorities": results,
                 "total_found": len(results),
+                "fuzzy_matches": fuzzy,
                 "search_params": {
                     "search_term": search_term,
-                    "kalem_turu": kalem_turu,
+                    "normalized_term": normalized_term,
                     "limit": limit
-                },
-                "item_type_legend": {
-                    "1": "Mal (Goods)",
-                    "2": "Hizmet (Service)",
-                    "3": "Yapım (Construction)"
                 }
             }
             
@@ -374,23 +782,12 @@ class EKAPClient:
             }
         except Exception as e:
             return {
-                "error": "Request failed",
+                "error": "Request failed - authority search",
                 "message": str(e)
             }
     
-    async def search_authorities(
-        self,
-        search_term: str = "",
-        limit: int = 50
-    ) -> Dict[str, Any]:
-        """Search Turkish government authorities/institutions"""
-        
-        # Validate limit
-        if limit > 500:
-            limit = 500
-        elif limit < 1:
-            limit = 1
-        
+    async def _fetch_authorities(self, search_term: str, limit: int) -> List[Dict[str, Any]]:
+        """One authority API query, formatted and recorded in the local catalog"""
         # Build API request payload for authority search
         authority_params = {
             "loadOptions": {
@@ -420,47 +817,54 @@ class EKAPClient:
         # Set take limit for API
         authority_params["loadOptions"]["take"] = limit
         
-        try:
-            # Make API request to authority endpoint
-            response_data = await self._make_request(self.authority_endpoint, authority_params)
-            
-            # Parse and format the response
-            authority_items = response_data.get("loadResult", {}).get("data", [])
-            
-            # Format each authority for better readability
-            results = []
-            for item in authority_items:
-                results.append({
-                    "id": item.get("id"),
-                    "name": item.get("ad"),
-                    "parent_id": item.get("parentIdareKimlikKodu"),
-                    "level": item.get("seviye"),
-                    "has_children": item.get("hasItems", False),
-                    "child_count": 0,  # Not available in response
-                    "detsis_no": item.get("detsisNo"),
-                    "idare_id": item.get("idareId")
-                })
-            
-            return {
-                "authorities": results,
-                "total_found": len(results),
-                "search_params": {
-                    "search_term": search_term,
-                    "limit": limit
-                }
-            }
-            
-        except httpx.HTTPStatusError as e:
-            return {
-                "error": f"API request failed with status {e.response.status_code}",
-                "message": str(e)
-            }
-        except Exception as e:
-            return {
-                "error": "Request failed - authority search",
-                "message": str(e)
+        # Make API request to authority endpoint
+        response_data = await self._make_request(self.authority_endpoint, authority_params)
+        
+        # Parse and format the response
+        authority_items = response_data.get("loadResult", {}).get("data", [])
+        
+        # Format each authority for better readability
+        results = []
+        for item in authority_items:
+            formatted = {
+                "id": item.get("id"),
+                "name": item.get("ad"),
+                "parent_id": item.get("parentIdareKimlikKodu"),
+                "level": item.get("seviye"),
+                "has_children": item.get("hasItems", False),
+                "child_count": 0,  # Not available in response
+                "detsis_no": item.get("detsisNo"),
+                "idare_id": item.get("idareId")
             }
+            if formatted["name"]:
+                self.authority_catalog.add(formatted["name"], formatted)
+            results.append(formatted)
+        
+        return results
+    
+    async def get_reference_catalogs(
+        self,
+        okas_limit: int = 50000,
+        authority_limit: int = 200000
+    ) -> Dict[str, Any]:
+        """Whole OKAS and authority catalogs, e.g. for offline snapshots
+        
+        One uncached query per catalog (an empty term matches everything),
+        without the 500-row cap of the searches. A catalog that fails to load
+        comes back empty with its error under "errors".
+        """
+        catalogs: Dict[str, Any] = {"okas_codes": [], "authorities": [], "errors": {}}
+        for name, fetch in (
+            ("okas_codes", lambda: self._fetch_okas_codes("", None, okas_limit)),
+            ("authorities", lambda: self._fetch_authorities("", authority_limit)),
+        ):
+            try:
+                catalogs[name] = await fetch()
+            except Exception as e:
+                catalogs["errors"][name] = str(e)
+        return catalogs
     
+    @cached("announcements")
     async def get_tender_announcements(
         self,
         tender_id: int
@@ -479,39 +883,21 @@ class EKAPClient:
             # Parse and format the response
             announcements = response_data.get("list", [])
             
-            # Initialize markdown converter (always convert)
-            markitdown = MarkItDown()
+            # Always convert HTML to markdown, off the event loop and within the deadline
+            markdown_contents, converted = await self._convert_html_batch(
+                [announcement.get("veriHtml", "") for announcement in announcements]
+            )
             
             # Format each announcement for better readability
             results = []
-            for announcement in announcements:
-                # Map announcement types
-                announcement_type_map = {
-                    "1": "Ön İlan",
-                    "2": "İhale İlanı",
-                    "3": "İptal İlanı",
-                    "4": "Sonuç İlanı",
-                    "5": "Ön Yeterlik İlanı",
-                    "6": "Düzeltme İlanı"
-                }
-                
+            for announcement, markdown_content in zip(announcements, markdown_contents):
                 announcement_type = announcement.get("ilanTip", "")
-                announcement_type_desc = announcement_type_map.get(announcement_type, f"Type {announcement_type}")
+                announcement_type_desc = REGISTRY.announcement_record_types.description(
+                    announcement_type, f"Type {announcement_type}"
+                )
                 
                 html_content = announcement.get("veriHtml", "")
                 
-                # Always convert HTML to markdown
-                markdown_content = None
-                if html_content:
-                    try:
-                        # Create BytesIO from HTML content
-                        html_bytes = BytesIO(html_content.encode('utf-8'))
-                        result = markitdown.convert_stream(html_bytes, file_extension=".html")
-                        markdown_content = result.text_content if result else None
-                    except Exception as e:
-                        print(f"Warning: Failed to convert HTML to markdown: {e}")
-                        markdown_content = None
-                
                 results.append({
                     "id": announcement.get("id"),
                     "type": {
@@ -528,11 +914,15 @@ class EKAPClient:
                     "content_preview": self._extract_text_preview(html_content)
                 })
             
-            return {
+            result = {
                 "announcements": results,
                 "total_count": len(results),
                 "tender_id": tender_id
             }
+            if not converted:
+                # Deadline hit mid-conversion; the rest carry only content_preview
+                result["partial"] = True
+            return result
             
         except httpx.HTTPStatusError as e:
             return {
@@ -564,11 +954,17 @@ class EKAPClient:
         
         return text
     
+    @cached("details")
     async def get_tender_details(
         self,
-        tender_id: int
+        tender_id: int,
+        convert_announcements: bool = True
     ) -> Dict[str, Any]:
-        """Get comprehensive details for a specific tender"""
+        """Get comprehensive details for a specific tender
+        
+        With ijson installed (see ihale_stream) the response is parsed
+        incrementally and only one announcement's HTML is held at a time.
+        """
         
         # Build API request payload for tender details
         details_params = {
@@ -576,162 +972,18 @@ class EKAPClient:
         }
         
         try:
-            # Make API request to tender details endpoint
-            response_data = await self._make_request(self.tender_details_endpoint, details_params)
-            
-            # Parse and format the response
-            item = response_data.get("item", {})
+            if stream_details_enabled(self.stream_details):
+                item, announcements, converted = await self._stream_tender_details(details_params, convert_announcements)
+            else:
+                item, announcements, converted = await self._load_tender_details(details_params, convert_announcements)
             
-            if not item:
+            if not item and not announcements:
                 return {
                     "error": "Tender details not found",
                     "tender_id": tender_id
                 }
             
-            # Format tender characteristics
-            characteristics = []
-            for char in item.get("ihaleOzellikList", []):
-                char_text = char.get("ihaleOzellik", "")
-                # Clean up the characteristic text
-                if "TENDER_DETAIL." in char_text:
-                    char_text = char_text.replace("TENDER_DETAIL.", "").replace("_", " ").title()
-                characteristics.append(char_text)
-            
-            # Format basic tender info
-            basic_info = item.get("ihaleBilgi", {})
-            
-            # Format OKAS codes
-            okas_codes = []
-            for okas in item.get("ihtiyacKalemiOkasList", []):
-                okas_codes.append({
-                    "code": okas.get("kodu"),
-                    "name": okas.get("adi"),
-                    "full_description": okas.get("koduAdi")
-                })
-            
-            # Format authority info
-            authority = item.get("idare", {})
-            authority_info = {
-                "id": authority.get("id"),
-                "name": authority.get("adi"),
-                "code1": authority.get("kod1"),
-                "code2": authority.get("kod2"),
-                "phone": authority.get("telefon"),
-                "fax": authority.get("fax"),
-                "parent_authority": authority.get("ustIdare"),
-                "top_authority_code": authority.get("enUstIdareKod"),
-                "top_authority_name": authority.get("enUstIdareAdi"),
-                "province": authority.get("il", {}).get("adi"),
-                "district": authority.get("ilce", {}).get("ilceAdi")
-            }
-            
-            # Format process rules
-            rules = item.get("islemlerKuralSeti", {})
-            process_rules = {
-                "can_download_documents": rules.get("dokumanIndirmisMi", False),
-                "has_submitted_bid": rules.get("teklifteBulunmusMu", False),
-                "can_submit_bid": rules.get("teklifVerilebilirMi", False),
-                "has_non_price_factors": rules.get("fiyatDisiUnsurVarMi", False),
-                "contract_signed": rules.get("sozlesmeImzaliMi", False),
-                "is_electronic": rules.get("eIhaleMi", False),
-                "is_own_tender": rules.get("idareKendiIhaleMi", False),
-                "electronic_auction": rules.get("eEksiltmeYapilacakMi", False)
-            }
-            
-            # Initialize markdown converter for tender details HTML content
-            markitdown = MarkItDown()
-            
-            # Format announcements list (basic info) with markdown conversion
-            announcements = []
-            for announcement in item.get("ilanList", []):
-                # Map announcement types
-                announcement_type_map = {
-                    "1": "Ön İlan",
-                    "2": "İhale İlanı", 
-                    "3": "İptal İlanı",
-                    "4": "Sonuç İlanı",
-                    "5": "Ön Yeterlik İlanı",
-                    "6": "Düzeltme İlanı"
-                }
-                
-                announcement_type = announcement.get("ilanTip", "")
-                announcement_type_desc = announcement_type_map.get(announcement_type, f"Type {announcement_type}")
-                
-                # Convert HTML content to markdown if available
-                html_content = announcement.get("veriHtml", "")
-                markdown_content = None
-                if html_content:
-                    try:
-                        # Create BytesIO from HTML content
-                        html_bytes = BytesIO(html_content.encode('utf-8'))
-                        result = markitdown.convert_stream(html_bytes, file_extension=".html")
-                        markdown_content = result.text_content if result else None
-                    except Exception as e:
-                        print(f"Warning: Failed to convert HTML to markdown in tender details: {e}")
-                        markdown_content = None
-                
-                announcements.append({
-                    "id": announcement.get("id"),
-                    "type": {
-                        "code": announcement_type,
-                        "description": announcement_type_desc
-                    },
-                    "title": announcement.get("baslik"),
-                    "date": announcement.get("ilanTarihi"),
-                    "status": announcement.get("status"),
-                    "markdown_content": markdown_content,
-                    "content_preview": self._extract_text_preview(html_content)
-                })
-            
-            # Build comprehensive response
-            result = {
-                "tender_id": item.get("id"),
-                "ikn": item.get("ikn"),
-                "name": item.get("ihaleAdi"),
-                "status": {
-                    "code": item.get("ihaleDurum"),
-                    "description": basic_info.get("ihaleDurumAciklama")
-                },
-                "basic_info": {
-                    "is_electronic": item.get("eIhale", False),
-                    "method_code": item.get("ihaleUsul"),
-                    "method_description": basic_info.get("ihaleUsulAciklama"),
-                    "type_description": basic_info.get("ihaleTipiAciklama"),
-                    "scope_description": item.get("ihaleKapsamAciklama"),
-                    "tender_datetime": basic_info.get("ihaleTarihSaat"),
-                    "location": basic_info.get("isinYapilacagiYer"),
-                    "venue": basic_info.get("ihaleYeri"),
-                    "complaint_fee": basic_info.get("itirazenSikayetBasvuruBedeli"),
-                    "is_partial": item.get("kismiIhale", False)
-                },
-                "characteristics": characteristics,
-                "okas_codes": okas_codes,
-                "authority": authority_info,
-                "process_rules": process_rules,
-                "announcements_summary": {
-                    "total_count": len(announcements),
-                    "announcements": announcements,
-                    "types_available": list(set(ann["type"]["description"] for ann in announcements))
-                },
-                "flags": {
-                    "is_authority_tender": item.get("ihaleniIdaresiMi", False),
-                    "is_without_announcement": item.get("ihaleIlansizMi", False),
-                    "is_invitation_only": item.get("ihaleyeDavetEdilenMi", False),
-                    "show_detail_documents": item.get("ihaleDetayDokumaniGorsunMu", False),
-                    "show_document_downloaders": item.get("dokumanIndirenlerGosterilsinMi", False)
-                },
-                "document_count": item.get("dokumanSayisi", 0)
-            }
-            
-            # Add cancellation info if tender is cancelled
-            if basic_info.get("iptalTarihi"):
-                result["cancellation_info"] = {
-                    "cancelled_date": basic_info.get("iptalTarihi"),
-                    "cancellation_reason": basic_info.get("iptalNedeni"),
-                    "cancellation_article": basic_info.get("iptalMadde")
-                }
-            
-            return result
+            return self._format_tender_details(item, announcements, converted)
             
         except httpx.HTTPStatusError as e:
             return {
@@ -744,6 +996,247 @@ class EKAPClient:
                 "message": str(e)
             }
     
+    async def _load_tender_details(
+        self,
+        details_params: dict,
+        convert_announcements: bool
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], bool]:
+        """Decode the whole detail response, then convert its announcements in one batch
+        
+        Returns the detail item without its ilanList, the formatted
+        announcements and whether every conversion ran.
+        """
+        response_data = await self._make_request(self.tender_details_endpoint, details_params)
+        item = response_data.get("item") or {}
+        announcement_items = item.pop("ilanList", None) or []
+        
+        converted = True
+        markdown_contents: List[Optional[str]] = [None] * len(announcement_items)
+        if convert_announcements:
+            markdown_contents, converted = await self._convert_html_batch(
+                [announcement.get("veriHtml", "") for announcement in announcement_items],
+                " in tender details"
+            )
+        announcements = [
+            self._format_detail_announcement(announcement, markdown_content)
+            for announcement, markdown_content in zip(announcement_items, markdown_contents)
+        ]
+        return item, announcements, converted
+    
+    async def _stream_tender_details(
+        self,
+        details_params: dict,
+        convert_announcements: bool
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], bool]:
+        """Spool the detail response and walk it, converting each announcement as it is parsed
+        
+        An announcement's HTML is dropped as soon as its Markdown and
+        preview are made, so peak memory holds one announcement's HTML
+        instead of all of them, and the raw body spills to disk past
+        DEFAULT_SPOOL_BYTES. As in _convert_html_batch, conversion runs in
+        a worker thread and stops when the deadline passes; announcements
+        parsed after that are still listed, with only their preview.
+        """
+        from ihale_stream import iter_members, spool_file
+        
+        body = spool_file()
+        try:
+            await self._stream_request(self.tender_details_endpoint, details_params, body)
+        except BaseException:
+            body.close()
+            raise
+        body.seek(0)
+        
+        item: Dict[str, Any] = {}
+        announcements: List[Dict[str, Any]] = []
+        stop = threading.Event()
+        
+        def parse() -> None:
+            # The worker owns the spooled body, which may outlive a cancelled call
+            with body:
+                for kind, value in iter_members(body, "item", "ilanList"):
+                    if kind == "field":
+                        key, field_value = value
+                        item[key] = field_value
+                        continue
+                    html_content = value.get("veriHtml") or ""
+                    markdown_content = None
+                    if convert_announcements and html_content and not stop.is_set():
+                        markdown_content = self._html_to_markdown(html_content, " in tender details")
+                    announcements.append(self._format_detail_announcement(value, markdown_content))
+        
+        worker = asyncio.ensure_future(asyncio.to_thread(parse))
+        converted = True
+        try:
+            with timed("conversion"):
+                await within_deadline(asyncio.shield(worker))
+        except DeadlineExceeded:
+            # Skip the remaining conversions, but finish listing the announcements
+            stop.set()
+            converted = not convert_announcements
+            await asyncio.shield(worker)
+        except asyncio.CancelledError:
+            stop.set()
+            raise
+        return item, announcements, converted
+    
+    def _format_detail_announcement(self, announcement: Dict[str, Any], markdown_content: Optional[str]) -> Dict[str, Any]:
+        """One tender detail announcement, keeping a text preview instead of its HTML"""
+        announcement_type = announcement.get("ilanTip", "")
+        announcement_type_desc = REGISTRY.announcement_record_types.description(
+            announcement_type, f"Type {announcement_type}"
+        )
+        
+        html_content = announcement.get("veriHtml", "")
+        
+        return {
+            "id": announcement.get("id"),
+            "type": {
+                "code": announcement_type,
+                "description": announcement_type_desc
+            },
+            "title": announcement.get("baslik"),
+            "date": announcement.get("ilanTarihi"),
+            "status": announcement.get("status"),
+            "markdown_content": markdown_content,
+            "content_preview": self._extract_text_preview(html_content)
+        }
+    
+    def _format_tender_details(
+        self,
+        item: Dict[str, Any],
+        announcements: List[Dict[str, Any]],
+        converted: bool
+    ) -> Dict[str, Any]:
+        """Build the tender details result from the detail item (minus ilanList) and its formatted announcements"""
+        # Format tender characteristics
+        characteristics = []
+        for char in item.get("ihaleOzellikList", []):
+            char_text = char.get("ihaleOzellik", "")
+            # Clean up the characteristic text
+            if "TENDER_DETAIL." in char_text:
+                char_text = char_text.replace("TENDER_DETAIL.", "").replace("_", " ").title()
+            characteristics.append(char_text)
+        
+        # Format basic tender info
+        basic_info = item.get("ihaleBilgi", {})
+        
+        # Format OKAS codes
+        okas_codes = []
+        for okas in item.get("ihtiyacKalemiOkasList", []):
+            okas_codes.append({
+                "code": okas.get("kodu"),
+                "name": okas.get("adi"),
+                "full_description": okas.get("koduAdi")
+            })
+        
+        # Format authority info
+        authority = item.get("idare", {})
+        authority_info = {
+            "id": authority.get("id"),
+            "name": authority.get("adi"),
+            "code1": authority.get("kod1"),
+            "code2": authority.get("kod2"),
+            "phone": authority.get("telefon"),
+            "fax": authority.get("fax"),
+            "parent_authority": authority.get("ustIdare"),
+            "top_authority_code": authority.get("enUstIdareKod"),
+            "top_authority_name": authority.get("enUstIdareAdi"),
+            "province": authority.get("il", {}).get("adi"),
+            "district": authority.get("ilce", {}).get("ilceAdi")
+        }
+        
+        # Format process rules
+        rules = item.get("islemlerKuralSeti", {})
+        process_rules = {
+            "can_download_documents": rules.get("dokumanIndirmisMi", False),
+            "has_submitted_bid": rules.get("teklifteBulunmusMu", False),
+            "can_submit_bid": rules.get("teklifVerilebilirMi", False),
+            "has_non_price_factors": rules.get("fiyatDisiUnsurVarMi", False),
+            "contract_signed": rules.get("sozlesmeImzaliMi", False),
+            "is_electronic": rules.get("eIhaleMi", False),
+            "is_own_tender": rules.get("idareKendiIhaleMi", False),
+            "electronic_auction": rules.get("eEksiltmeYapilacakMi", False)
+        }
+        
+        # Build comprehensive response
+        result = {
+            "tender_id": item.get("id"),
+            "ikn": item.get("ikn"),
+            "name": item.get("ihaleAdi"),
+            "status": {
+                "code": item.get("ihaleDurum"),
+                "description": basic_info.get("ihaleDurumAciklama")
+            },
+            "basic_info": {
+                "is_electronic": item.get("eIhale", False),
+                "method_code": item.get("ihaleUsul"),
+                "method_description": basic_info.get("ihaleUsulAciklama"),
+                "type_description": basic_info.get("ihaleTipiAciklama"),
+                "scope_description": item.get("ihaleKapsamAciklama"),
+                "tender_datetime": basic_info.get("ihaleTarihSaat"),
+                "location": basic_info.get("isinYapilacagiYer"),
+                "venue": basic_info.get("ihaleYeri"),
+                "complaint_fee": basic_info.get("itirazenSikayetBasvuruBedeli"),
+                "is_partial": item.get("kismiIhale", False)
+            },
+            "characteristics": characteristics,
+            "okas_codes": okas_codes,
+            "authority": authority_info,
+            "process_rules": process_rules,
+            "announcements_summary": {
+                "total_count": len(announcements),
+                "announcements": announcements,
+                "types_available": list(set(ann["type"]["description"] for ann in announcements))
+            },
+            "flags": {
+                "is_authority_tender": item.get("ihaleniIdaresiMi", False),
+                "is_without_announcement": item.get("ihaleIlansizMi", False),
+                "is_invitation_only": item.get("ihaleyeDavetEdilenMi", False),
+                "show_detail_documents": item.get("ihaleDetayDokumaniGorsunMu", False),
+                "show_document_downloaders": item.get("dokumanIndirenlerGosterilsinMi", False)
+            },
+            "document_count": item.get("dokumanSayisi", 0)
+        }
+        
+        # Add cancellation info if tender is cancelled
+        if basic_info.get("iptalTarihi"):
+            result["cancellation_info"] = {
+                "cancelled_date": basic_info.get("iptalTarihi"),
+                "cancellation_reason": basic_info.get("iptalNedeni"),
+                "cancellation_article": basic_info.get("iptalMadde")
+            }
+        
+        if not converted:
+            # Deadline hit mid-conversion; the rest carry only content_preview
+            result["partial"] = True
+        
+        return result
+    
+    def get_cached_document_url(self, tender_id: int, islem_id: str = "1") -> Optional[str]:
+        """Return a document URL from the cache without any network request"""
+        if self.document_url_cache is None:
+            return None
+        cached_result = self.document_url_cache.get(
+            cache_key("document_url", {"tender_id": tender_id, "islem_id": islem_id})
+        )
+        return cached_result.get("document_url") if cached_result else None
+    
+    async def get_tender_document_urls(
+        self,
+        tender_ids: List[int],
+        islem_id: str = "1",
+        cache_only: bool = False,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        """Resolve document URLs for many tenders concurrently, using the cache first"""
+        
+        return await resolve_document_urls(
+            self.get_cached_document_url, self.get_tender_document_url,
+            tender_ids, islem_id, cache_only, concurrency
+        )
+    
+    @cached("document_url", cache_attr="document_url_cache")
     async def get_tender_document_url(
         self,
         tender_id: int,
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Deadlines for tool calls and EKAPClient work
+A deadline is carried in a context variable, like the request priority in
+ihale_scheduler, so it reaches every request and conversion a call makes
+without threading an argument through each method (and without changing
+cache keys). Outbound requests are cancelled when it passes, and methods
+that can return something useful without the remaining work return a
+partial result instead of an error
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Absolute time.monotonic() deadline of the work running in the current context
+_deadline: ContextVar[Optional[float]] = ContextVar("ihale_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The current context's deadline passed before the work finished"""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Run the enclosed code with a deadline `seconds` from now
+
+    Nested deadlines can only tighten the enclosing one; None or a
+    non-positive value leaves the current deadline unchanged.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded if the current deadline has passed"""
+    if expired():
+        raise DeadlineExceeded("Deadline exceeded")
+
+
+async def within_deadline(awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, cancelling it and raising DeadlineExceeded at the deadline"""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Close the never-awaited coroutine to avoid a "never awaited" warning
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded("Deadline exceeded") from e
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk store for tender documents
+Documents are streamed to disk in chunks, stored once per SHA-256 digest and
+indexed by tender ID; interrupted downloads resume from their partial file
+when the server confirms (If-Range) the document hasn't changed
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+from ihale_client import EKAPClient
+from ihale_store import DATA_DIR
+
+# Bytes read per chunk while streaming a download
+CHUNK_SIZE = 256 * 1024
+
+# Refuse documents larger than this (IHALE_MAX_DOCUMENT_BYTES)
+MAX_DOCUMENT_BYTES = int(os.environ.get("IHALE_MAX_DOCUMENT_BYTES", str(1024 * 1024 * 1024)))
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    tender_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content_type TEXT,
+    filename TEXT,
+    downloaded_at REAL NOT NULL,
+    PRIMARY KEY (tender_id, url)
+);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);
+"""
+
+
+def _filename_from_headers(headers: httpx.Headers) -> Optional[str]:
+    """Extract the file name from a Content-Disposition header"""
+    disposition = headers.get("content-disposition", "")
+    match = re.search(r"filename\*=(?:UTF-8'')?([^;]+)", disposition, re.IGNORECASE)
+    if match:
+        return unquote(match.group(1).strip('" '))
+    match = re.search(r'filename="?([^";]+)"?', disposition, re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+def _strong_validator(headers: httpx.Headers) -> Optional[str]:
+    """ETag or Last-Modified usable in If-Range (weak ETags are not allowed there)"""
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("last-modified")
+
+
+def _content_range_start(headers: httpx.Headers) -> Optional[int]:
+    """First byte position of a 206 response's Content-Range"""
+    match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", headers.get("content-range", ""))
+    return int(match.group(1)) if match else None
+
+
+def _hash_file(path: Path) -> Tuple[Any, int]:
+    """SHA-256 object and size of a file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as fh:
+        while chunk := fh.read(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest, size
+
+
+def _write_chunk(fh, digest, chunk: bytes) -> None:
+    fh.write(chunk)
+    digest.update(chunk)
+
+
+class DocumentStore:
+    """Downloads tender documents into a content-addressed directory"""
+
+    def __init__(self, client: EKAPClient, root: Optional[str] = None):
+        self.client = client
+        self.root = Path(root).expanduser() if root else Path(
+            os.environ.get("IHALE_DOCUMENT_DIR", DATA_DIR / "documents")
+        ).expanduser()
+        self.objects_dir = self.root / "objects"
+        self.partial_dir = self.root / "partial"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self._index = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self._index.executescript(INDEX_SCHEMA)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # One download per URL at a time, so concurrent callers don't fight over a partial file
+        self._url_locks: Dict[str, asyncio.Lock] = {}
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Separate pool for downloads so long transfers don't hold API connections"""
+        if self._http_client is None or self._http_client.is_closed:
+            headers = {key: value for key, value in self.client.headers.items() if key.lower() != "content-type"}
+            headers["Accept"] = "*/*"
+            self._http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, read=120.0),
+                verify=self.client._create_ssl_context(),
+                follow_redirects=True,
+                headers=headers,
+                limits=httpx.Limits(max_keepalive_connections=4, max_connections=8)
+            )
+        return self._http_client
+
+    async def aclose(self) -> None:
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._index.close()
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    def _handle(self, row: tuple, **extra) -> Dict[str, Any]:
+        tender_id, url, sha256, size, content_type, filename, downloaded_at = row
+        return {
+            "handle": f"sha256:{sha256}",
+            "path": str(self.object_path(sha256)),
+            "size": size,
+            "content_type": content_type,
+            "filename": filename,
+            "tender_id": tender_id,
+            "source_url": url,
+            "downloaded_at": downloaded_at,
+            **extra
+        }
+
+    def lookup(self, tender_id: int) -> List[Dict[str, Any]]:
+        """Return handles of documents already stored for a tender"""
+        rows = self._index.execute(
+            "SELECT tender_id, url, sha256, size, content_type, filename, downloaded_at "
+            "FROM documents WHERE tender_id = ?", (tender_id,)
+        ).fetchall()
+        return [self._handle(row, cached=True) for row in rows if self.object_path(row[2]).exists()]
+
+    def resolve_handle(self, handle: str) -> Optional[Path]:
+        """Map a 'sha256:<digest>' handle to its file, if stored"""
+        digest = handle.split(":", 1)[-1]
+        if not re.fullmatch(r"[0-9a-f]{64}", digest):
+            return None
+        path = self.object_path(digest)
+        return path if path.exists() else None
+
+    async def download(self, tender_id: int, url: str, refresh: bool = False) -> Dict[str, Any]:
+        """Stream a document to the store, resuming a partial download if one exists
+
+        With refresh, the document is fetched again even if the URL is already
+        stored, and any partial download of it is discarded.
+        """
+        lock = self._url_locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            if refresh:
+                self._discard_partial(self._partial_path(url))
+            else:
+                row = self._index.execute(
+                    "SELECT tender_id, url, sha256, size, content_type, filename, downloaded_at "
+                    "FROM documents WHERE url = ? ORDER BY tender_id = ? DESC", (url, tender_id)
+                ).fetchone()
+                if row and self.object_path(row[2]).exists():
+                    if row[0] != tender_id:
+                        # Same URL fetched for another tender; just index it here too
+                        row = (tender_id,) + tuple(row[1:])
+                        self._insert(row)
+                    return self._handle(row, cached=True)
+            return await self._stream_to_store(tender_id, url)
+
+    def _insert(self, row: tuple) -> None:
+        with self._index:
+            self._index.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(tender_id, url, sha256, size, content_type, filename, downloaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", row
+            )
+
+    def _partial_path(self, url: str) -> Path:
+        return self.partial_dir / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".part")
+
+    @staticmethod
+    def _validator_path(partial_path: Path) -> Path:
+        """Sidecar holding the ETag or Last-Modified the partial file was downloaded under"""
+        return partial_path.with_name(partial_path.name + ".validator")
+
+    def _discard_partial(self, partial_path: Path) -> None:
+        partial_path.unlink(missing_ok=True)
+        self._validator_path(partial_path).unlink(missing_ok=True)
+
+    async def _stream_to_store(self, tender_id: int, url: str) -> Dict[str, Any]:
+        partial_path = self._partial_path(url)
+        validator_path = self._validator_path(partial_path)
+        digest = hashlib.sha256()
+        offset = 0
+
+        headers = {}
+        if partial_path.exists():
+            if validator_path.exists():
+                # Re-hash what is already on disk so the digest covers the whole file
+                digest, offset = await asyncio.to_thread(_hash_file, partial_path)
+                # If-Range: the server only sends the rest if the file hasn't changed since
+                headers = {"Range": f"bytes={offset}-", "If-Range": validator_path.read_text()}
+            else:
+                # Nothing to tell a changed remote file from the one on disk
+                self._discard_partial(partial_path)
+
+        resumed = False
+        client = self._get_http_client()
+
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 416 and offset:
+                # Partial file is already complete (or stale); start over
+                self._discard_partial(partial_path)
+                return await self._stream_to_store(tender_id, url)
+            response.raise_for_status()
+
+            if offset and response.status_code == 206:
+                if _content_range_start(response.headers) != offset:
+                    # Not the bytes we asked for; appending them would corrupt the file
+                    self._discard_partial(partial_path)
+                    return await self._stream_to_store(tender_id, url)
+                resumed = True
+                mode = "ab"
+            else:
+                # Fresh download, or the server ignored the range (e.g. the file changed)
+                digest = hashlib.sha256()
+                offset = 0
+                mode = "wb"
+                validator = _strong_validator(response.headers)
+                if validator:
+                    validator_path.write_text(validator)
+                else:
+                    validator_path.unlink(missing_ok=True)
+
+            fh = open(partial_path, mode)
+            try:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    offset += len(chunk)
+                    if offset > MAX_DOCUMENT_BYTES:
+                        fh.close()
+                        # A retry would only re-hash and fail again
+                        self._discard_partial(partial_path)
+                        raise ValueError(f"Document exceeds {MAX_DOCUMENT_BYTES} bytes")
+                    await asyncio.to_thread(_write_chunk, fh, digest, chunk)
+            finally:
+                fh.close()
+
+            content_type = response.headers.get("content-type")
+            filename = _filename_from_headers(response.headers)
+
+        sha256 = digest.hexdigest()
+        object_path = self.object_path(sha256)
+        deduplicated = object_path.exists()
+        if deduplicated:
+            partial_path.unlink()
+        else:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(partial_path, object_path)
+        validator_path.unlink(missing_ok=True)
+
+        row = (tender_id, url, sha256, offset, content_type, filename, time.time())
+        self._insert(row)
+        return self._handle(row, cached=False, deduplicated=deduplicated, resumed=resumed)
+
+    async def download_tender_documents(
+        self,
+        tender_ids: List[int],
+        concurrency: int = 4,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """Download the documents of several tenders concurrently"""
+
+        semaphore = asyncio.Semaphore(concurrency)
+        documents: Dict[int, Any] = {}
+        errors: Dict[int, str] = {}
+
+        pending_ids = []
+        for tender_id in dict.fromkeys(tender_ids):
+            stored = [] if refresh else self.lookup(tender_id)
+            if stored:
+                documents[tender_id] = stored
+            else:
+                pending_ids.append(tender_id)
+
+        url_results = await self.client.get_tender_document_urls(pending_ids) if pending_ids else {}
+        document_urls = url_results.get("document_urls", {})
+
+        async def fetch(tender_id: int) -> None:
+            url = document_urls.get(tender_id)
+            if not url:
+                errors[tender_id] = url_results.get("errors", {}).get(tender_id, "No document URL found")
+                return
+            try:
+                async with semaphore:
+                    documents[tender_id] = [await self.download(tender_id, url, refresh=refresh)]
+            except (httpx.HTTPError, OSError, ValueError) as e:
+                errors[tender_id] = f"Download failed: {e}"
+
+        await asyncio.gather(*(fetch(tender_id) for tender_id in pending_ids))
+
+        return {
+            "documents": {tender_id: documents[tender_id] for tender_id in tender_ids if tender_id in documents},
+            "errors": errors,
+            "downloaded_count": sum(
+                1 for handles in documents.values() for handle in handles if not handle.get("cached")
+            ),
+            "store": str(self.root)
+        }
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Streaming export of tender search results to JSONL, CSV or Parquet
+Pages are written to disk as they arrive, so memory stays bounded by the page
+window (and the Parquet row group size) regardless of the result count
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Literal
+
+from ihale_client import EKAPClient
+from ihale_store import DATA_DIR
+
+ExportFormat = Literal["jsonl", "csv", "parquet"]
+
+# Directory the export_tenders tool may write to (IHALE_EXPORT_DIR); the CLI writes anywhere
+EXPORT_DIR = Path(os.environ.get("IHALE_EXPORT_DIR", DATA_DIR / "exports")).expanduser()
+
+# Flat columns written for every tender, in output order
+TENDER_COLUMNS = [
+    "id", "name", "ikn", "type_code", "type_description", "method",
+    "status_code", "status_description", "authority", "province",
+    "tender_datetime", "document_count", "has_announcement", "document_url"
+]
+
+# Extra columns written when details are joined in
+DETAIL_COLUMNS = [
+    "detail_location", "detail_venue", "detail_is_electronic", "detail_is_partial",
+    "detail_scope_description", "detail_authority_id", "detail_authority_province",
+    "detail_okas_codes", "detail_characteristics", "detail_announcement_count",
+    "detail_cancelled_date"
+]
+
+
+def flatten_tender(tender: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a formatted search_tenders row into export columns"""
+    tender_type = tender.get("type") or {}
+    status = tender.get("status") or {}
+    return {
+        "id": tender.get("id"),
+        "name": tender.get("name"),
+        "ikn": tender.get("ikn"),
+        "type_code": tender_type.get("code"),
+        "type_description": tender_type.get("description"),
+        "method": tender.get("method"),
+        "status_code": status.get("code"),
+        "status_description": status.get("description"),
+        "authority": tender.get("authority"),
+        "province": tender.get("province"),
+        "tender_datetime": tender.get("tender_datetime"),
+        "document_count": tender.get("document_count"),
+        "has_announcement": tender.get("has_announcement"),
+        "document_url": tender.get("document_url")
+    }
+
+
+def flatten_details(details: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the interesting parts of get_tender_details into export columns"""
+    if details.get("error"):
+        return {column: None for column in DETAIL_COLUMNS}
+    basic_info = details.get("basic_info") or {}
+    authority = details.get("authority") or {}
+    return {
+        "detail_location": basic_info.get("location"),
+        "detail_venue": basic_info.get("venue"),
+        "detail_is_electronic": basic_info.get("is_electronic"),
+        "detail_is_partial": basic_info.get("is_partial"),
+        "detail_scope_description": basic_info.get("scope_description"),
+        "detail_authority_id": authority.get("id"),
+        "detail_authority_province": authority.get("province"),
+        "detail_okas_codes": ";".join(
+            okas.get("code") or "" for okas in details.get("okas_codes", [])
+        ),
+        "detail_characteristics": ";".join(details.get("characteristics", [])),
+        "detail_announcement_count": (details.get("announcements_summary") or {}).get("total_count"),
+        "detail_cancelled_date": (details.get("cancellation_info") or {}).get("cancelled_date")
+    }
+
+
+class JsonlWriter:
+    """Write rows as one JSON object per line"""
+
+    def __init__(self, path: Path, columns: List[str]):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False))
+            self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CsvWriter:
+    """Write rows as CSV with a header line"""
+
+    def __init__(self, path: Path, columns: List[str]):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        self._writer.writeheader()
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter:
+    """Write rows to Parquet, flushing one row group every `row_group_size` rows"""
+
+    def __init__(self, path: Path, columns: List[str], row_group_size: int = 10000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._columns = columns
+        self._row_group_size = row_group_size
+        self._buffer: List[Dict[str, Any]] = []
+        self._schema = pa.schema([
+            (column, PARQUET_TYPES.get(column, "string")) for column in columns
+        ])
+        self._writer = pq.ParquetWriter(str(path), self._schema, compression="zstd")
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self._row_group_size:
+            self._flush(self._buffer[:self._row_group_size])
+            self._buffer = self._buffer[self._row_group_size:]
+
+    def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        table = self._pa.Table.from_pylist(
+            [{column: _coerce_parquet_value(column, row.get(column)) for column in self._columns} for row in rows],
+            schema=self._schema
+        )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._buffer:
+            self._flush(self._buffer)
+            self._buffer = []
+        self._writer.close()
+
+
+# Parquet column types; anything not listed is written as string
+PARQUET_TYPES = {
+    "id": "int64",
+    "document_count": "int64",
+    "has_announcement": "bool",
+    "detail_is_electronic": "bool",
+    "detail_is_partial": "bool",
+    "detail_authority_id": "int64",
+    "detail_announcement_count": "int64",
+}
+
+
+def _coerce_parquet_value(column: str, value: Any) -> Any:
+    """Stringify values for string columns so mixed API types don't break the schema"""
+    if value is None or column in PARQUET_TYPES:
+        return value
+    return str(value)
+
+
+WRITERS = {
+    "jsonl": JsonlWriter,
+    "csv": CsvWriter,
+    "parquet": ParquetWriter,
+}
+
+
+async def _fetch_detail_rows(
+    client: EKAPClient,
+    tender_ids: List[Any],
+    concurrency: int
+) -> List[Dict[str, Any]]:
+    """Fetch and flatten details for a page of tenders, `concurrency` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(tender_id: Any) -> Dict[str, Any]:
+        if tender_id is None:
+            return flatten_details({"error": "missing tender id"})
+        async with semaphore:
+            details = await client.get_tender_details(tender_id, convert_announcements=False)
+        return flatten_details(details)
+
+    return await asyncio.gather(*(fetch(tender_id) for tender_id in tender_ids))
+
+
+def resolve_export_path(name: str, root: Path = EXPORT_DIR) -> Path:
+    """Path of export file `name` inside `root`
+
+    Raises ValueError for absolute paths and for names that resolve (through
+    ".." or symlinks) outside `root`, so a tool caller can't overwrite
+    arbitrary files the server can write.
+    """
+    if not name or not name.strip():
+        raise ValueError("Export file name is empty")
+    if Path(name).is_absolute() or name.startswith("~"):
+        raise ValueError(f"Export file name must be relative to the export directory, got {name!r}")
+    root = root.resolve()
+    path = (root / name).resolve()
+    if path == root or not path.is_relative_to(root):
+        raise ValueError(f"Export file name {name!r} resolves outside the export directory")
+    return path
+
+
+async def export_tenders(
+    client: EKAPClient,
+    path: str,
+    output_format: ExportFormat = "jsonl",
+    search_params: Optional[Dict[str, Any]] = None,
+    max_results: Optional[int] = None,
+    include_details: bool = False,
+    include_document_urls: bool = False,
+    page_size: int = 100,
+    concurrency: int = 4,
+    row_group_size: int = 10000
+) -> Dict[str, Any]:
+    """Stream every page of a tender search to a file
+
+    `search_params` are EKAPClient.search_tenders keyword arguments. Returns
+    row count, elapsed time and throughput, or an error dict if a page failed.
+    """
+
+    if output_format not in WRITERS:
+        return {"error": f"Unsupported export format: {output_format}"}
+
+    output_path = Path(path).expanduser()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    columns = TENDER_COLUMNS + (DETAIL_COLUMNS if include_details else [])
+
+    try:
+        if output_format == "parquet":
+            writer = ParquetWriter(output_path, columns, row_group_size=row_group_size)
+        else:
+            writer = WRITERS[output_format](output_path, columns)
+    except ImportError as e:
+        return {"error": "Parquet export requires pyarrow", "message": str(e)}
+
+    rows_written = 0
+    total_count = 0
+    started = time.perf_counter()
+    error = None
+
+    try:
+        async for page in client.iter_tender_pages(
+            max_results=max_results,
+            page_size=page_size,
+            concurrency=concurrency,
+            include_document_urls=include_document_urls,
+            **(search_params or {})
+        ):
+            if page.get("error"):
+                error = page
+                break
+            total_count = page.get("total_count", total_count)
+            tenders = page.get("tenders", [])
+            rows = [flatten_tender(tender) for tender in tenders]
+            if include_details:
+                detail_rows = await _fetch_detail_rows(
+                    client, [tender.get("id") for tender in tenders], concurrency
+                )
+                for row, detail_row in zip(rows, detail_rows):
+                    row.update(detail_row)
+            writer.write_rows(rows)
+            rows_written += len(rows)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    result = {
+        "path": str(output_path),
+        "format": output_format,
+        "rows_written": rows_written,
+        "total_count": total_count,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_written / elapsed, 1) if elapsed > 0 else None,
+        "include_details": include_details
+    }
+    if error:
+        result["error"] = error.get("error")
+        result["message"] = error.get("message")
+    return result
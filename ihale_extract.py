@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Text extraction for downloaded tender documents
+ZIP archives are unpacked entry by entry in a process pool and each supported
+file (PDF, DOCX, XLSX, ...) is converted to Markdown with MarkItDown. Text is
+cached on disk by the entry's content hash, so a specification shared by many
+tenders is converted once
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from ihale_deadline import remaining
+from ihale_documents import DocumentStore
+from ihale_text import fold, fold_with_offsets
+
+# File types MarkItDown can convert
+SUPPORTED_EXTENSIONS = {
+    ".pdf", ".docx", ".xlsx", ".xls", ".pptx", ".html", ".htm", ".txt", ".csv", ".json", ".xml"
+}
+
+# Worker processes used for conversion (IHALE_EXTRACT_WORKERS)
+DEFAULT_EXTRACT_WORKERS = int(os.environ.get("IHALE_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Error recorded for files whose conversion was dropped at the deadline
+DEADLINE_ERROR = "Deadline exceeded"
+
+# Raised reading a damaged archive: truncated or bad CRC (BadZipFile, EOFError,
+# zlib.error), encrypted entries (RuntimeError), unknown compression methods
+ARCHIVE_ERRORS = (zipfile.BadZipFile, zipfile.LargeZipFile, RuntimeError, NotImplementedError, EOFError,
+                  zlib.error, OSError)
+
+_worker_markitdown = None
+
+
+def _entry_name(info: zipfile.ZipInfo) -> str:
+    """Decode a ZIP entry name; EKAP archives often use the Turkish DOS code page"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("cp857")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def _error_record(error: BaseException) -> Dict[str, Any]:
+    return {"sha256": None, "size": None, "chars": 0, "error": f"{type(error).__name__}: {error}"}
+
+
+def _convert_entry(source_path: str, entry: Optional[str], suffix: str, text_dir: str) -> Dict[str, Any]:
+    """Hash and convert one file in a worker process
+
+    `entry` names the member of the ZIP archive at `source_path`, or is None
+    when the source is itself the document. The Markdown is written to
+    `<text_dir>/<sha[:2]>/<sha>.md` unless it is already there.
+    """
+    global _worker_markitdown
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if entry is None:
+            file_path = source_path
+        else:
+            file_path = os.path.join(tmp, "entry" + suffix)
+            try:
+                with zipfile.ZipFile(source_path) as archive, archive.open(entry) as src, \
+                        open(file_path, "wb") as dst:
+                    while chunk := src.read(1024 * 1024):
+                        dst.write(chunk)
+            except ARCHIVE_ERRORS as e:
+                return _error_record(e)
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as fh:
+            while chunk := fh.read(1024 * 1024):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        size = os.path.getsize(file_path)
+
+        text_path = Path(text_dir) / sha256[:2] / f"{sha256}.md"
+        if text_path.exists():
+            return {"sha256": sha256, "size": size, "chars": None, "error": None}
+
+        try:
+            if _worker_markitdown is None:
+                from markitdown import MarkItDown
+                _worker_markitdown = MarkItDown()
+            text = _worker_markitdown.convert(file_path).text_content or ""
+        except Exception as e:
+            return {"sha256": sha256, "size": size, "chars": 0, "error": f"{type(e).__name__}: {e}"}
+
+    text_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = text_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, text_path)
+    return {"sha256": sha256, "size": size, "chars": len(text), "error": None}
+
+
+class DocumentExtractor:
+    """Converts stored tender documents to Markdown, cached by content hash"""
+
+    def __init__(self, store: DocumentStore, max_workers: int = DEFAULT_EXTRACT_WORKERS):
+        self.store = store
+        self.max_workers = max_workers
+        self.text_dir = store.root / "text"
+        self.manifest_dir = store.root / "manifests"
+        self.text_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def text_path(self, sha256: str) -> Path:
+        return self.text_dir / sha256[:2] / f"{sha256}.md"
+
+    def read_text(self, sha256: str) -> Optional[str]:
+        path = self.text_path(sha256)
+        return path.read_text(encoding="utf-8") if path.exists() else None
+
+    async def extract(self, handle: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Convert a stored document (or every supported entry of a ZIP) to Markdown
+
+        Returns one record per file with its name, content hash, size and
+        character count. The listing is cached per document hash.
+        """
+        document_sha = handle["handle"].split(":", 1)[-1]
+        manifest_path = self.manifest_dir / f"{document_sha}.json"
+
+        lock = self._locks.setdefault(document_sha, asyncio.Lock())
+        async with lock:
+            if manifest_path.exists():
+                return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+            source_path = handle["path"]
+            jobs = []
+            if zipfile.is_zipfile(source_path):
+                try:
+                    with zipfile.ZipFile(source_path) as archive:
+                        for info in archive.infolist():
+                            name = _entry_name(info)
+                            suffix = Path(name).suffix.lower()
+                            if not info.is_dir() and suffix in SUPPORTED_EXTENSIONS:
+                                jobs.append((name, info.filename, suffix))
+                except ARCHIVE_ERRORS as e:
+                    # The central directory itself is unreadable (e.g. a truncated download)
+                    name = handle.get("filename") or Path(source_path).name
+                    return [{"name": name, **_error_record(e)}]
+            else:
+                name = handle.get("filename") or Path(source_path).name
+                jobs.append((name, None, Path(name).suffix.lower() or ".pdf"))
+
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            futures = [
+                loop.run_in_executor(pool, _convert_entry, source_path, entry, suffix, str(self.text_dir))
+                for _, entry, suffix in jobs
+            ]
+            try:
+                # Conversions still queued when the deadline passes (or the call is
+                # cancelled) are dropped from the pool; finished ones are kept
+                if futures:
+                    await asyncio.wait(futures, timeout=remaining())
+            finally:
+                for future in futures:
+                    future.cancel()
+
+            files = []
+            for (name, _, _), future in zip(jobs, futures):
+                if future.cancelled():
+                    files.append({"name": name, "sha256": None, "size": None, "chars": 0, "error": DEADLINE_ERROR})
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # e.g. a worker process died (BrokenProcessPool)
+                    result = _error_record(e)
+                if result["chars"] is None:
+                    text = self.read_text(result["sha256"])
+                    result["chars"] = len(text) if text is not None else 0
+                files.append({"name": name, **result})
+
+            # Don't cache a listing with failures; they may succeed on retry
+            if not any(file["error"] for file in files):
+                manifest_path.write_text(json.dumps(files, ensure_ascii=False), encoding="utf-8")
+            return files
+
+    async def extract_tender(self, tender_id: int) -> Dict[str, Any]:
+        """Download (if needed) and extract every document of a tender"""
+        download = await self.store.download_tender_documents([tender_id])
+        handles = download["documents"].get(tender_id)
+        if not handles:
+            return {
+                "error": "Document not available",
+                "message": download["errors"].get(tender_id, "No documents found"),
+                "tender_id": tender_id
+            }
+
+        files = []
+        for handle in handles:
+            files.extend(await self.extract(handle))
+        result = {"tender_id": tender_id, "files": files}
+        if any(file["error"] == DEADLINE_ERROR for file in files):
+            result["partial"] = True
+        return result
+
+
+def search_texts(
+    texts: Dict[str, str],
+    query: str,
+    max_matches: int = 50,
+    context_chars: int = 200
+) -> Dict[str, Any]:
+    """Search named texts, returning snippets around each match
+
+    Matching is over fold()ed text, so it ignores Turkish case, diacritics and
+    line breaks ("İHALE" finds "ihale", "sartname" finds "Şartname"); offsets
+    and snippets refer to the original text.
+    """
+    key = fold(query)
+    matches = []
+    match_counts = {}
+    pattern = re.compile(re.escape(key))
+    for name, text in (texts.items() if key else ()):
+        folded, offsets = fold_with_offsets(text)
+        count = 0
+        for match in pattern.finditer(folded):
+            count += 1
+            if len(matches) < max_matches:
+                match_start = offsets[match.start()]
+                match_end = offsets[match.end() - 1] + 1
+                start = max(0, match_start - context_chars)
+                end = min(len(text), match_end + context_chars)
+                matches.append({
+                    "file": name,
+                    "offset": match_start,
+                    "line": text.count("\n", 0, match_start) + 1,
+                    "snippet": text[start:end]
+                })
+        if count:
+            match_counts[name] = count
+
+    return {
+        "matches": matches,
+        "match_counts": match_counts,
+        "total_matches": sum(match_counts.values()),
+        "truncated": sum(match_counts.values()) > len(matches)
+    }
@@ -4,17 +4,270 @@ MCP Server for Turkish Government Tenders (İhale)
 Provides access to the Turkish government procurement portal EKAP v2
 """
 
+import argparse
+import asyncio
+import contextvars
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional, Literal, Annotated, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Optional, Literal, Annotated, Dict, Any, Set, Union
 from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.tools import ToolResult
+from ihale_budget import DEFAULT_RESPONSE_BUDGET, budget_from_meta, fit_to_budget, json_size
+from ihale_cache import create_cache, create_document_url_cache
+from ihale_chunks import chunk_markdown, outline
 from ihale_client import EKAPClient
-from ihale_models import (
-    TENDER_TYPES, TENDER_STATUSES, TENDER_METHODS,
-    PROVINCES, PROPOSAL_TYPES, ANNOUNCEMENT_TYPES,
-    PLATE_TO_API_ID,
-    TenderDocument, TenderInfo, TenderSearchResponse
-)
+from ihale_deadline import deadline
+from ihale_models import REGISTRY
+from ihale_prefetch import Prefetcher
+from ihale_profile import ToolProfiler, collect_call_stats, configure_logging
+from ihale_query import resolve_date_filters, plates_to_api_ids, prepare_search_params, resolve_province, validate_search_codes
+from ihale_scheduler import Priority, create_scheduler, request_context
+
+# Maximum concurrent calls per tool; IHALE_TOOL_CONCURRENCY overrides these
+# with "tool=limit" pairs, e.g. "default=8,aggregate_tenders=1"
+TOOL_CONCURRENCY_LIMITS = {
+    "default": 16,
+    "aggregate_tenders": 2,
+    "export_tenders": 1,
+    "download_tender_documents": 2,
+    "get_tender_document_text": 4,
+    "search_tender_documents": 4,
+}
+
+
+# Default deadline per tool call in seconds (0 disables it); IHALE_TOOL_DEADLINES
+# overrides these with "tool=seconds" pairs. A client can set its own deadline
+# for a call with "deadline_seconds" in the request's _meta
+TOOL_DEADLINES = {
+    "default": 60,
+    "aggregate_tenders": 600,
+    "export_tenders": 0,
+    "download_tender_documents": 0,
+    "get_tender_document_text": 300,
+    "search_tender_documents": 300,
+    "index_tender_results": 0,
+    "run_saved_search": 600,
+}
+
+# Response size budget per tool in bytes (0 disables it); IHALE_TOOL_RESPONSE_BUDGETS
+# overrides these with "tool=bytes" pairs and IHALE_RESPONSE_BUDGET sets the default.
+# A client can set its own budget with "max_response_bytes" or "max_response_tokens"
+# in the request's _meta. Tools that already page their text by offset are exempt
+TOOL_RESPONSE_BUDGETS = {
+    "default": DEFAULT_RESPONSE_BUDGET,
+    "get_tender_document_text": 0,
+    "get_announcement_content": 0,
+}
+
+# Extra time a call gets after its deadline to return partial results before it is cancelled
+DEADLINE_GRACE_SECONDS = 5.0
+
+
+def _load_tool_overrides(defaults: Dict[str, Any], variable: str, convert) -> Dict[str, Any]:
+    """Merge "tool=value" overrides from an environment variable into per-tool defaults"""
+    settings = dict(defaults)
+    for pair in os.environ.get(variable, "").split(","):
+        if "=" in pair:
+            tool_name, value = pair.split("=", 1)
+            settings[tool_name.strip()] = convert(value)
+    return settings
+
+
+def _load_tool_concurrency_limits() -> Dict[str, int]:
+    """Merge IHALE_TOOL_CONCURRENCY overrides into the default per-tool limits"""
+    return _load_tool_overrides(TOOL_CONCURRENCY_LIMITS, "IHALE_TOOL_CONCURRENCY", lambda value: max(1, int(value)))
+
+
+def _load_tool_response_budgets() -> Dict[str, int]:
+    """Merge IHALE_TOOL_RESPONSE_BUDGETS overrides into the default per-tool budgets"""
+    return _load_tool_overrides(TOOL_RESPONSE_BUDGETS, "IHALE_TOOL_RESPONSE_BUDGETS", lambda value: max(0, int(value)))
+
+
+def _load_tool_deadlines() -> Dict[str, float]:
+    """Merge IHALE_TOOL_DEADLINES overrides into the default per-tool deadlines"""
+    return _load_tool_overrides(TOOL_DEADLINES, "IHALE_TOOL_DEADLINES", lambda value: max(0.0, float(value)))
+
+
+def _request_meta(context: MiddlewareContext) -> Optional[Dict[str, Any]]:
+    """The _meta of the MCP request behind a tool call, if available"""
+    fastmcp_context = context.fastmcp_context
+    if fastmcp_context is None:
+        return None
+    try:
+        meta = fastmcp_context.request_context.meta
+    except Exception:
+        return None
+    return meta if isinstance(meta, dict) else None
+
+
+class ResponseBudgetMiddleware(Middleware):
+    """Degrade tool results that exceed their response size budget (see ihale_budget)"""
+    
+    def __init__(self, budgets: Dict[str, int]):
+        self.budgets = budgets
+    
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        result = await call_next(context)
+        if result.is_error or not isinstance(result.structured_content, dict):
+            return result
+        budget = budget_from_meta(_request_meta(context))
+        if budget is None:
+            budget = self.budgets.get(context.message.name, self.budgets["default"])
+        fitted, marker = fit_to_budget(result.structured_content, budget)
+        if marker is None:
+            return result
+        return ToolResult(content=fitted, structured_content=fitted, meta=result.meta)
+
+
+class ToolProfilingMiddleware(Middleware):
+    """Time every tool call, log slow ones and profile them when profiling is on (see ihale_profile)"""
+    
+    def __init__(self, profiler: ToolProfiler):
+        self.profiler = profiler
+    
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        profile = self.profiler.start_profile()
+        started = time.perf_counter()
+        result, error = None, None
+        with collect_call_stats() as call_stats:
+            try:
+                result = await call_next(context)
+                return result
+            except BaseException as e:
+                error = type(e).__name__
+                raise
+            finally:
+                structured = getattr(result, "structured_content", None)
+                self.profiler.finish(
+                    context.message.name,
+                    context.message.arguments,
+                    time.perf_counter() - started,
+                    call_stats,
+                    json_size(structured) if structured is not None else None,
+                    profile,
+                    error
+                )
+
+
+class ToolDeadlineMiddleware(Middleware):
+    """Run each tool call under a deadline
+    
+    EKAP requests and conversions see the deadline through ihale_deadline
+    and stop at it, returning partial results where they can. A call still
+    running after the grace period is cancelled.
+    """
+    
+    def __init__(self, deadlines: Dict[str, float]):
+        self.deadlines = deadlines
+    
+    def _seconds(self, context: MiddlewareContext) -> float:
+        requested = (_request_meta(context) or {}).get("deadline_seconds")
+        if requested is not None:
+            try:
+                return max(0.0, float(requested))
+            except (TypeError, ValueError):
+                pass
+        return self.deadlines.get(context.message.name, self.deadlines["default"])
+    
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        seconds = self._seconds(context)
+        if not seconds:
+            return await call_next(context)
+        with deadline(seconds):
+            try:
+                return await asyncio.wait_for(call_next(context), seconds + DEADLINE_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                raise ToolError(f"{context.message.name} did not finish within its {seconds:g}s deadline")
+
+
+class ToolConcurrencyMiddleware(Middleware):
+    """Queue tool calls beyond each tool's concurrency limit"""
+    
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = limits
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    def _semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        if tool_name not in self._semaphores:
+            limit = self.limits.get(tool_name, self.limits["default"])
+            self._semaphores[tool_name] = asyncio.Semaphore(limit)
+        return self._semaphores[tool_name]
+    
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        async with self._semaphore(context.message.name):
+            return await call_next(context)
+
+
+# Outbound request priority per tool; tools not listed are interactive
+TOOL_PRIORITIES = {
+    "aggregate_tenders": Priority.SYNC,
+    "export_tenders": Priority.SYNC,
+}
+
+
+class RequestPriorityMiddleware(Middleware):
+    """Tag each tool call's EKAP requests with its priority class and MCP session"""
+    
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        session = "default"
+        fastmcp_context = context.fastmcp_context
+        if fastmcp_context is not None:
+            try:
+                session = fastmcp_context.session_id or session
+            except Exception:
+                pass
+        priority = TOOL_PRIORITIES.get(context.message.name, Priority.INTERACTIVE)
+        with request_context(priority, session):
+            return await call_next(context)
+
+
+class ForegroundCallMiddleware(Middleware):
+    """Pause background prefetching while any tool call is running"""
+    
+    def __init__(self, prefetcher: Prefetcher):
+        self.prefetcher = prefetcher
+    
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        async with self.prefetcher.foreground():
+            return await call_next(context)
+
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP):
+    """Stop prefetching and close the pooled EKAP client (and its cache) on shutdown"""
+    global _document_store, _document_extractor, _tender_store, _similarity_index, _local_index
+    global _similarity_synced_version, _saved_search_scheduler
+    if SAVED_SEARCH_SCHEDULER_ENABLED:
+        # With --workers N every process runs one; they claim due searches in the shared store
+        get_saved_search_scheduler().start()
+    try:
+        yield {}
+    finally:
+        await prefetcher.aclose()
+        if _saved_search_scheduler is not None:
+            await _saved_search_scheduler.aclose()
+            _saved_search_scheduler = None
+        # Local stores and indexes are reopened on demand if the server starts again
+        if _document_extractor is not None:
+            await _document_extractor.aclose()
+        if _document_store is not None:
+            await _document_store.aclose()
+        if _tender_store is not None:
+            _tender_store.close()
+        if _similarity_index is not None:
+            _similarity_index.close()
+        _document_store = _document_extractor = _tender_store = _similarity_index = _local_index = None
+        _similarity_synced_version = None
+        await ekap_client.aclose()
+
+
+# Per-call timing and slow-call records (IHALE_SLOW_CALL_SECONDS), cProfile with IHALE_PROFILE=1
+tool_profiler = ToolProfiler()
 
 # Initialize the MCP server and client
 mcp = FastMCP(
@@ -24,13 +277,163 @@ This server provides access to Turkish government tender (ihale) data from EKAP
 Use the search_tenders tool to find tenders based on various criteria.
 The server supports filtering by text, tender type, region, dates, and other parameters.
 All tender information is in Turkish as it comes directly from the government portal.
-"""
+""",
+    lifespan=server_lifespan,
+    middleware=[
+        ToolProfilingMiddleware(tool_profiler),
+        ToolDeadlineMiddleware(_load_tool_deadlines()),
+        ToolConcurrencyMiddleware(_load_tool_concurrency_limits()),
+        RequestPriorityMiddleware(),
+        ResponseBudgetMiddleware(_load_tool_response_budgets())
+    ]
 )
 
+
+def create_ekap_client():
+    """The tender data backend the tools use
+    
+    IHALE_BACKEND describes a backend stack (see ihale_backend.build_backend,
+    e.g. "cache,store,live"); IHALE_SNAPSHOT alone serves a snapshot file
+    read-only. By default this is the live EKAP client with its built-in
+    cache (IHALE_CACHE selects memory, sqlite or none), and every outbound
+    request shares one priority-scheduled concurrency budget.
+    """
+    spec = os.environ.get("IHALE_BACKEND")
+    if not spec and os.environ.get("IHALE_SNAPSHOT"):
+        spec = "snapshot"
+    if spec:
+        from ihale_backend import build_backend
+        return build_backend(spec)
+    return EKAPClient(
+        cache=create_cache(),
+        scheduler=create_scheduler(),
+        document_url_cache=create_document_url_cache()
+    )
+
+
 # Initialize EKAP API client
-ekap_client = EKAPClient()
+ekap_client = create_ekap_client()
+
+# Background cache warming for top search results (IHALE_PREFETCH_TOP_K enables it)
+prefetcher = Prefetcher(ekap_client)
+mcp.add_middleware(ForegroundCallMiddleware(prefetcher))
+
+# On-disk document store and text extractor, created on first use
+_document_store = None
+_document_extractor = None
+_tender_store = None
+
+
+def get_tender_store():
+    global _tender_store
+    if _tender_store is None:
+        from ihale_store import TenderStore
+        _tender_store = TenderStore()
+    return _tender_store
+
+
+# Similarity index, opened on first use and kept in sync with the store and searches
+_similarity_index = None
+_similarity_synced_version = None
+_similarity_lock = asyncio.Lock()
 
 
+async def get_similarity_index():
+    """Open the similarity index and add any stored tenders it is missing"""
+    global _similarity_index, _similarity_synced_version
+    async with _similarity_lock:
+        if _similarity_index is None:
+            from ihale_similarity import SimilarityIndex
+            _similarity_index = await asyncio.to_thread(SimilarityIndex)
+        store = get_tender_store()
+        version = store.version()
+        if version != _similarity_synced_version:
+            from ihale_store import TenderStore
+            
+            def sync():
+                with TenderStore(store.path) as thread_store:
+                    return _similarity_index.sync_from_store(thread_store)
+            
+            await asyncio.to_thread(sync)
+            _similarity_synced_version = version
+        return _similarity_index
+
+
+async def _index_search_results(tenders: List[Dict[str, Any]]) -> None:
+    """Add freshly fetched search results to an open similarity index"""
+    from ihale_similarity import index_items_from_tenders
+    async with _similarity_lock:
+        if _similarity_index is not None:
+            await asyncio.to_thread(_similarity_index.add, index_items_from_tenders(tenders))
+
+
+# Pending similarity-index updates, referenced until done so they aren't garbage collected
+_index_tasks: Set[asyncio.Task] = set()
+
+
+def _schedule_index_update(tenders: List[Dict[str, Any]]) -> None:
+    # A fresh context: the update outlives the tool call, so it mustn't inherit its deadline or call stats
+    task = asyncio.get_running_loop().create_task(_index_search_results(tenders), context=contextvars.Context())
+    _index_tasks.add(task)
+    task.add_done_callback(_index_tasks.discard)
+
+
+# Vectorized index over the local store, rebuilt when the store changes
+_local_index = None
+_local_index_version = None
+_local_index_lock = asyncio.Lock()
+
+
+async def get_local_index():
+    global _local_index, _local_index_version
+    async with _local_index_lock:
+        store = get_tender_store()
+        version = store.version()
+        if _local_index is None or version != _local_index_version:
+            from ihale_analytics import LocalTenderIndex
+            from ihale_store import TenderStore
+            
+            def build():
+                with TenderStore(store.path) as thread_store:
+                    return LocalTenderIndex.from_store(thread_store)
+            
+            # Building parses every stored row; keep it off the event loop
+            _local_index = await asyncio.to_thread(build)
+            _local_index_version = version
+        return _local_index
+
+
+# Background refresh of saved searches (IHALE_SAVED_SEARCH_SCHEDULER=1 enables it)
+SAVED_SEARCH_SCHEDULER_ENABLED = os.environ.get("IHALE_SAVED_SEARCH_SCHEDULER", "0").lower() in ("1", "true", "yes")
+_saved_search_scheduler = None
+
+
+def get_saved_search_scheduler():
+    global _saved_search_scheduler
+    if _saved_search_scheduler is None:
+        from ihale_store import default_db_path
+        from ihale_watch import SavedSearchScheduler
+        _saved_search_scheduler = SavedSearchScheduler(ekap_client, default_db_path())
+    return _saved_search_scheduler
+
+
+def get_document_store():
+    global _document_store
+    if ekap_client.offline:
+        raise ToolError("Tender documents are downloaded from EKAP and aren't available in offline snapshot mode")
+    if _document_store is None:
+        from ihale_documents import DocumentStore
+        _document_store = DocumentStore(ekap_client)
+    return _document_store
+
+
+def get_document_extractor():
+    global _document_extractor
+    if _document_extractor is None:
+        from ihale_extract import DocumentExtractor
+        _document_extractor = DocumentExtractor(get_document_store())
+    return _document_extractor
+
 
 @mcp.tool
 async def search_tenders(
@@ -66,7 +469,7 @@ async def search_tenders(
     cerceve_anlasmasi_mi: Annotated[Optional[bool], "Filter for framework agreements"] = None,
     personel_calistirilmasina_dayali_mi: Annotated[Optional[bool], "Filter for personnel employment based tenders"] = None,
     # List filters  
-    provinces: Annotated[List[int], "Province plate numbers to filter by (1-81, e.g., 6=Ankara, 34=İstanbul, 35=İzmir)"] = None,
+    provinces: Annotated[List[Union[int, str]], "Provinces to filter by, as plate numbers (1-81, e.g., 6=Ankara, 34=İstanbul, 35=İzmir) or names (\"istanbul\", \"IZMIR\"; small typos are tolerated)"] = None,
     tender_statuses: Annotated[List[int], "Tender status IDs to filter by"] = None,
     tender_methods: Annotated[List[int], "Tender method IDs to filter by"] = None,
     tender_sub_methods: Annotated[List[int], "Tender sub-method IDs to filter by"] = None,
@@ -87,7 +490,9 @@ async def search_tenders(
     search_in_contract_draft: Annotated[bool, "Search in contract draft"] = True,
     search_in_bid_form: Annotated[bool, "Search in bid form"] = True,
     limit: Annotated[int, "Maximum number of results to return (1-100)"] = 10,
-    skip: Annotated[int, "Number of results to skip for pagination"] = 0
+    skip: Annotated[int, "Number of results to skip for pagination"] = 0,
+    prefetch_top_k: Annotated[Optional[int], "Warm the cache for the top K results' details and announcements in the background (0 = off and cancel prefetching still queued, default: server setting)"] = None,
+    document_urls: Annotated[Literal["fetch", "cache_only", "none"], "How to fill document_url: fetch=resolve missing URLs from EKAP, cache_only=use cached URLs only (no network), none=skip"] = "fetch"
 ) -> Dict[str, Any]:
     """
     Search Turkish government tenders from EKAP v2 portal.
@@ -104,27 +509,17 @@ async def search_tenders(
         limit = 1
     
     # Handle special date filters
-    if announcement_date_filter == "today":
-        today = datetime.now().strftime("%Y-%m-%d")
-        announcement_date_start = today
-        announcement_date_end = today
-    
-    if tender_date_filter == "from_today":
-        today = datetime.now().strftime("%Y-%m-%d")
-        tender_date_start = today
-        tender_date_end = None
+    announcement_date_start, announcement_date_end, tender_date_start, tender_date_end = resolve_date_filters(
+        announcement_date_filter, tender_date_filter,
+        announcement_date_start, announcement_date_end,
+        tender_date_start, tender_date_end
+    )
     
     # Convert plate numbers to API IDs
-    api_province_ids = None
-    if provinces:
-        api_province_ids = []
-        for plate_number in provinces:
-            api_id = PLATE_TO_API_ID.get(plate_number)
-            if api_id:
-                api_province_ids.append(api_id)
-        # If no valid plate numbers, set to None to avoid empty filter
-        if not api_province_ids:
-            api_province_ids = None
+    try:
+        api_province_ids = plates_to_api_ids(provinces)
+    except ValueError as e:
+        return {"error": "Invalid search parameters", "message": str(e)}
     
     # Use the client to search tenders
     result = await ekap_client.search_tenders(
@@ -179,7 +574,9 @@ async def search_tenders(
         search_in_contract_draft=search_in_contract_draft,
         search_in_bid_form=search_in_bid_form,
         skip=skip,
-        limit=limit
+        limit=limit,
+        include_document_urls=document_urls != "none",
+        document_urls_from_cache_only=document_urls == "cache_only"
     )
     
     # Add search parameters to result for logging
@@ -189,6 +586,7 @@ async def search_tenders(
             "ikn_year": ikn_year, 
             "ikn_number": ikn_number,
             "tender_types": tender_types,
+            "provinces": [REGISTRY.provinces.plate(api_id) for api_id in api_province_ids or []],
             "date_range": {
                 "tender_start": tender_date_start,
                 "tender_end": tender_date_end,
@@ -197,6 +595,18 @@ async def search_tenders(
             }
         }
     
+    if prefetch_top_k == 0:
+        # The client doesn't want earlier results warmed either (e.g. it moved on)
+        prefetcher.cancel()
+    # Speculatively warm the cache for the results the agent is likely to open next
+    if not result.get("error"):
+        prefetcher.schedule(
+            (tender.get("id") for tender in result.get("tenders", [])),
+            top_k=prefetch_top_k
+        )
+        if _similarity_index is not None:
+            _schedule_index_update(result.get("tenders", []))
+    
     return result
 
 
@@ -210,7 +620,9 @@ async def search_okas_codes(
     Search OKAS procurement classification codes.
     
     Item types: 1=Goods, 2=Service, 3=Construction
-    Search in Turkish descriptions for best results.
+    Search in Turkish descriptions for best results. Case is handled with
+    Turkish rules; when nothing matches, close matches from codes seen
+    earlier are returned with fuzzy_matches=true.
     """
     
     # Use the client to search OKAS codes
@@ -230,7 +642,9 @@ async def search_authorities(
     Search Turkish government authorities/institutions.
     
     Find ministries, municipalities, universities for tender filtering.
-    Search in Turkish for best results.
+    Search in Turkish for best results. Case is handled with Turkish rules;
+    when nothing matches, close matches from authorities seen earlier are
+    returned with fuzzy_matches=true.
     """
     
     # Use the client to search authorities
@@ -240,6 +654,66 @@ async def search_authorities(
     )
 
 
+@mcp.tool
+async def resolve_reference_codes(
+    table: Annotated[Literal["provinces", "tender_types", "tender_statuses", "tender_methods", "proposal_types", "announcement_types", "announcement_record_types", "okas_item_types"], "Which code table to look in"],
+    values: Annotated[Optional[List[Union[int, str]]], "Codes, plate numbers, API IDs or names to resolve; omit to list the whole table"] = None
+) -> Dict[str, Any]:
+    """
+    Look up EKAP reference codes: provinces (plate number, API ID and name),
+    tender types and statuses, proposal and announcement types, OKAS item types.
+    
+    Values can be codes or names in any case ("yapım", "Construction",
+    "istanbul"); province names tolerate small typos. announcement_types are the
+    search filter IDs, announcement_record_types the ilanTip codes announcements
+    carry (İptal and Sonuç İlanı are numbered differently in the two).
+    """
+    
+    if table == "provinces":
+        provinces = REGISTRY.provinces
+        if values is None:
+            return {"table": table, "entries": provinces.as_list(), "count": len(provinces)}
+        resolved, unknown = [], []
+        for value in values:
+            plate = resolve_province(value)
+            if plate is None and isinstance(value, int):
+                # Not a plate; try it as an EKAP API ID
+                plate = provinces.plate(value)
+            if plate is None:
+                unknown.append(value)
+            else:
+                resolved.append({"value": value, "plate": plate, "api_id": provinces.api_id(plate), "name": provinces.name(plate)})
+        return {"table": table, "resolved": resolved, "unknown": unknown}
+    
+    codes = REGISTRY.table(table)
+    if values is None:
+        return {"table": table, "entries": codes.as_list(), "count": len(codes)}
+    resolved, unknown = [], []
+    for value in values:
+        code = codes.resolve(value)
+        if code is None:
+            unknown.append(value)
+        else:
+            resolved.append({"value": value, "code": code, "description": codes.description(code)})
+    return {"table": table, "resolved": resolved, "unknown": unknown}
+
+
+@mcp.tool
+async def validate_search_params(
+    search_params: Annotated[Dict[str, Any], "Arguments as they would be passed to search_tenders (e.g. {\"provinces\": [\"ankara\", 34], \"tender_types\": [2]})"]
+) -> Dict[str, Any]:
+    """
+    Check search_tenders arguments before running a search.
+    
+    Resolves provinces, tender types and statuses, proposal and announcement
+    types to their codes and descriptions, and reports values that match
+    nothing and argument names search_tenders does not accept. No request is
+    sent to EKAP.
+    """
+    
+    return validate_search_codes(search_params)
+
+
 @mcp.tool
 async def get_recent_tenders(
     days: Annotated[int, "Number of days back to search (1-30)"] = 7,
@@ -294,29 +768,90 @@ async def get_recent_tenders(
 
 @mcp.tool
 async def get_tender_announcements(
-    tender_id: Annotated[int, "The tender ID to get announcements for"]
+    tender_id: Annotated[int, "The tender ID to get announcements for"],
+    max_chars_per_announcement: Annotated[int, "Maximum Markdown characters returned per announcement (0 for previews only, up to 50000); read the rest with get_announcement_content"] = 10000
 ) -> Dict[str, Any]:
     """
     Get all announcements for a tender with HTML-to-Markdown conversion.
     
     Returns: Ön İlan, İhale İlanı, Sonuç İlanı, İptal İlanı, etc.
+    Long announcements are cut at a section boundary; markdown_next_offset
+    gives the offset to continue from with get_announcement_content.
     """
     
+    max_chars_per_announcement = max(0, min(max_chars_per_announcement, 50000))
+    
     # Use the client to get tender announcements (always converts to markdown)
     result = await ekap_client.get_tender_announcements(tender_id)
     
     if result.get("error"):
         return result
     
-    # Format the response
-    announcements = result.get("announcements", [])
+    # Format the response; the full Markdown stays in the server-side cache
+    announcements = []
+    for announcement in result.get("announcements", []):
+        markdown = announcement.get("markdown_content") or ""
+        first_chunk = chunk_markdown(markdown, 0, max_chars_per_announcement) if max_chars_per_announcement else None
+        announcements.append({
+            **announcement,
+            "markdown_content": first_chunk["content"] if first_chunk else None,
+            "markdown_total_chars": len(markdown),
+            "markdown_next_offset": first_chunk["next_offset"] if first_chunk else (0 if markdown else None)
+        })
     
-    return {
+    response = {
         "announcements": announcements,
         "total_announcements": result.get("total_count", 0),
         "tender_id": tender_id,
         "announcement_types_found": list(set(ann.get("type", {}).get("description", "Unknown") for ann in announcements))
     }
+    if result.get("partial"):
+        response["partial"] = True
+    return response
+
+
+@mcp.tool
+async def get_announcement_content(
+    tender_id: Annotated[int, "The tender ID the announcement belongs to"],
+    announcement_id: Annotated[int, "Announcement ID from get_tender_announcements"],
+    offset: Annotated[int, "Character offset to read from (markdown_next_offset / next_offset of the previous call)"] = 0,
+    max_chars: Annotated[int, "Maximum characters to return (1000-50000)"] = 10000,
+    include_outline: Annotated[bool, "Include the announcement's headings with their offsets"] = False
+) -> Dict[str, Any]:
+    """
+    Read one announcement's Markdown in chunks.
+    
+    Chunks end at heading, paragraph or table-row boundaries; a chunk that
+    starts inside a table repeats the table header. Use next_offset to
+    continue, or the outline offsets to jump to a section.
+    """
+    
+    max_chars = max(1000, min(max_chars, 50000))
+    
+    result = await ekap_client.get_tender_announcements(tender_id)
+    if result.get("error"):
+        return result
+    
+    announcement = next(
+        (ann for ann in result.get("announcements", []) if ann.get("id") == announcement_id), None
+    )
+    if announcement is None:
+        return {
+            "error": "Announcement not found",
+            "message": f"No announcement {announcement_id} for tender {tender_id}",
+            "announcement_ids": [ann.get("id") for ann in result.get("announcements", [])]
+        }
+    
+    markdown = announcement.get("markdown_content") or ""
+    response = {
+        "tender_id": tender_id,
+        "announcement_id": announcement_id,
+        "type": announcement.get("type"),
+        **chunk_markdown(markdown, offset, max_chars)
+    }
+    if include_outline:
+        response["outline"] = outline(markdown)
+    return response
 
 
 @mcp.tool
@@ -352,10 +887,615 @@ async def get_tender_details(
     }
 
 
+@mcp.tool
+async def get_tender_document_urls(
+    tender_ids: Annotated[List[int], "Tender IDs to resolve document URLs for (up to 200)"],
+    cache_only: Annotated[bool, "Only return URLs already cached, without contacting EKAP"] = False
+) -> Dict[str, Any]:
+    """
+    Get document download URLs for many tenders at once.
+    
+    URLs are cached for days and resolved concurrently; returns a map of
+    tender ID to URL (null when unavailable).
+    """
+    
+    if len(tender_ids) > 200:
+        return {"error": "Too many tender IDs", "message": "At most 200 tender IDs per call"}
+    
+    return await ekap_client.get_tender_document_urls(tender_ids, cache_only=cache_only)
+
 
-def main():
-    """Main entry point for the MCP server"""
-    mcp.run()
+@mcp.tool
+async def download_tender_documents(
+    tender_ids: Annotated[List[int], "Tender IDs whose documents to download (up to 50)"],
+    concurrency: Annotated[int, "Number of documents downloaded at once (1-8)"] = 4,
+    refresh: Annotated[bool, "Download again even if a document is already stored"] = False
+) -> Dict[str, Any]:
+    """
+    Download tender documents to the server's local document store.
+    
+    Documents are streamed to disk, stored once per content hash and resumed if
+    a previous download was interrupted. Returns a local handle (sha256, path,
+    size, content type, file name) per tender instead of the file contents.
+    """
+    
+    if len(tender_ids) > 50:
+        return {"error": "Too many tender IDs", "message": "At most 50 tender IDs per call"}
+    concurrency = max(1, min(concurrency, 8))
+    
+    return await get_document_store().download_tender_documents(
+        tender_ids, concurrency=concurrency, refresh=refresh
+    )
+
+
+@mcp.tool
+async def get_tender_document_text(
+    tender_id: Annotated[int, "Tender ID"],
+    file_name: Annotated[Optional[str], "File inside the tender documents to read (omit to list files)"] = None,
+    offset: Annotated[int, "Character offset to start reading from (use next_offset of the previous call)"] = 0,
+    max_chars: Annotated[int, "Maximum characters to return (1000-100000)"] = 20000
+) -> Dict[str, Any]:
+    """
+    Read tender specification documents as Markdown.
+    
+    Downloads the tender documents if needed and converts every PDF/DOCX/XLSX
+    file in the archive to Markdown. Without file_name, lists the files with
+    their sizes; with file_name, returns one chunk of that file's text.
+    """
+    
+    max_chars = max(1000, min(max_chars, 100000))
+    extractor = get_document_extractor()
+    result = await extractor.extract_tender(tender_id)
+    if result.get("error"):
+        return result
+    
+    files = result["files"]
+    if file_name is None:
+        return {"tender_id": tender_id, "files": files, "file_count": len(files)}
+    
+    file = next((f for f in files if f["name"] == file_name), None)
+    if file is None:
+        return {
+            "error": "File not found",
+            "message": f"No file named {file_name!r} in tender {tender_id} documents",
+            "files": [f["name"] for f in files]
+        }
+    if file["error"]:
+        return {"error": "Conversion failed", "message": file["error"], "file": file_name}
+    
+    text = extractor.read_text(file["sha256"]) or ""
+    return {"tender_id": tender_id, "file": file_name, **chunk_markdown(text, offset, max_chars)}
+
+
+@mcp.tool
+async def search_tender_documents(
+    tender_id: Annotated[int, "Tender ID"],
+    query: Annotated[str, "Text to search for (ignores case and Turkish diacritics)"],
+    max_matches: Annotated[int, "Maximum number of matches to return (1-200)"] = 50,
+    context_chars: Annotated[int, "Characters of context around each match (0-1000)"] = 200
+) -> Dict[str, Any]:
+    """
+    Search the text of all of a tender's specification documents.
+    
+    Returns matching snippets with file name, line and character offset; use
+    get_tender_document_text with that offset to read around a match.
+    """
+    
+    if not query.strip():
+        return {"error": "Empty query", "message": "query must not be empty"}
+    max_matches = max(1, min(max_matches, 200))
+    context_chars = max(0, min(context_chars, 1000))
+    
+    extractor = get_document_extractor()
+    result = await extractor.extract_tender(tender_id)
+    if result.get("error"):
+        return result
+    
+    from ihale_extract import search_texts
+    
+    texts = {
+        file["name"]: extractor.read_text(file["sha256"]) or ""
+        for file in result["files"] if not file["error"]
+    }
+    response = {
+        "tender_id": tender_id,
+        "query": query,
+        **search_texts(texts, query, max_matches=max_matches, context_chars=context_chars)
+    }
+    if result.get("partial"):
+        # Some files weren't converted before the deadline and weren't searched
+        response["partial"] = True
+    return response
+
+
+@mcp.tool
+async def index_tender_results(
+    tender_ids: Annotated[List[int], "Tender IDs whose Sonuç İlanı announcements to parse (up to 500)"],
+    fetch_missing: Annotated[bool, "Fetch announcements/details not yet in the local store from EKAP"] = True
+) -> Dict[str, Any]:
+    """
+    Parse result announcements (Sonuç İlanı) into the local contract award index.
+    
+    Extracts winning bidder, contract value and date, approximate cost and bid
+    counts per lot. Unchanged announcements are not re-parsed. Query the index
+    with query_contract_awards.
+    """
+    
+    if len(tender_ids) > 500:
+        return {"error": "Too many tender IDs", "message": "At most 500 tender IDs per call"}
+    
+    from ihale_results import index_results_for_tenders
+    
+    with request_context(Priority.SYNC):
+        return await index_results_for_tenders(
+            ekap_client, get_tender_store(), tender_ids, fetch_missing=fetch_missing
+        )
+
+
+@mcp.tool
+async def query_contract_awards(
+    winner: Annotated[Optional[str], "Winning bidder name contains (case/diacritic-insensitive)"] = None,
+    authority: Annotated[Optional[str], "Authority name contains"] = None,
+    okas_prefix: Annotated[Optional[str], "OKAS code prefix (e.g. '45' for construction works)"] = None,
+    province: Annotated[Optional[str], "Province name (e.g. 'Ankara')"] = None,
+    tender_type: Annotated[Optional[str], "Tender type (Mal, Yapım, Hizmet, Danışmanlık)"] = None,
+    min_value: Annotated[Optional[float], "Minimum contract value"] = None,
+    max_value: Annotated[Optional[float], "Maximum contract value"] = None,
+    group_by: Annotated[Optional[Literal["winner", "authority", "province", "tender_type"]], "Aggregate awards by this field instead of listing them"] = None,
+    limit: Annotated[int, "Maximum rows to return (1-500)"] = 50
+) -> Dict[str, Any]:
+    """
+    Query locally indexed contract awards from result announcements.
+    
+    Answers questions like "which firms won the most Yapım contracts in
+    Ankara" (tender_type="Yapım", province="Ankara", group_by="winner")
+    without re-reading announcements. Only covers tenders indexed with
+    index_tender_results or `ihale-mcp sync --results`.
+    """
+    
+    from ihale_results import query_contract_awards as run_query
+    
+    rows = run_query(
+        get_tender_store(),
+        winner=winner,
+        authority=authority,
+        okas_prefix=okas_prefix,
+        province=province,
+        tender_type=tender_type,
+        min_value=min_value,
+        max_value=max_value,
+        group_by=group_by,
+        limit=max(1, min(limit, 500))
+    )
+    return {
+        "groups" if group_by else "awards": rows,
+        "returned_count": len(rows),
+        "group_by": group_by
+    }
+
+
+@mcp.tool
+async def query_local_tenders(
+    where: Annotated[Optional[Dict[str, Any]], "Filter tree: {\"and\": [...]}, {\"or\": [...]}, {\"not\": {...}} or a leaf like {\"field\": \"province\", \"in\": [\"ANKARA\"]}, {\"field\": \"okas\", \"prefix\": [\"45\", \"7131\"]}, {\"field\": \"authority\", \"not_in\": [...]}, {\"field\": \"tender_datetime\", \"gte\": \"2025-01-10T09:00\", \"lt\": \"2025-01-10T12:00\"}, {\"field\": \"tender_time\", \"gte\": \"14:00\"}, {\"field\": \"characteristic\", \"all\": [\"e-ihale\"]}, {\"field\": \"name\", \"contains\": \"asfalt\"}"] = None,
+    sort_by: Annotated[Optional[Literal["tender_datetime", "-tender_datetime", "document_count", "-document_count", "id", "-id"]], "Sort key; prefix with - for descending"] = None,
+    offset: Annotated[int, "Number of matches to skip"] = 0,
+    limit: Annotated[int, "Maximum tenders to return (0-500)"] = 50,
+    facets: Annotated[Optional[List[Literal["type", "status", "province", "method", "authority"]]], "Count values of these fields among all matches"] = None
+) -> Dict[str, Any]:
+    """
+    Filter tenders already synced into the local store, without calling EKAP.
+    
+    Supports filters a single EKAP search can't express (several OKAS
+    prefixes, excluded authorities, time-of-day windows, combined
+    characteristics) as AND/OR/NOT trees evaluated over all stored tenders.
+    OKAS and characteristic filters need details synced (`ihale-mcp sync --details`).
+    """
+    
+    try:
+        index = await get_local_index()
+    except ImportError as e:
+        return {"error": "Analytics dependencies not installed", "message": str(e)}
+    
+    started = time.perf_counter()
+    try:
+        result = index.query(
+            where,
+            sort_by=sort_by,
+            offset=max(0, offset),
+            limit=max(0, min(limit, 500)),
+            facets=facets
+        )
+    except (ValueError, TypeError) as e:
+        return {"error": "Invalid filter", "message": str(e)}
+    
+    return {
+        **result,
+        "indexed_count": len(index),
+        "indexed_with_details": index.with_details,
+        "query_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+@mcp.tool
+async def find_similar_tenders(
+    tender_id: Annotated[Optional[int], "Find tenders similar to this tender"] = None,
+    text: Annotated[Optional[str], "Or find tenders similar to this text (e.g. 'yol bakım onarım')"] = None,
+    top_k: Annotated[int, "Number of similar tenders to return (1-100)"] = 10,
+    nprobe: Annotated[int, "Index clusters to search; higher is slower but more exact (1-64)"] = 8
+) -> Dict[str, Any]:
+    """
+    Find related tenders by meaning rather than exact keywords.
+    
+    Searches a local index of tender names and announcement text built from
+    the local store (`ihale-mcp sync`) and from search results seen since the
+    index was opened, so it only finds tenders seen before.
+    """
+    
+    if (tender_id is None) == (text is None):
+        return {"error": "Invalid arguments", "message": "Pass exactly one of tender_id or text"}
+    top_k = max(1, min(top_k, 100))
+    nprobe = max(1, min(nprobe, 64))
+    
+    try:
+        index = await get_similarity_index()
+    except ImportError as e:
+        return {"error": "Analytics dependencies not installed", "message": str(e)}
+    
+    started = time.perf_counter()
+    vector = None
+    if tender_id is not None:
+        async with _similarity_lock:
+            vector = index.vector_for(tender_id)
+        if vector is None:
+            # Not indexed yet; embed its name from the details
+            details = await ekap_client.get_tender_details(tender_id, convert_announcements=False)
+            if details.get("error"):
+                return details
+            text = " ".join(filter(None, [details.get("name"), (details.get("authority") or {}).get("name")]))
+    
+    async with _similarity_lock:
+        if vector is None:
+            # A sentence model takes tens of milliseconds per text; keep it off the event loop
+            vector = await asyncio.to_thread(index.embed_text, text)
+        results = await asyncio.to_thread(
+            index.search, vector, top_k, nprobe, [tender_id] if tender_id is not None else []
+        )
+    
+    return {
+        "similar_tenders": results,
+        "returned_count": len(results),
+        "index": index.status(),
+        "query_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+@mcp.tool
+async def aggregate_tenders(
+    search_params: Annotated[Optional[Dict[str, Any]], "Filters using the same argument names as search_tenders (e.g. {\"tender_types\": [2], \"provinces\": [6], \"announcement_date_filter\": \"today\"}); skip/limit are ignored"] = None,
+    group_by: Annotated[List[Literal["type", "status", "province", "method", "authority"]], "Fields to count tenders by"] = None,
+    date_histogram: Annotated[Optional[Literal["day", "week", "month"]], "Bucket tenders by tender date at this granularity"] = None,
+    top_authorities: Annotated[int, "Number of top authorities by tender count to return (0 to disable)"] = 10,
+    max_results: Annotated[int, "Maximum number of matching tenders to pull (1-10000)"] = 2000
+) -> Dict[str, Any]:
+    """
+    Aggregate all tenders matching a search without returning them.
+    
+    Pulls every page of the search server-side and returns only group-by counts,
+    a tender-date histogram and the top authorities (e.g. open Yapım tenders per province).
+    """
+    
+    # Validate limits
+    if max_results > 10000:
+        max_results = 10000
+    elif max_results < 1:
+        max_results = 1
+    top_authorities = max(0, min(top_authorities, 100))
+    
+    try:
+        client_params = prepare_search_params(search_params)
+    except ValueError as e:
+        return {"error": "Invalid search parameters", "message": str(e)}
+    
+    result = await ekap_client.search_all_tenders(max_results=max_results, **client_params)
+    if result.get("error"):
+        return result
+    
+    try:
+        from ihale_analytics import aggregate_tender_list
+        aggregates = aggregate_tender_list(
+            result.get("tenders", []),
+            group_by=group_by or ["province"],
+            date_histogram=date_histogram,
+            top_authorities=top_authorities
+        )
+    except ImportError as e:
+        return {"error": "Analytics dependencies not installed", "message": str(e)}
+    
+    response = {
+        **aggregates,
+        "total_count": result.get("total_count", 0),
+        "aggregated_count": result.get("returned_count", 0),
+        "truncated": result.get("total_count", 0) > result.get("returned_count", 0),
+        "search_params": search_params or {}
+    }
+    if result.get("partial"):
+        # The deadline hit while pages were still being pulled
+        response["partial"] = True
+    return response
+
+
+@mcp.tool
+async def export_tenders(
+    path: Annotated[str, "Output file name, relative to the server's export directory (IHALE_EXPORT_DIR, e.g. \"ankara/tenders.parquet\")"],
+    output_format: Annotated[Literal["jsonl", "csv", "parquet"], "Output file format"] = "jsonl",
+    search_params: Annotated[Optional[Dict[str, Any]], "Filters using the same argument names as search_tenders; skip/limit are ignored"] = None,
+    max_results: Annotated[Optional[int], "Maximum number of tenders to export (default: all)"] = None,
+    include_details: Annotated[bool, "Join tender detail fields (location, OKAS codes, authority) into each row"] = False
+) -> Dict[str, Any]:
+    """
+    Export all tenders matching a search to a file on the server.
+    
+    Files are written inside the server's export directory only. Streams pages
+    to disk as they arrive and returns row count and rows/sec, not the tenders
+    themselves.
+    """
+    
+    try:
+        client_params = prepare_search_params(search_params)
+    except ValueError as e:
+        return {"error": "Invalid search parameters", "message": str(e)}
+    
+    from ihale_export import export_tenders as run_export, resolve_export_path
+    
+    try:
+        output_path = resolve_export_path(path)
+    except ValueError as e:
+        return {"error": "Invalid export path", "message": str(e)}
+    
+    return await run_export(
+        ekap_client,
+        str(output_path),
+        output_format=output_format,
+        search_params=client_params,
+        max_results=max_results,
+        include_details=include_details
+    )
+
+
+@mcp.tool
+async def save_search(
+    name: Annotated[str, "Unique name for the saved search (saving an existing name updates it)"],
+    search_params: Annotated[Dict[str, Any], "Filters using the same argument names as search_tenders (e.g. {\"okas_codes\": [\"45233140\"], \"provinces\": [\"ankara\"], \"announcement_date_filter\": \"today\"}); skip/limit are ignored"],
+    max_results: Annotated[int, "Maximum matching tenders pulled per refresh (1-5000); new tenders are only detected among these"] = 500,
+    interval_minutes: Annotated[Optional[float], "Refresh interval for the background scheduler (default: daily)"] = None
+) -> Dict[str, Any]:
+    """
+    Save a monitoring search that is refreshed periodically.
+    
+    Each refresh records the tender IDs it sees; only tenders not seen by
+    earlier refreshes are reported as new. The first refresh sets the
+    baseline. Only the first max_results matches are checked, so keep the
+    filters narrow enough that total_count stays below it. Read new tenders
+    with get_saved_search_delta.
+    """
+    
+    from ihale_watch import DEFAULT_INTERVAL_SECONDS, validate_search_params
+    
+    try:
+        params = validate_search_params(search_params)
+    except ValueError as e:
+        return {"error": "Invalid search parameters", "message": str(e)}
+    
+    interval_seconds = interval_minutes * 60 if interval_minutes else DEFAULT_INTERVAL_SECONDS
+    store = get_tender_store()
+    store.save_search(name, params, max(1, min(max_results, 5000)), max(60.0, interval_seconds))
+    if _saved_search_scheduler is not None:
+        _saved_search_scheduler.wake()
+    return {"saved": True, "search": store.get_search(name)}
+
+
+@mcp.tool
+async def list_saved_searches() -> Dict[str, Any]:
+    """
+    List saved searches with their last refresh and unread new-tender counts.
+    """
+    
+    searches = get_tender_store().list_searches()
+    return {
+        "saved_searches": searches,
+        "count": len(searches),
+        "scheduler": _saved_search_scheduler.status() if _saved_search_scheduler else {"running": False}
+    }
+
+
+@mcp.tool
+async def run_saved_search(
+    name: Annotated[str, "Name of the saved search to refresh now"]
+) -> Dict[str, Any]:
+    """
+    Refresh a saved search now and return the tenders it found for the first time.
+    
+    new_tenders only covers the first max_results matches (truncated=true when
+    there were more). A refresh cut short by the deadline returns partial=true
+    and marks nothing seen.
+    """
+    
+    from ihale_watch import refresh_saved_search
+    
+    return await refresh_saved_search(ekap_client, get_tender_store(), name)
+
+
+@mcp.tool
+async def get_saved_search_delta(
+    name: Annotated[str, "Name of the saved search"],
+    mark_read: Annotated[bool, "Advance the read cursor so these tenders aren't returned again"] = True,
+    limit: Annotated[int, "Maximum tenders to return (1-1000)"] = 100
+) -> Dict[str, Any]:
+    """
+    Get tenders newly matched by a saved search since it was last read.
+    
+    Covers every refresh (scheduled or run_saved_search) after the read
+    cursor, oldest first; each tender carries the run_id that found it.
+    """
+    
+    store = get_tender_store()
+    search = store.get_search(name)
+    if search is None:
+        return {"error": "Saved search not found", "name": name}
+    
+    tenders, cursor, has_more = store.search_delta(name, tuple(search["read_cursor"]), max(1, min(limit, 1000)))
+    if mark_read:
+        store.mark_search_read(name, cursor)
+    return {
+        "name": name,
+        "new_tenders": tenders,
+        "returned_count": len(tenders),
+        "has_more": has_more,
+        "read_cursor": list(cursor)
+    }
+
+
+@mcp.tool
+async def delete_saved_search(
+    name: Annotated[str, "Name of the saved search to delete"]
+) -> Dict[str, Any]:
+    """
+    Delete a saved search with its refresh history and seen tender IDs.
+    """
+    
+    return {"deleted": get_tender_store().delete_search(name), "name": name}
+
+
+@mcp.tool
+async def get_server_metrics() -> Dict[str, Any]:
+    """
+    Get server performance metrics.
+    
+    Returns outbound EKAP request queue depth and wait times per priority class
+    (interactive, enrichment, prefetch, sync), background prefetch status and
+    per-call profiling state with recent slow calls.
+    """
+    
+    return {
+        "request_scheduler": ekap_client.scheduler.metrics() if ekap_client.scheduler else None,
+        "prefetch": prefetcher.status(),
+        "saved_search_scheduler": _saved_search_scheduler.status() if _saved_search_scheduler else None,
+        "cache_backend": type(ekap_client.cache).__name__ if ekap_client.cache else None,
+        "profiling": tool_profiler.status()
+    }
+
+
+@mcp.tool
+async def configure_profiling(
+    enabled: Annotated[Optional[bool], "Run tool calls under cProfile and keep profiles of slow calls (default: unchanged)"] = None,
+    slow_call_seconds: Annotated[Optional[float], "Log calls taking at least this many seconds (0 = off; default: unchanged)"] = None
+) -> Dict[str, Any]:
+    """
+    Turn per-call profiling and slow-call logging on or off at runtime.
+    
+    Slow calls are logged to stderr with their EKAP time, conversion time
+    and response size; with profiling on, their cProfile output is written
+    under profile_dir. Returns the current settings and recent slow calls.
+    """
+    if enabled is not None:
+        tool_profiler.enabled = enabled
+    if slow_call_seconds is not None:
+        tool_profiler.slow_call_seconds = max(0.0, slow_call_seconds)
+    return tool_profiler.status()
+
+
+def create_http_app():
+    """ASGI app factory used by uvicorn worker processes
+    
+    Sessions are stateless because consecutive requests of one client may be
+    served by different workers; shared state lives in the SQLite cache.
+    """
+    return mcp.http_app(
+        path=os.environ.get("IHALE_HTTP_PATH") or None,
+        transport=os.environ.get("IHALE_TRANSPORT", "http"),
+        stateless_http=True
+    )
+
+
+def _use_backend(spec: str) -> None:
+    """Swap the default EKAP client for a configured backend stack before the server starts"""
+    global ekap_client
+    # Worker processes pick the spec up from the environment on import
+    os.environ["IHALE_BACKEND"] = spec
+    asyncio.run(ekap_client.aclose())
+    ekap_client = create_ekap_client()
+    prefetcher.client = ekap_client
+
+
+def _parse_server_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="ihale-mcp",
+        description="Run the İhale MCP server. See 'ihale-mcp --help' for batch subcommands."
+    )
+    parser.add_argument(
+        "--transport", choices=["stdio", "http", "sse"],
+        default=os.environ.get("IHALE_TRANSPORT", "stdio"),
+        help="MCP transport (default: stdio)"
+    )
+    parser.add_argument("--host", default=os.environ.get("IHALE_HOST", "127.0.0.1"), help="HTTP bind address")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("IHALE_PORT", "8000")), help="HTTP port")
+    parser.add_argument("--path", default=os.environ.get("IHALE_HTTP_PATH"), help="HTTP endpoint path (default: /mcp)")
+    parser.add_argument(
+        "--backend", default=os.environ.get("IHALE_BACKEND"),
+        help="Backend stack, outermost layer first (e.g. cache,store,live); see ihale_backend"
+    )
+    parser.add_argument(
+        "--snapshot",
+        help="Serve read-only from a snapshot file written by 'ihale-mcp snapshot' (same as --backend snapshot:PATH)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("IHALE_WORKERS", "1")),
+        help="Worker processes for the http transport; more than one implies IHALE_CACHE=sqlite"
+    )
+    args = parser.parse_args(argv)
+    if args.workers > 1 and args.transport != "http":
+        parser.error("--workers > 1 requires --transport http")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for the MCP server and CLI subcommands"""
+    from ihale_cli import COMMANDS
+    
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        from ihale_cli import main as cli_main
+        sys.exit(cli_main(argv))
+    
+    args = _parse_server_args(argv)
+    configure_logging()
+    spec = f"snapshot:{args.snapshot}" if args.snapshot else args.backend
+    if spec and spec != os.environ.get("IHALE_BACKEND"):
+        _use_backend(spec)
+    
+    if args.transport == "stdio":
+        mcp.run()
+        return
+    
+    if args.workers > 1:
+        import uvicorn
+        
+        # Worker processes import this module afresh and read their settings from the environment
+        os.environ.setdefault("IHALE_CACHE", "sqlite")
+        os.environ["IHALE_TRANSPORT"] = args.transport
+        if args.path:
+            os.environ["IHALE_HTTP_PATH"] = args.path
+        uvicorn.run(
+            "ihale_mcp:create_http_app",
+            factory=True,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            timeout_graceful_shutdown=30
+        )
+        return
+    
+    mcp.run(transport=args.transport, host=args.host, port=args.port, path=args.path)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,54 +4,61 @@ Data models for Turkish Government Tenders (İhale) MCP Server
 Contains all Pydantic models and static data for the EKAP v2 integration
 """
 
-from typing import List
-from pydantic import BaseModel, Field
+from typing import Dict, List, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from ihale_text import fold
+
+
+class _DeferredModel(BaseModel):
+    """Base model that builds its validation schema on first use instead of at import"""
+    model_config = ConfigDict(defer_build=True)
+
 
 # Data models for the API
-class OkasCode(BaseModel):
+class OkasCode(_DeferredModel):
     """OKAS (public procurement classification) code model"""
     code: str = Field(description="OKAS code")
     description: str = Field(description="Description of the OKAS code")
     category: str = Field(description="Category type (goods, services, etc.)")
 
-class TenderType(BaseModel):
+class TenderType(_DeferredModel):
     """Tender type model"""
     id: int = Field(description="Tender type ID")
     code: str = Field(description="Tender type code")
     description: str = Field(description="Tender type description")
 
-class TenderStatus(BaseModel):
+class TenderStatus(_DeferredModel):
     """Tender status model"""
     id: int = Field(description="Status ID")
     code: str = Field(description="Status code")
     description: str = Field(description="Status description")
 
-class TenderMethod(BaseModel):
+class TenderMethod(_DeferredModel):
     """Tender method model"""
     code: str = Field(description="Method code")
     description: str = Field(description="Method description")
 
-class Province(BaseModel):
+class Province(_DeferredModel):
     """Turkish province model"""
     name: str = Field(description="Province name")
 
-class ProposalType(BaseModel):
+class ProposalType(_DeferredModel):
     """Proposal/bid type model"""
     code: str = Field(description="Proposal type code")
     description: str = Field(description="Proposal type description")
 
-class AnnouncementType(BaseModel):
+class AnnouncementType(_DeferredModel):
     """Announcement type model"""
     code: str = Field(description="Announcement type code")  
     description: str = Field(description="Announcement type description")
 
-class TenderDocument(BaseModel):
+class TenderDocument(_DeferredModel):
     """Tender document information"""
     id: int
     tender_id: int = Field(alias="ihaleId")
     date: str = Field(alias="tarih")
 
-class TenderInfo(BaseModel):
+class TenderInfo(_DeferredModel):
     """Basic tender information from search results"""
     id: int
     name: str = Field(alias="ihaleAdi")
@@ -69,38 +76,159 @@ class TenderInfo(BaseModel):
     documents: List[TenderDocument] = Field(alias="dokumanListe")
     has_announcement: bool = Field(alias="ilanVarMi")
 
-class TenderSearchResponse(BaseModel):
+class TenderSearchResponse(_DeferredModel):
     """Response from tender search API"""
     tenders: List[TenderInfo] = Field(alias="list")
     total_count: int = Field(alias="totalCount")
 
+class ContractAward(_DeferredModel):
+    """One awarded contract (or lot) parsed from a Sonuç İlanı"""
+    lot: Optional[str] = Field(default=None, description="Lot (kısım) name or number for partial tenders")
+    winner: Optional[str] = Field(default=None, description="Contractor the contract was awarded to")
+    winner_nationality: Optional[str] = Field(default=None, description="Contractor nationality")
+    contract_value: Optional[float] = Field(default=None, description="Contract value")
+    currency: Optional[str] = Field(default=None, description="Currency of the contract value")
+    contract_date: Optional[str] = Field(default=None, description="Contract date (DD.MM.YYYY)")
+    estimated_cost: Optional[float] = Field(default=None, description="Approximate cost (yaklaşık maliyet)")
+    total_bids: Optional[int] = Field(default=None, description="Number of bids received")
+    valid_bids: Optional[int] = Field(default=None, description="Number of valid bids")
+
+class ResultAnnouncement(_DeferredModel):
+    """Structured fields of a Sonuç İlanı announcement"""
+    announcement_id: int
+    tender_id: int
+    ikn: Optional[str] = None
+    date: Optional[str] = None
+    awards: List[ContractAward] = Field(default_factory=list)
+    content_sha256: str = Field(description="Hash of the parsed content, used to skip re-parsing")
+
 # Note: OKAS codes are now fetched dynamically from the live API via search_okas_codes tool
 # The static list below is kept for reference but not used in the implementation
 
-TENDER_TYPES = [
-    TenderType(id=1, code="1", description="Mal (Goods/Equipment procurement)"),
-    TenderType(id=2, code="2", description="Yapım (Construction/Infrastructure projects)"),
-    TenderType(id=3, code="3", description="Hizmet (Services procurement)"),
-    TenderType(id=4, code="4", description="Danışmanlık (Consultancy services)")
-]
-
-TENDER_STATUSES = [
-    TenderStatus(id=1, code="1", description="İptal Edilmiş (Cancelled)"),
-    TenderStatus(id=2, code="2", description="Teklifler Değerlendiriliyor (Bids under evaluation)"),
-    TenderStatus(id=3, code="3", description="Teklif Vermeye Açık (Open for bidding)"),
-    TenderStatus(id=4, code="4", description="Teklif Değerlendirme Tamamlanmış (Bid evaluation completed)"),
-    TenderStatus(id=5, code="5", description="Sözleşme İmzalanmış (Contract signed)")
-]
-
-TENDER_METHODS = [
-    TenderMethod(code="Açık", description="Açık İhale Usulü (Open tender method)"),
-    TenderMethod(code="Belli İstekliler Arasında", description="Belli İstekliler Arasında İhale (Restricted tender)"),
-    TenderMethod(code="Pazarlık", description="Pazarlık Usulü (Negotiated procedure)"),
-    TenderMethod(code="Tasarım Yarışması", description="Tasarım Yarışması (Design competition)")
-]
-
-# Province plate number to API ID mapping
-# Users provide standard Turkish plate numbers (1-81), we convert to API IDs (245-325)
+class CodeTable:
+    """Bidirectional map between the codes of one EKAP vocabulary and their descriptions
+
+    Codes match whether given as int or str (3 and "3"), and string codes
+    in any case. Descriptions match
+    case- and diacritic-insensitively, on the whole description, its Turkish
+    part or its English gloss ("Yapım (Construction)" answers to "yapim"
+    and "construction").
+    """
+
+    def __init__(self, name: str, entries: Dict[Any, str]):
+        self.name = name
+        self.entries: Dict[Any, str] = dict(entries)
+        self._by_code: Dict[str, Any] = {fold(str(code)): code for code in self.entries}
+        self._by_description: Dict[str, Any] = {}
+        for code, description in self.entries.items():
+            for alias in _description_aliases(description):
+                self._by_description.setdefault(fold(alias), code)
+
+    def __contains__(self, code: Any) -> bool:
+        return self.code(code) is not None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def items(self):
+        return self.entries.items()
+
+    def code(self, code: Any) -> Optional[Any]:
+        """The table's own code for `code` (int or str, any case), or None if unknown"""
+        if code is None:
+            return None
+        return self._by_code.get(fold(str(code)))
+
+    def description(self, code: Any, default: Optional[str] = None) -> Optional[str]:
+        """Description of `code`, or `default` if unknown"""
+        key = self.code(code)
+        return self.entries[key] if key is not None else default
+
+    def code_for(self, description: str) -> Optional[Any]:
+        """Code whose description (or its Turkish or English part) is `description`"""
+        return self._by_description.get(fold(description or ""))
+
+    def resolve(self, value: Any) -> Optional[Any]:
+        """Code for a code or a description, or None"""
+        code = self.code(value)
+        if code is None and isinstance(value, str):
+            code = self.code_for(value)
+        return code
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        return [{"code": code, "description": description} for code, description in self.entries.items()]
+
+    def legend(self) -> Dict[str, str]:
+        """Code (as a string, like JSON object keys) to description"""
+        return {str(code): description for code, description in self.entries.items()}
+
+
+def _description_aliases(description: str) -> List[str]:
+    """A description and, for "Türkçe (English)" forms, each part"""
+    aliases = [description]
+    if description.endswith(")") and " (" in description:
+        turkish, english = description[:-1].split(" (", 1)
+        aliases.extend([turkish, english])
+    return aliases
+
+
+TENDER_TYPE_CODES = CodeTable("tender_types", {
+    1: "Mal (Goods/Equipment procurement)",
+    2: "Yapım (Construction/Infrastructure projects)",
+    3: "Hizmet (Services procurement)",
+    4: "Danışmanlık (Consultancy services)"
+})
+
+TENDER_STATUS_CODES = CodeTable("tender_statuses", {
+    1: "İptal Edilmiş (Cancelled)",
+    2: "Teklifler Değerlendiriliyor (Bids under evaluation)",
+    3: "Teklif Vermeye Açık (Open for bidding)",
+    4: "Teklif Değerlendirme Tamamlanmış (Bid evaluation completed)",
+    5: "Sözleşme İmzalanmış (Contract signed)"
+})
+
+TENDER_METHOD_CODES = CodeTable("tender_methods", {
+    "Açık": "Açık İhale Usulü (Open tender method)",
+    "Belli İstekliler Arasında": "Belli İstekliler Arasında İhale (Restricted tender)",
+    "Pazarlık": "Pazarlık Usulü (Negotiated procedure)",
+    "Tasarım Yarışması": "Tasarım Yarışması (Design competition)"
+})
+
+# Proposal Types - API expects numeric IDs
+PROPOSAL_TYPES = {
+    1: "Götürü-Anahtar Teslimi Götürü",
+    2: "Birim Fiyat", 
+    3: "Karma"
+}
+
+# Announcement Types - API expects numeric IDs
+ANNOUNCEMENT_TYPES = {
+    1: "Ön İlan",
+    2: "İhale İlanı",
+    3: "Sonuç İlanı",
+    4: "İptal İlanı",
+    5: "Ön Yeterlik İlanı",
+    6: "Düzeltme İlanı"
+}
+
+# ilanTip codes on announcement records, which number İptal and Sonuç the
+# other way round from the search filter IDs above
+ANNOUNCEMENT_RECORD_TYPES = {
+    "1": "Ön İlan",
+    "2": "İhale İlanı",
+    "3": "İptal İlanı",
+    "4": "Sonuç İlanı",
+    "5": "Ön Yeterlik İlanı",
+    "6": "Düzeltme İlanı"
+}
+
+# OKAS item types (kalemTuru); note Hizmet and Yapım swap places compared to tender types
+OKAS_ITEM_TYPES = {
+    1: "Mal (Goods)",
+    2: "Hizmet (Service)",
+    3: "Yapım (Construction)"
+}
+
 PLATE_TO_API_ID = {
     1: 245,  # ADANA
     2: 246,  # ADIYAMAN
@@ -185,105 +313,221 @@ PLATE_TO_API_ID = {
     81: 271,  # DÜZCE
 }
 
-# Province list with EKAP API-specific IDs (245-325 range)
-# These are the actual API IDs used internally
-PROVINCES = {
-    245: Province(name="ADANA"),
-    246: Province(name="ADIYAMAN"),
-    247: Province(name="AFYONKARAHİSAR"),
-    248: Province(name="AĞRI"),
-    249: Province(name="AKSARAY"),
-    250: Province(name="AMASYA"),
-    251: Province(name="ANKARA"),
-    252: Province(name="ANTALYA"),
-    253: Province(name="ARDAHAN"),
-    254: Province(name="ARTVİN"),
-    255: Province(name="AYDIN"),
-    256: Province(name="BALIKESİR"),
-    257: Province(name="BARTIN"),
-    258: Province(name="BATMAN"),
-    259: Province(name="BAYBURT"),
-    260: Province(name="BİLECİK"),
-    261: Province(name="BİNGÖL"),
-    262: Province(name="BİTLİS"),
-    263: Province(name="BOLU"),
-    264: Province(name="BURDUR"),
-    265: Province(name="BURSA"),
-    266: Province(name="ÇANAKKALE"),
-    267: Province(name="ÇANKIRI"),
-    268: Province(name="ÇORUM"),
-    269: Province(name="DENİZLİ"),
-    270: Province(name="DİYARBAKIR"),
-    271: Province(name="DÜZCE"),
-    272: Province(name="EDİRNE"),
-    273: Province(name="ELAZIĞ"),
-    274: Province(name="ERZİNCAN"),
-    275: Province(name="ERZURUM"),
-    276: Province(name="ESKİŞEHİR"),
-    277: Province(name="GAZİANTEP"),
-    278: Province(name="GİRESUN"),
-    279: Province(name="GÜMÜŞHANE"),
-    280: Province(name="HAKKARİ"),
-    281: Province(name="HATAY"),
-    282: Province(name="IĞDIR"),
-    283: Province(name="ISPARTA"),
-    284: Province(name="İSTANBUL"),
-    285: Province(name="İZMİR"),
-    286: Province(name="KAHRAMANMARAŞ"),
-    287: Province(name="KARABÜK"),
-    288: Province(name="KARAMAN"),
-    289: Province(name="KARS"),
-    290: Province(name="KASTAMONU"),
-    291: Province(name="KAYSERİ"),
-    292: Province(name="KIRIKKALE"),
-    293: Province(name="KIRKLARELİ"),
-    294: Province(name="KIRŞEHİR"),
-    295: Province(name="KİLİS"),
-    296: Province(name="KOCAELİ"),
-    297: Province(name="KONYA"),
-    298: Province(name="KÜTAHYA"),
-    299: Province(name="MALATYA"),
-    300: Province(name="MANİSA"),
-    301: Province(name="MARDİN"),
-    302: Province(name="MERSİN"),
-    303: Province(name="MUĞLA"),
-    304: Province(name="MUŞ"),
-    305: Province(name="NEVŞEHİR"),
-    306: Province(name="NİĞDE"),
-    307: Province(name="ORDU"),
-    308: Province(name="OSMANİYE"),
-    309: Province(name="RİZE"),
-    310: Province(name="SAKARYA"),
-    311: Province(name="SAMSUN"),
-    312: Province(name="SİİRT"),
-    313: Province(name="SİNOP"),
-    314: Province(name="SİVAS"),
-    315: Province(name="ŞANLIURFA"),
-    316: Province(name="ŞIRNAK"),
-    317: Province(name="TEKİRDAĞ"),
-    318: Province(name="TOKAT"),
-    319: Province(name="TRABZON"),
-    320: Province(name="TUNCELİ"),
-    321: Province(name="UŞAK"),
-    322: Province(name="VAN"),
-    323: Province(name="YALOVA"),
-    324: Province(name="YOZGAT"),
-    325: Province(name="ZONGULDAK")
+# Province names by EKAP API ID (245-325 range)
+PROVINCE_NAMES = {
+    245: "ADANA",
+    246: "ADIYAMAN",
+    247: "AFYONKARAHİSAR",
+    248: "AĞRI",
+    249: "AKSARAY",
+    250: "AMASYA",
+    251: "ANKARA",
+    252: "ANTALYA",
+    253: "ARDAHAN",
+    254: "ARTVİN",
+    255: "AYDIN",
+    256: "BALIKESİR",
+    257: "BARTIN",
+    258: "BATMAN",
+    259: "BAYBURT",
+    260: "BİLECİK",
+    261: "BİNGÖL",
+    262: "BİTLİS",
+    263: "BOLU",
+    264: "BURDUR",
+    265: "BURSA",
+    266: "ÇANAKKALE",
+    267: "ÇANKIRI",
+    268: "ÇORUM",
+    269: "DENİZLİ",
+    270: "DİYARBAKIR",
+    271: "DÜZCE",
+    272: "EDİRNE",
+    273: "ELAZIĞ",
+    274: "ERZİNCAN",
+    275: "ERZURUM",
+    276: "ESKİŞEHİR",
+    277: "GAZİANTEP",
+    278: "GİRESUN",
+    279: "GÜMÜŞHANE",
+    280: "HAKKARİ",
+    281: "HATAY",
+    282: "IĞDIR",
+    283: "ISPARTA",
+    284: "İSTANBUL",
+    285: "İZMİR",
+    286: "KAHRAMANMARAŞ",
+    287: "KARABÜK",
+    288: "KARAMAN",
+    289: "KARS",
+    290: "KASTAMONU",
+    291: "KAYSERİ",
+    292: "KIRIKKALE",
+    293: "KIRKLARELİ",
+    294: "KIRŞEHİR",
+    295: "KİLİS",
+    296: "KOCAELİ",
+    297: "KONYA",
+    298: "KÜTAHYA",
+    299: "MALATYA",
+    300: "MANİSA",
+    301: "MARDİN",
+    302: "MERSİN",
+    303: "MUĞLA",
+    304: "MUŞ",
+    305: "NEVŞEHİR",
+    306: "NİĞDE",
+    307: "ORDU",
+    308: "OSMANİYE",
+    309: "RİZE",
+    310: "SAKARYA",
+    311: "SAMSUN",
+    312: "SİİRT",
+    313: "SİNOP",
+    314: "SİVAS",
+    315: "ŞANLIURFA",
+    316: "ŞIRNAK",
+    317: "TEKİRDAĞ",
+    318: "TOKAT",
+    319: "TRABZON",
+    320: "TUNCELİ",
+    321: "UŞAK",
+    322: "VAN",
+    323: "YALOVA",
+    324: "YOZGAT",
+    325: "ZONGULDAK"
 }
 
-# Proposal Types - API expects numeric IDs
-PROPOSAL_TYPES = {
-    1: "Götürü-Anahtar Teslimi Götürü",
-    2: "Birim Fiyat", 
-    3: "Karma"
+
+class ProvinceTable:
+    """Provinces keyed every way the server needs: plate number, EKAP API ID and name
+
+    Users give plate numbers or names, the API takes API IDs and returns
+    names; every direction is a single dict lookup. Names match case- and
+    diacritic-insensitively ("istanbul", "ISTANBUL"); typo-tolerant
+    matching lives in ihale_query.
+    """
+
+    def __init__(self, plate_to_api_id: Dict[int, int], names: Dict[int, str]):
+        self.plate_to_api_id: Dict[int, int] = dict(plate_to_api_id)
+        self.api_id_to_plate: Dict[int, int] = {api_id: plate for plate, api_id in plate_to_api_id.items()}
+        self.api_id_to_name: Dict[int, str] = dict(names)
+        self.plate_to_name: Dict[int, str] = {
+            plate: names[api_id] for plate, api_id in plate_to_api_id.items() if api_id in names
+        }
+        self._plate_by_name: Dict[str, int] = {fold(name): plate for plate, name in self.plate_to_name.items()}
+
+    def __len__(self) -> int:
+        return len(self.plate_to_api_id)
+
+    def api_id(self, plate: Optional[int]) -> Optional[int]:
+        return self.plate_to_api_id.get(plate)
+
+    def plate(self, api_id: Optional[int]) -> Optional[int]:
+        return self.api_id_to_plate.get(api_id)
+
+    def name(self, plate: Optional[int]) -> Optional[str]:
+        return self.plate_to_name.get(plate)
+
+    def name_for_api_id(self, api_id: Optional[int]) -> Optional[str]:
+        return self.api_id_to_name.get(api_id)
+
+    def plate_for_name(self, name: Optional[str]) -> Optional[int]:
+        """Plate number of an exactly named province (any case or diacritics), or None"""
+        return self._plate_by_name.get(fold(name)) if name else None
+
+    def resolve(self, value: Any) -> Optional[int]:
+        """Plate number for a plate (6, "06") or an exact province name, or None"""
+        if isinstance(value, int):
+            return value if value in self.plate_to_api_id else None
+        value = str(value).strip()
+        if value.isdigit():
+            return self.resolve(int(value))
+        return self.plate_for_name(value)
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        return [
+            {"plate": plate, "api_id": api_id, "name": self.api_id_to_name.get(api_id)}
+            for plate, api_id in sorted(self.plate_to_api_id.items())
+        ]
+
+
+class Registry:
+    """Every static EKAP vocabulary, built once at import
+
+    Formatters, search parameter handling and the lookup tools all read from
+    the one REGISTRY instance instead of keeping their own maps.
+    """
+
+    def __init__(self):
+        self.provinces = ProvinceTable(PLATE_TO_API_ID, PROVINCE_NAMES)
+        self.tender_types = TENDER_TYPE_CODES
+        self.tender_statuses = TENDER_STATUS_CODES
+        self.tender_methods = TENDER_METHOD_CODES
+        self.proposal_types = CodeTable("proposal_types", PROPOSAL_TYPES)
+        self.announcement_types = CodeTable("announcement_types", ANNOUNCEMENT_TYPES)
+        self.announcement_record_types = CodeTable("announcement_record_types", ANNOUNCEMENT_RECORD_TYPES)
+        self.okas_item_types = CodeTable("okas_item_types", OKAS_ITEM_TYPES)
+        self.tables: Dict[str, CodeTable] = {
+            table.name: table for table in (
+                self.tender_types, self.tender_statuses, self.tender_methods, self.proposal_types,
+                self.announcement_types, self.announcement_record_types, self.okas_item_types
+            )
+        }
+
+    def table(self, name: str) -> CodeTable:
+        """Code table by name; raises ValueError for unknown names"""
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise ValueError(
+                f"Unknown code table {name!r}; expected one of: provinces, {', '.join(self.tables)}"
+            ) from None
+
+
+REGISTRY = Registry()
+
+
+def _build_tender_types():
+    """Build the static tender type list"""
+    return [
+        TenderType(id=code, code=str(code), description=description)
+        for code, description in TENDER_TYPE_CODES.items()
+    ]
+
+def _build_tender_statuses():
+    """Build the static tender status list"""
+    return [
+        TenderStatus(id=code, code=str(code), description=description)
+        for code, description in TENDER_STATUS_CODES.items()
+    ]
+
+def _build_tender_methods():
+    """Build the static tender method list"""
+    return [
+        TenderMethod(code=code, description=description)
+        for code, description in TENDER_METHOD_CODES.items()
+    ]
+
+def _build_provinces():
+    """Build the API ID to province mapping"""
+    return {api_id: Province(name=name) for api_id, name in PROVINCE_NAMES.items()}
+
+
+# Static Pydantic lists are only built when first accessed, so importing this
+# module for the plain lookup tables stays cheap
+_LAZY_CONSTANTS = {
+    "TENDER_TYPES": _build_tender_types,
+    "TENDER_STATUSES": _build_tender_statuses,
+    "TENDER_METHODS": _build_tender_methods,
+    "PROVINCES": _build_provinces,
 }
 
-# Announcement Types - API expects numeric IDs
-ANNOUNCEMENT_TYPES = {
-    1: "Ön İlan",
-    2: "İhale İlanı",
-    3: "Sonuç İlanı",
-    4: "İptal İlanı",
-    5: "Ön Yeterlik İlanı",
-    6: "Düzeltme İlanı"
-}
\ No newline at end of file
+
+def __getattr__(name: str) -> Any:
+    builder = _LAZY_CONSTANTS.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = builder()
+    globals()[name] = value
+    return value
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Speculative prefetch of tender details and announcements
+After a search, the top results are warmed into the EKAPClient cache in the
+background so follow-up get_tender_details / get_tender_announcements calls
+are served from cache
+"""
+
+import asyncio
+import contextvars
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Iterable, List, Optional
+
+from ihale_client import EKAPClient
+from ihale_scheduler import Priority, request_context
+
+# Default number of top search results to prefetch; 0 disables prefetching
+DEFAULT_PREFETCH_TOP_K = int(os.environ.get("IHALE_PREFETCH_TOP_K", "0"))
+
+
+class Prefetcher:
+    """Bounded, cancellable background cache warmer
+
+    Prefetch work only runs while no foreground tool call is in flight, one
+    tender at a time. When the queue is full the oldest (stalest) tender IDs
+    are dropped in favour of the latest search.
+    """
+
+    def __init__(
+        self,
+        client: EKAPClient,
+        top_k: int = DEFAULT_PREFETCH_TOP_K,
+        max_queue: int = 50,
+        idle_delay: float = 0.05
+    ):
+        self.client = client
+        self.top_k = top_k
+        self.max_queue = max_queue
+        self.idle_delay = idle_delay
+        self._queue: "deque[int]" = deque()
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._foreground_calls = 0
+        self._worker: Optional[asyncio.Task] = None
+        self._current: Optional[asyncio.Task] = None
+        self.stats = {"scheduled": 0, "completed": 0, "dropped": 0, "cancelled": 0, "failed": 0}
+
+    def schedule(self, tender_ids: Iterable[int], top_k: Optional[int] = None) -> List[int]:
+        """Queue the first `top_k` tender IDs for prefetching; returns the IDs queued"""
+        top_k = self.top_k if top_k is None else top_k
+        if top_k <= 0 or self.client.cache is None:
+            return []
+
+        queued = []
+        for tender_id in list(tender_ids)[:top_k]:
+            if tender_id is None or tender_id in self._queue:
+                continue
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.stats["dropped"] += 1
+            self._queue.append(tender_id)
+            queued.append(tender_id)
+
+        self.stats["scheduled"] += len(queued)
+        if queued:
+            self._ensure_worker()
+            self._wake.set()
+        return queued
+
+    @asynccontextmanager
+    async def foreground(self):
+        """Mark a foreground call as in flight; prefetching pauses until none are"""
+        self._foreground_calls += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._foreground_calls -= 1
+            if self._foreground_calls == 0:
+                self._idle.set()
+
+    def cancel(self) -> int:
+        """Drop queued work and cancel the prefetch in progress; returns IDs dropped"""
+        dropped = len(self._queue)
+        self._queue.clear()
+        if self._current is not None and not self._current.done():
+            self._current.cancel()
+            dropped += 1
+        self.stats["cancelled"] += dropped
+        return dropped
+
+    async def aclose(self) -> None:
+        """Cancel all prefetch work and stop the worker"""
+        self.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "top_k": self.top_k,
+            "queued": list(self._queue),
+            "active": self._current is not None and not self._current.done(),
+            "stats": dict(self.stats)
+        }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            # The worker outlives the tool call that schedules it: start it in an
+            # empty context so it doesn't inherit that call's deadline, call
+            # stats or request class
+            self._worker = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            # Wait for a quiet moment so prefetch never competes with foreground calls
+            await self._idle.wait()
+            await asyncio.sleep(self.idle_delay)
+            if not self._idle.is_set() or not self._queue:
+                continue
+
+            tender_id = self._queue.popleft()
+            with request_context(Priority.PREFETCH, session="prefetch"):
+                self._current = asyncio.ensure_future(self._warm(tender_id))
+            try:
+                await self._current
+                self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                # Only the prefetch was cancelled; keep going unless the worker itself is
+                if asyncio.current_task().cancelling():
+                    raise
+            except Exception:
+                self.stats["failed"] += 1
+            finally:
+                self._current = None
+
+    async def _warm(self, tender_id: int) -> None:
+        """Fetch (and Markdown-convert) details and announcements into the cache"""
+        await self.client.get_tender_details(tender_id)
+        # Give foreground calls a chance to run between the two conversions
+        await asyncio.sleep(0)
+        if self._idle.is_set():
+            await self.client.get_tender_announcements(tender_id)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Profiling hooks, slow-call records and logging for the server
+Each tool call can collect a per-call breakdown (time spent in EKAP
+requests and in HTML conversion, carried in a context variable like the
+deadline in ihale_deadline) and, when profiling is on, run under cProfile.
+Calls slower than a threshold are logged as one structured JSON record and
+have their profile written to disk. Logs go to stderr only, so they can
+never corrupt the stdio MCP framing on stdout
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+from ihale_store import DATA_DIR
+
+# Run tool calls under cProfile (IHALE_PROFILE=1)
+PROFILE_ENABLED = os.environ.get("IHALE_PROFILE", "0").lower() in ("1", "true", "yes")
+
+# Calls taking at least this long are logged, and their profile kept (IHALE_SLOW_CALL_SECONDS; 0 disables)
+DEFAULT_SLOW_CALL_SECONDS = float(os.environ.get("IHALE_SLOW_CALL_SECONDS", "10"))
+
+# Where profiles of slow calls are written (IHALE_PROFILE_DIR)
+PROFILE_DIR = Path(os.environ.get("IHALE_PROFILE_DIR", DATA_DIR / "profiles")).expanduser()
+
+# Log level of the "ihale" loggers (IHALE_LOG_LEVEL)
+LOG_LEVEL = os.environ.get("IHALE_LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("ihale.profile")
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    """Send the "ihale" loggers to stderr as JSON lines (idempotent)"""
+    root = logging.getLogger("ihale")
+    if not any(getattr(handler, "_ihale", False) for handler in root.handlers):
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        handler._ihale = True
+        root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+
+class CallStats:
+    """Time and count per kind of work done for one tool call
+
+    Times are summed over operations, so EKAP time can exceed the call's
+    wall time when requests overlap.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add(self, kind: str, seconds: float) -> None:
+        self.seconds[kind] += seconds
+        self.counts[kind] += 1
+
+    def merge(self, other: "CallStats") -> None:
+        for kind, seconds in other.seconds.items():
+            self.seconds[kind] += seconds
+        for kind, count in other.counts.items():
+            self.counts[kind] += count
+
+
+_call_stats: ContextVar[Optional[CallStats]] = ContextVar("ihale_call_stats", default=None)
+
+
+@contextmanager
+def collect_call_stats(stats: Optional[CallStats] = None):
+    """Collect CallStats (a new one, or `stats`) for the enclosed work and the tasks it starts
+
+    Tasks that outlive the call should not inherit it: ihale_cache collects
+    shared fetches separately, and the prefetch worker runs in an empty context.
+    """
+    stats = CallStats() if stats is None else stats
+    token = _call_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _call_stats.reset(token)
+
+
+def add_call_stats(stats: CallStats) -> None:
+    """Add work done elsewhere on this call's behalf (a shared fetch) to its stats, if collecting"""
+    current = _call_stats.get()
+    if current is not None and current is not stats:
+        current.merge(stats)
+
+
+@contextmanager
+def timed(kind: str):
+    """Add the enclosed block's duration to the current call's stats, if collecting"""
+    stats = _call_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(kind, time.perf_counter() - started)
+
+
+def params_hash(arguments: Optional[Dict[str, Any]]) -> str:
+    """Short stable hash of tool arguments, to group slow calls without logging their values"""
+    payload = json.dumps(arguments or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolProfiler:
+    """Per-call timing breakdown, slow-call records and optional cProfile
+
+    cProfile sees every task on the event loop, not just the call being
+    profiled, and only one profiler can run at a time; calls overlapping a
+    profiled one are timed but not profiled.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = PROFILE_ENABLED,
+        slow_call_seconds: float = DEFAULT_SLOW_CALL_SECONDS,
+        profile_dir: Path = PROFILE_DIR,
+        keep: int = 50
+    ):
+        self.enabled = enabled
+        self.slow_call_seconds = slow_call_seconds
+        self.profile_dir = profile_dir
+        self.slow_calls: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._profiling = False
+        self.stats = {"calls": 0, "slow_calls": 0, "profiles_written": 0}
+
+    def start_profile(self):
+        """A running cProfile.Profile for a new call, or None if profiling is off or busy"""
+        if not self.enabled or self._profiling:
+            return None
+        import cProfile
+        profile = cProfile.Profile()
+        self._profiling = True
+        profile.enable()
+        return profile
+
+    def _write_profile(self, profile, tool: str, arguments_hash: str) -> str:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.profile_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{tool}-{arguments_hash}.prof"
+        profile.dump_stats(str(path))
+        self.stats["profiles_written"] += 1
+        return str(path)
+
+    def finish(
+        self,
+        tool: str,
+        arguments: Optional[Dict[str, Any]],
+        seconds: float,
+        call_stats: CallStats,
+        response_bytes: Optional[int],
+        profile=None,
+        error: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Stop the call's profile and record it if it was slow; returns the slow-call record"""
+        if profile is not None:
+            profile.disable()
+            self._profiling = False
+        self.stats["calls"] += 1
+        if not self.slow_call_seconds or seconds < self.slow_call_seconds:
+            return None
+
+        arguments_hash = params_hash(arguments)
+        record = {
+            "tool": tool,
+            "params_hash": arguments_hash,
+            "seconds": round(seconds, 4),
+            "ekap_seconds": round(call_stats.seconds.get("ekap", 0.0), 4),
+            "ekap_requests": call_stats.counts.get("ekap", 0),
+            "conversion_seconds": round(call_stats.seconds.get("conversion", 0.0), 4),
+            "conversions": call_stats.counts.get("conversion", 0),
+            "response_bytes": response_bytes,
+            "error": error,
+            "profile": self._write_profile(profile, tool, arguments_hash) if profile is not None else None,
+            "at": time.time(),
+        }
+        self.stats["slow_calls"] += 1
+        self.slow_calls.append(record)
+        logger.warning("slow tool call", extra={"event": "slow_tool_call", **record})
+        return record
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "profiling": self.enabled,
+            "slow_call_seconds": self.slow_call_seconds,
+            "profile_dir": str(self.profile_dir),
+            **self.stats,
+            "recent_slow_calls": list(self.slow_calls)[-10:]
+        }
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Search parameter handling shared by the MCP tools and the CLI
+Translates search_tenders tool arguments into EKAPClient.search_tenders kwargs
+"""
+
+import inspect
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, Union
+from ihale_client import EKAPClient
+from ihale_models import REGISTRY
+from ihale_text import TrigramIndex, best_match
+
+# Keyword arguments accepted by search_tenders-style search parameter dicts
+SEARCH_PARAM_NAMES = (
+    set(inspect.signature(EKAPClient.search_tenders).parameters)
+    - {"self", "skip", "limit", "include_document_urls"}
+) | {"announcement_date_filter", "tender_date_filter"}
+
+
+def resolve_date_filters(
+    announcement_date_filter: Optional[str],
+    tender_date_filter: Optional[str],
+    announcement_date_start: Optional[str],
+    announcement_date_end: Optional[str],
+    tender_date_start: Optional[str],
+    tender_date_end: Optional[str]
+) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """Expand the 'today' / 'from_today' shortcuts into explicit date ranges"""
+    if announcement_date_filter == "today":
+        today = datetime.now().strftime("%Y-%m-%d")
+        announcement_date_start = today
+        announcement_date_end = today
+    
+    if tender_date_filter == "from_today":
+        today = datetime.now().strftime("%Y-%m-%d")
+        tender_date_start = today
+        tender_date_end = None
+    
+    return announcement_date_start, announcement_date_end, tender_date_start, tender_date_end
+
+
+_province_index: Optional[TrigramIndex] = None
+
+
+def _get_province_index() -> TrigramIndex:
+    """Province name -> plate number index, built on first use"""
+    global _province_index
+    if _province_index is None:
+        index = TrigramIndex()
+        for plate, name in REGISTRY.provinces.plate_to_name.items():
+            index.add(name, plate)
+        _province_index = index
+    return _province_index
+
+
+def resolve_province(value: Union[int, str]) -> Optional[int]:
+    """Plate number for a plate (6, "06") or a province name ("istanbul", "ISTANBUL", "Ankra")"""
+    plate = REGISTRY.provinces.resolve(value)
+    if plate is not None or isinstance(value, int) or value.strip().isdigit():
+        return plate
+    return best_match(_get_province_index(), value.strip())
+
+
+def plates_to_api_ids(provinces: Optional[List[Union[int, str]]]) -> Optional[List[int]]:
+    """Convert province plate numbers or names to EKAP API province IDs
+    
+    Raises ValueError naming the values that match no province: dropping
+    them would widen the search, to all of Turkey if none matched.
+    """
+    if not provinces:
+        return None
+    api_province_ids = []
+    unresolved = []
+    for province in provinces:
+        api_id = REGISTRY.provinces.api_id(resolve_province(province))
+        if api_id is None:
+            unresolved.append(province)
+        elif api_id not in api_province_ids:
+            api_province_ids.append(api_id)
+    if unresolved:
+        raise ValueError(
+            f"Unknown provinces: {', '.join(map(str, unresolved))} (use plate numbers 1-81 or province names)"
+        )
+    return api_province_ids
+
+
+# search_tenders list filters whose values come from a registry code table
+CODE_FILTERS = {
+    "tender_types": "tender_types",
+    "tender_statuses": "tender_statuses",
+    "proposal_types": "proposal_types",
+    "announcement_types": "announcement_types",
+}
+
+
+def validate_search_codes(search_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Check the coded filters of search_tenders arguments against the registry
+    
+    Returns, per filter, each value resolved to its code and description
+    (provinces to plate, API ID and name), plus the values that match
+    nothing. Unknown argument names are reported, not raised.
+    """
+    params = dict(search_params or {})
+    resolved: Dict[str, List[Dict[str, Any]]] = {}
+    invalid: Dict[str, List[Any]] = {}
+    
+    for value in params.get("provinces") or []:
+        plate = resolve_province(value)
+        if plate is None:
+            invalid.setdefault("provinces", []).append(value)
+        else:
+            resolved.setdefault("provinces", []).append({
+                "value": value,
+                "plate": plate,
+                "api_id": REGISTRY.provinces.api_id(plate),
+                "name": REGISTRY.provinces.name(plate)
+            })
+    
+    for field, table_name in CODE_FILTERS.items():
+        table = REGISTRY.table(table_name)
+        for value in params.get(field) or []:
+            code = table.resolve(value)
+            if code is None:
+                invalid.setdefault(field, []).append(value)
+            else:
+                resolved.setdefault(field, []).append({
+                    "value": value,
+                    "code": code,
+                    "description": table.description(code)
+                })
+    
+    return {
+        "valid": not invalid,
+        "resolved": resolved,
+        "invalid": invalid,
+        "unknown_parameters": sorted(set(params) - SEARCH_PARAM_NAMES)
+    }
+
+
+def prepare_search_params(search_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Translate a dict of search_tenders arguments into EKAPClient.search_tenders kwargs
+    
+    skip and limit are dropped: callers page through the results themselves.
+    Raises ValueError for other argument names search_tenders does not accept.
+    """
+    params = dict(search_params or {})
+    params.pop("skip", None)
+    params.pop("limit", None)
+    unknown = sorted(set(params) - SEARCH_PARAM_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown search parameters: {', '.join(unknown)}")
+    
+    (
+        params["announcement_date_start"], params["announcement_date_end"],
+        params["tender_date_start"], params["tender_date_end"]
+    ) = resolve_date_filters(
+        params.pop("announcement_date_filter", None),
+        params.pop("tender_date_filter", None),
+        params.get("announcement_date_start"),
+        params.get("announcement_date_end"),
+        params.get("tender_date_start"),
+        params.get("tender_date_end")
+    )
+    params["provinces"] = plates_to_api_ids(params.get("provinces"))
+    return params
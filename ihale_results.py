@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Structured extraction of Sonuç İlanı (result announcement) fields
+Result announcements follow the KİK templates: numbered "label : value" rows
+for the contractor, contract value and date, approximate cost and bid counts.
+Parsed records are cached per announcement in the TenderStore and indexed by
+winner, authority, OKAS code and contract value for local queries
+"""
+
+import asyncio
+import hashlib
+import html
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+from ihale_models import REGISTRY, ContractAward, ResultAnnouncement
+from ihale_store import TenderStore
+from ihale_text import fold
+
+# ilanTip code of Sonuç İlanı announcements
+RESULT_ANNOUNCEMENT_TYPE = REGISTRY.announcement_record_types.code_for("Sonuç İlanı")
+
+# Folded label patterns for each parsed field
+FIELD_LABELS = [
+    ("ikn", r"ihale kayit (numarasi|no)|ikn"),
+    ("lot", r"kisim( no| numarasi| adi)?"),
+    ("estimated_cost", r"yaklasik maliyet(i)?"),
+    ("valid_bids", r"gecerli teklif sayisi"),
+    ("total_bids", r"(toplam )?teklif (veren|sunan)( istekli)? sayisi|toplam teklif sayisi|teklif sayisi"),
+    ("contract_date", r"sozlesme(nin)? (imza )?tarihi"),
+    ("contract_value", r"sozlesme(nin)? (bedeli|tutari)|sozlesme bedeli \(.*\)"),
+    ("winner_nationality", r"yuklenici(nin)? uyrugu"),
+    ("winner", r"yuklenici(nin)?( adi| unvani| adi ?/ ?unvani| adi soyadi)?|"
+               r"sozlesme imzalanan (istekli|yuklenici)|ihale uzerinde birakilan istekli"),
+]
+_FIELD_PATTERNS = [(field, re.compile(pattern)) for field, pattern in FIELD_LABELS]
+
+# Leading item numbering such as "10-", "6.", "b)", "10 - a)"
+_NUMBERING_RE = re.compile(r"^(\d+\s*[-.)]\s*)?([a-zçğıöşü]\s*\)\s*)?")
+
+_AMOUNT_RE = re.compile(r"(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d+))?")
+_CURRENCY_RE = re.compile(r"\b(TRY|TL|USD|EUR|GBP|JPY|CHF)\b|₺|\$|€", re.IGNORECASE)
+_CURRENCY_SYMBOLS = {"₺": "TRY", "TL": "TRY", "$": "USD", "€": "EUR"}
+
+
+def _content_rows(content: str) -> List[Tuple[str, str]]:
+    """Split announcement HTML or Markdown into (label, value) rows"""
+    if "<" in content and re.search(r"</(td|p|div|tr|table)>", content, re.IGNORECASE):
+        content = re.sub(r"<br\s*/?>|</(p|div|tr|li|h\d)>", "\n", content, flags=re.IGNORECASE)
+        content = re.sub(r"</t[dh]>", " | ", content, flags=re.IGNORECASE)
+        content = html.unescape(re.sub(r"<[^>]+>", "", content))
+
+    rows = []
+    for line in content.splitlines():
+        line = line.strip().strip("#*").strip()
+        if not line or set(line) <= set("|-: "):
+            continue
+        if "|" in line:
+            cells = [cell.strip(" *:") for cell in line.strip("|").split("|")]
+            cells = [cell for cell in cells if cell]
+            if len(cells) >= 2:
+                rows.append((cells[0], cells[-1]))
+                continue
+            line = cells[0] if cells else ""
+        if ":" in line:
+            label, value = line.split(":", 1)
+            rows.append((label.strip(" *"), value.strip(" *")))
+    return rows
+
+
+def _match_field(label: str) -> Optional[str]:
+    key = _NUMBERING_RE.sub("", fold(label)).strip(" .:-")
+    for field, pattern in _FIELD_PATTERNS:
+        if pattern.fullmatch(key):
+            return field
+    return None
+
+
+def parse_amount(value: str) -> Tuple[Optional[float], Optional[str]]:
+    """Parse a Turkish formatted amount such as '1.234.567,89 TRY'"""
+    match = _AMOUNT_RE.search(value)
+    if not match:
+        return None, None
+    amount = float(match.group(1).replace(".", "") + ("." + match.group(2) if match.group(2) else ""))
+    currency_match = _CURRENCY_RE.search(value)
+    currency = None
+    if currency_match:
+        symbol = currency_match.group(1) or currency_match.group(0)
+        currency = _CURRENCY_SYMBOLS.get(symbol.upper() if symbol.isalpha() else symbol, symbol.upper())
+    return amount, currency
+
+
+def _parse_count(value: str) -> Optional[int]:
+    match = re.search(r"\d+", value)
+    return int(match.group(0)) if match else None
+
+
+def parse_result_announcement(
+    announcement_id: int,
+    tender_id: int,
+    content: str,
+    date: Optional[str] = None,
+    bidder_name: Optional[str] = None
+) -> ResultAnnouncement:
+    """Parse a Sonuç İlanı (HTML or its Markdown conversion) into a typed record
+
+    Partial tenders list one block of award fields per lot; a field that
+    repeats starts a new award.
+    """
+    ikn = None
+    awards: List[Dict[str, Any]] = []
+    current: Dict[str, Any] = {}
+
+    for label, value in _content_rows(content):
+        field = _match_field(label)
+        if field is None or not value:
+            continue
+        if field == "ikn":
+            ikn = ikn or value
+            continue
+
+        if field in current or (field == "lot" and current):
+            awards.append(current)
+            current = {}
+
+        if field in ("contract_value", "estimated_cost"):
+            amount, currency = parse_amount(value)
+            current[field] = amount
+            if field == "contract_value":
+                current["currency"] = currency or "TRY"
+        elif field in ("total_bids", "valid_bids"):
+            current[field] = _parse_count(value)
+        elif field == "contract_date":
+            match = re.search(r"\d{2}\.\d{2}\.\d{4}", value)
+            current[field] = match.group(0) if match else value
+        else:
+            current[field] = value
+    if current:
+        awards.append(current)
+
+    awards = [award for award in awards if award.get("winner") or award.get("contract_value") is not None]
+    if len(awards) == 1 and not awards[0].get("winner") and bidder_name:
+        awards[0]["winner"] = bidder_name
+    if not awards and bidder_name:
+        awards = [{"winner": bidder_name}]
+
+    return ResultAnnouncement(
+        announcement_id=announcement_id,
+        tender_id=tender_id,
+        ikn=ikn,
+        date=date,
+        awards=[ContractAward(**award) for award in awards],
+        content_sha256=hashlib.sha256(content.encode("utf-8")).hexdigest()
+    )
+
+
+def _tender_context(details: Optional[Dict[str, Any]], tender: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Authority, province, type and OKAS codes from stored details or the search row"""
+    context = {"authority": None, "province": None, "tender_type": None, "okas_codes": []}
+    if tender:
+        context["authority"] = tender.get("authority")
+        context["province"] = tender.get("province")
+        context["tender_type"] = (tender.get("type") or {}).get("description")
+    if details and not details.get("error"):
+        authority = details.get("authority") or {}
+        context["authority"] = authority.get("name") or context["authority"]
+        context["province"] = authority.get("province") or context["province"]
+        context["tender_type"] = (details.get("basic_info") or {}).get("type_description") or context["tender_type"]
+        context["okas_codes"] = [okas["code"] for okas in details.get("okas_codes", []) if okas.get("code")]
+    return context
+
+
+def index_tender_results(
+    store: TenderStore,
+    tender_id: int,
+    announcements: List[Dict[str, Any]],
+    details: Optional[Dict[str, Any]] = None,
+    tender: Optional[Dict[str, Any]] = None
+) -> Dict[str, int]:
+    """Parse a tender's result announcements into the store's award index
+
+    Announcements whose content is unchanged since they were last parsed are
+    skipped. Returns counts of parsed and skipped announcements.
+    """
+    stats = {"parsed": 0, "unchanged": 0, "awards": 0}
+    context = _tender_context(details, tender)
+
+    for announcement in announcements:
+        if (announcement.get("type") or {}).get("code") != RESULT_ANNOUNCEMENT_TYPE:
+            continue
+        content = announcement.get("markdown_content") or ""
+        announcement_id = announcement.get("id")
+        if not content or announcement_id is None:
+            continue
+        if store.get_result_hash(announcement_id) == hashlib.sha256(content.encode("utf-8")).hexdigest():
+            stats["unchanged"] += 1
+            continue
+
+        result = parse_result_announcement(
+            announcement_id,
+            tender_id,
+            content,
+            date=announcement.get("date"),
+            bidder_name=announcement.get("bidder_name")
+        )
+        rows = [
+            {
+                **award.model_dump(),
+                "announcement_id": announcement_id,
+                "award_index": index,
+                "tender_id": tender_id,
+                "winner_key": fold(award.winner) if award.winner else None,
+                "authority": context["authority"],
+                "authority_key": fold(context["authority"]) if context["authority"] else None,
+                "province": context["province"],
+                "province_key": fold(context["province"]) if context["province"] else None,
+                "tender_type": context["tender_type"],
+                "tender_type_key": fold(context["tender_type"]) if context["tender_type"] else None
+            }
+            for index, award in enumerate(result.awards)
+        ]
+        store.upsert_result(result.model_dump(), rows, context["okas_codes"])
+        stats["parsed"] += 1
+        stats["awards"] += len(rows)
+
+    return stats
+
+
+async def index_results_for_tenders(
+    client,
+    store: TenderStore,
+    tender_ids: List[int],
+    concurrency: int = 4,
+    fetch_missing: bool = True
+) -> Dict[str, Any]:
+    """Index result announcements for many tenders
+
+    Announcements and details already in the store are used as they are;
+    missing ones are fetched from EKAP (and stored) when fetch_missing is set.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    totals = {"tenders": 0, "parsed": 0, "unchanged": 0, "awards": 0, "missing": 0}
+    errors: Dict[int, str] = {}
+
+    async def load(tender_id: int) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        announcements = store.get_announcements(tender_id)
+        details = store.get_details(tender_id)
+        if not fetch_missing:
+            return (announcements, details) if announcements else None
+        async with semaphore:
+            if announcements is None:
+                announcements = await client.get_tender_announcements(tender_id)
+                if announcements.get("error"):
+                    errors[tender_id] = announcements.get("message") or announcements["error"]
+                    return None
+                store.upsert_announcements(tender_id, announcements)
+            if details is None:
+                details = await client.get_tender_details(tender_id, convert_announcements=False)
+                if details.get("error"):
+                    details = None
+                else:
+                    store.upsert_details(tender_id, details)
+        return announcements, details
+
+    loaded = await asyncio.gather(*(load(tender_id) for tender_id in tender_ids))
+    for tender_id, entry in zip(tender_ids, loaded):
+        if entry is None:
+            totals["missing"] += 1
+            continue
+        announcements, details = entry
+        stats = index_tender_results(
+            store, tender_id, announcements.get("announcements", []), details, store.get_tender(tender_id)
+        )
+        totals["tenders"] += 1
+        for key in ("parsed", "unchanged", "awards"):
+            totals[key] += stats[key]
+
+    return {**totals, "errors": errors}
+
+
+def query_contract_awards(
+    store: TenderStore,
+    winner: Optional[str] = None,
+    authority: Optional[str] = None,
+    okas_prefix: Optional[str] = None,
+    province: Optional[str] = None,
+    tender_type: Optional[str] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    group_by: Optional[str] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Filter (and optionally group) the local contract award index
+
+    Name filters match case- and diacritic-insensitively on substrings;
+    okas_prefix matches OKAS codes starting with the given digits.
+    """
+    where: List[str] = []
+    params: List[Any] = []
+    if winner:
+        where.append("winner_key LIKE ?")
+        params.append(f"%{fold(winner)}%")
+    if authority:
+        where.append("authority_key LIKE ?")
+        params.append(f"%{fold(authority)}%")
+    if province:
+        where.append("province_key = ?")
+        params.append(fold(province))
+    if tender_type:
+        where.append("tender_type_key LIKE ?")
+        params.append(f"{fold(tender_type)}%")
+    if okas_prefix:
+        where.append(
+            "announcement_id IN (SELECT announcement_id FROM contract_award_okas WHERE okas_code LIKE ?)"
+        )
+        params.append(f"{okas_prefix}%")
+    if min_value is not None:
+        where.append("contract_value >= ?")
+        params.append(min_value)
+    if max_value is not None:
+        where.append("contract_value <= ?")
+        params.append(max_value)
+
+    return store.query_awards(where, params, group_by=group_by, limit=limit)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Priority scheduler for outbound EKAP requests
+Every EKAPClient request takes a slot from a global concurrency budget. Waiting
+requests are served by priority class, then fairly across MCP sessions
+(least recently served session first), then in arrival order
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Any, List, Optional
+
+
+class Priority(IntEnum):
+    """Request priority classes; lower values are served first"""
+    INTERACTIVE = 0
+    ENRICHMENT = 1
+    PREFETCH = 2
+    SYNC = 3
+
+
+class RequestClass:
+    """Priority and session of the work issuing requests in the current context
+
+    Shared by reference with tasks spawned from that context, so a fetch that a
+    higher-priority caller joins can be boosted in place.
+    """
+
+    def __init__(self, priority: Priority = Priority.INTERACTIVE, session: str = "default"):
+        self.priority = priority
+        self.session = session
+
+    def boost(self, priority: Priority) -> None:
+        """Raise (never lower) this request class's priority"""
+        if priority < self.priority:
+            self.priority = priority
+
+
+_current_request: ContextVar[RequestClass] = ContextVar("ihale_request_class", default=RequestClass())
+
+
+def current_request() -> RequestClass:
+    return _current_request.get()
+
+
+@contextmanager
+def request_context(priority: Optional[Priority] = None, session: Optional[str] = None):
+    """Run the enclosed code with the given priority and/or session
+
+    Unspecified fields are inherited from the enclosing context.
+    """
+    parent = _current_request.get()
+    token = _current_request.set(RequestClass(
+        parent.priority if priority is None else priority,
+        parent.session if session is None else session
+    ))
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("request", "seq", "future", "enqueued_at")
+
+    def __init__(self, request: RequestClass, seq: int, future: asyncio.Future):
+        self.request = request
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class RequestScheduler:
+    """Global concurrency budget with priority classes and per-session fairness"""
+
+    # Number of recent wait times kept per priority for percentiles
+    WAIT_SAMPLES = 500
+
+    # Sessions whose last-served turn is remembered; the least recently served
+    # are forgotten first, which doesn't change their place (they'd go first anyway)
+    SESSION_HISTORY = 1024
+
+    def __init__(self, max_concurrency: int = 8):
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._session_served: "OrderedDict[str, int]" = OrderedDict()
+        self._served = itertools.count(1)
+        self._waits = {priority: deque(maxlen=self.WAIT_SAMPLES) for priority in Priority}
+        self._dispatched = {priority: 0 for priority in Priority}
+        self._max_wait = {priority: 0.0 for priority in Priority}
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one request slot for the duration of the block"""
+        request = current_request()
+        started = time.perf_counter()
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            self._record(request, 0.0)
+        else:
+            waiter = _Waiter(request, next(self._seq), asyncio.get_running_loop().create_future())
+            self._waiters.append(waiter)
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.future.done() and not waiter.future.cancelled():
+                    # The slot was granted just as we were cancelled; hand it on
+                    self._release()
+                raise
+            self._record(request, time.perf_counter() - started)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _record(self, request: RequestClass, waited: float) -> None:
+        priority = request.priority
+        self._dispatched[priority] += 1
+        self._waits[priority].append(waited)
+        self._max_wait[priority] = max(self._max_wait[priority], waited)
+        self._session_served[request.session] = next(self._served)
+        self._session_served.move_to_end(request.session)
+        if len(self._session_served) > self.SESSION_HISTORY:
+            self._session_served.popitem(last=False)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        while self._waiters and self._in_flight < self.max_concurrency:
+            waiter = min(
+                self._waiters,
+                key=lambda w: (w.request.priority, self._session_served.get(w.request.session, 0), w.seq)
+            )
+            self._waiters.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight count and wait-time statistics per priority class"""
+        queue_depth = {priority.name.lower(): 0 for priority in Priority}
+        for waiter in self._waiters:
+            queue_depth[Priority(waiter.request.priority).name.lower()] += 1
+
+        wait_times = {}
+        for priority in Priority:
+            samples = sorted(self._waits[priority])
+            wait_times[priority.name.lower()] = {
+                "dispatched": self._dispatched[priority],
+                "p50_ms": round(samples[len(samples) // 2] * 1000, 2) if samples else None,
+                "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 2) if samples else None,
+                "max_ms": round(self._max_wait[priority] * 1000, 2)
+            }
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": queue_depth,
+            "queued_sessions": len({waiter.request.session for waiter in self._waiters}),
+            "wait_times": wait_times
+        }
+
+
+def create_scheduler() -> RequestScheduler:
+    """Build the scheduler with the budget from IHALE_MAX_CONCURRENT_REQUESTS"""
+    return RequestScheduler(int(os.environ.get("IHALE_MAX_CONCURRENT_REQUESTS", "8")))
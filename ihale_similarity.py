@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Local similarity index over tender names and announcement text
+Tenders are embedded either with a small sentence-transformers model (set
+IHALE_EMBEDDING_MODEL) or, with no download needed, hashed word and character
+n-gram TF-IDF vectors. Vectors live in a memory-mapped file and are searched
+through an inverted-file (IVF) index of k-means clusters; new tenders are
+appended incrementally
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ihale_text import fold
+from ihale_store import DATA_DIR, TenderStore
+
+# Dimension of hashed n-gram vectors (IHALE_SIMILARITY_DIM)
+DEFAULT_HASH_DIM = int(os.environ.get("IHALE_SIMILARITY_DIM", "1024"))
+
+# Below this many vectors, search scans everything exactly
+IVF_MIN_VECTORS = 2000
+
+# Clusters probed per query
+DEFAULT_NPROBE = 8
+
+# Characters of announcement preview embedded alongside the tender name
+ANNOUNCEMENT_TEXT_CHARS = 300
+
+_WORD_RE = re.compile(r"\w+")
+
+# Characters replaced when a model name becomes a directory name
+_MODEL_DIR_RE = re.compile(r"[^\w.-]+")
+
+
+class HashingEmbedder:
+    """TF-IDF over hashed word unigrams and character 3-grams
+
+    Hashing keeps the vector space fixed, so tenders can be added without
+    refitting a vocabulary; IDF weights are refreshed when the index is
+    re-clustered.
+    """
+
+    name = "hashing"
+    model_name = None
+
+    def __init__(self, dim: int = DEFAULT_HASH_DIM, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    def _features(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        for word in _WORD_RE.findall(fold(text)):
+            if len(word) < 2:
+                continue
+            bucket = zlib.crc32(word.encode("utf-8")) % self.dim
+            counts[bucket] = counts.get(bucket, 0.0) + 1.0
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                bucket = zlib.crc32(padded[i:i + 3].encode("utf-8")) % self.dim
+                counts[bucket] = counts.get(bucket, 0.0) + 0.5
+        return counts
+
+    def term_frequencies(self, texts: List[str]) -> np.ndarray:
+        """Sublinear term frequencies, before IDF weighting"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, count in self._features(text).items():
+                matrix[row, bucket] = 1.0 + math.log(count) if count >= 1 else count
+        return matrix
+
+    def fit_idf(self, texts: List[str]) -> None:
+        document_frequency = (self.term_frequencies(texts) > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return _normalize(self.term_frequencies(texts) * self.idf)
+
+
+class SentenceEmbedder:
+    """Embeddings from a sentence-transformers model, run on CPU"""
+
+    name = "sentence"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def create_embedder():
+    """Sentence model from IHALE_EMBEDDING_MODEL if set and installed, else hashed n-grams"""
+    model_name = os.environ.get("IHALE_EMBEDDING_MODEL")
+    if model_name:
+        try:
+            return SentenceEmbedder(model_name)
+        except ImportError:
+            pass
+    return HashingEmbedder()
+
+
+def tender_text(tender: Dict[str, Any], announcements: Optional[Dict[str, Any]] = None) -> str:
+    """Text embedded for a tender: its name, authority and announcement preview"""
+    parts = [tender.get("name") or "", tender.get("authority") or ""]
+    for announcement in (announcements or {}).get("announcements", [])[:1]:
+        markdown = announcement.get("markdown_content") or announcement.get("content_preview") or ""
+        parts.append(markdown[:ANNOUNCEMENT_TEXT_CHARS])
+    return "\n".join(part for part in parts if part)
+
+
+def _kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns unit centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(clusters):
+            members = vectors[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+            else:
+                centroids[cluster] = vectors[rng.integers(len(vectors))]
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class SimilarityIndex:
+    """Memory-mapped tender vectors with an IVF approximate nearest-neighbour index"""
+
+    def __init__(self, root: Optional[str] = None, embedder=None):
+        self.embedder = embedder or create_embedder()
+        base = Path(root).expanduser() if root else DATA_DIR / "similarity"
+        # One directory per model: vectors from different models aren't comparable
+        self.root = base / self.embedder.name
+        if self.embedder.model_name:
+            self.root = base / f"{self.embedder.name}-{_MODEL_DIR_RE.sub('_', self.embedder.model_name)}"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.meta_path = self.root / "meta.json"
+        self.meta = json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {
+            "dim": self.embedder.dim, "model": self.embedder.model_name, "count": 0, "capacity": 0, "trained_count": 0
+        }
+        if self.meta["dim"] != self.embedder.dim:
+            raise ValueError(f"Index at {self.root} has dimension {self.meta['dim']}, embedder has {self.embedder.dim}")
+        if self.meta.get("model", self.embedder.model_name) != self.embedder.model_name:
+            raise ValueError(f"Index at {self.root} was built with {self.meta['model']}, embedder is {self.embedder.model_name}")
+
+        idf_path = self.root / "idf.npy"
+        if isinstance(self.embedder, HashingEmbedder) and idf_path.exists():
+            self.embedder.idf = np.load(idf_path)
+        centroids_path = self.root / "centroids.npy"
+        self.centroids = np.load(centroids_path) if centroids_path.exists() else None
+
+        self._rows = sqlite3.connect(str(self.root / "rows.db"), check_same_thread=False)
+        self._rows.execute(
+            "CREATE TABLE IF NOT EXISTS rows (row INTEGER PRIMARY KEY, tender_id INTEGER UNIQUE, text TEXT, data TEXT)"
+        )
+        self._vectors: Optional[np.memmap] = None
+        self._assignment: Optional[np.memmap] = None
+        self._open_arrays()
+
+    # Storage
+
+    def _open_arrays(self) -> None:
+        capacity = self.meta["capacity"]
+        if capacity == 0:
+            self._vectors = None
+            self._assignment = None
+            return
+        self._vectors = np.memmap(self.root / "vectors.f32", dtype=np.float32, mode="r+", shape=(capacity, self.meta["dim"]))
+        self._assignment = np.memmap(self.root / "assignment.i32", dtype=np.int32, mode="r+", shape=(capacity,))
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = self.meta["capacity"]
+        if needed <= capacity:
+            return
+        new_capacity = max(1024, capacity * 2, needed)
+        self._vectors = self._assignment = None
+        for name, itemsize in (("vectors.f32", 4 * self.meta["dim"]), ("assignment.i32", 4)):
+            with open(self.root / name, "ab") as fh:
+                fh.truncate(new_capacity * itemsize)
+        self.meta["capacity"] = new_capacity
+        self._open_arrays()
+
+    def _save_meta(self) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._assignment.flush()
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.meta))
+        os.replace(tmp_path, self.meta_path)
+
+    def close(self) -> None:
+        self._save_meta()
+        self._rows.close()
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    # Updates
+
+    def contains(self, tender_id: int) -> bool:
+        return self._rows.execute("SELECT 1 FROM rows WHERE tender_id = ?", (tender_id,)).fetchone() is not None
+
+    def add(self, items: Iterable[Tuple[int, str, Dict[str, Any]]]) -> int:
+        """Append (tender_id, text, row data) items not yet indexed; returns the number added"""
+        items = [item for item in items if item[0] is not None and not self.contains(item[0])]
+        items = list({tender_id: (tender_id, text, data) for tender_id, text, data in items}.values())
+        if not items:
+            return 0
+
+        start = self.meta["count"]
+        self._ensure_capacity(start + len(items))
+        vectors = self.embedder.embed([text for _, text, _ in items])
+        self._vectors[start:start + len(items)] = vectors
+        self._assignment[start:start + len(items)] = (
+            np.argmax(vectors @ self.centroids.T, axis=1) if self.centroids is not None else -1
+        )
+        with self._rows:
+            self._rows.executemany(
+                "INSERT INTO rows (row, tender_id, text, data) VALUES (?, ?, ?, ?)",
+                [(start + i, tender_id, text, json.dumps(data, ensure_ascii=False))
+                 for i, (tender_id, text, data) in enumerate(items)]
+            )
+        self.meta["count"] = start + len(items)
+
+        # Refresh IDF and re-cluster whenever the index has doubled since the last training
+        if self.meta["count"] >= max(200, 2 * self.meta["trained_count"]):
+            self.rebuild()
+        else:
+            self._save_meta()
+        return len(items)
+
+    def rebuild(self) -> None:
+        """Re-train the IVF clusters (refitting IDF and re-embedding hashed vectors first)"""
+        count = self.meta["count"]
+        if isinstance(self.embedder, HashingEmbedder):
+            texts = [text for (text,) in self._rows.execute("SELECT text FROM rows ORDER BY row")]
+            self.embedder.fit_idf(texts)
+            np.save(self.root / "idf.npy", self.embedder.idf)
+            for start in range(0, count, 5000):
+                self._vectors[start:start + 5000] = self.embedder.embed(texts[start:start + 5000])
+
+        if count >= IVF_MIN_VECTORS:
+            vectors = np.asarray(self._vectors[:count])
+            sample = vectors[np.random.default_rng(0).choice(count, min(count, 20000), replace=False)]
+            self.centroids = _kmeans(sample, clusters=min(1024, int(math.sqrt(count))))
+            np.save(self.root / "centroids.npy", self.centroids)
+            for start in range(0, count, 20000):
+                self._assignment[start:start + 20000] = np.argmax(
+                    vectors[start:start + 20000] @ self.centroids.T, axis=1
+                )
+        self.meta["trained_count"] = count
+        self._save_meta()
+
+    def sync_from_store(self, store: TenderStore) -> int:
+        """Index stored tenders that aren't indexed yet; returns the number added"""
+        known = {tender_id for (tender_id,) in self._rows.execute("SELECT tender_id FROM rows")}
+        added = 0
+        batch = []
+        for tender in store.iter_tenders():
+            if tender.get("id") in known:
+                continue
+            batch.append((tender["id"], tender_text(tender, store.get_announcements(tender["id"])), _row_data(tender)))
+            if len(batch) >= 5000:
+                added += self.add(batch)
+                batch = []
+        added += self.add(batch)
+        return added
+
+    # Queries
+
+    def vector_for(self, tender_id: int) -> Optional[np.ndarray]:
+        row = self._rows.execute("SELECT row FROM rows WHERE tender_id = ?", (tender_id,)).fetchone()
+        return np.array(self._vectors[row[0]]) if row else None
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embedder.embed([text])[0]
+
+    def search(
+        self,
+        vector: np.ndarray,
+        top_k: int = 10,
+        nprobe: int = DEFAULT_NPROBE,
+        exclude_ids: Iterable[int] = ()
+    ) -> List[Dict[str, Any]]:
+        """Nearest tenders by cosine similarity, probing the `nprobe` closest clusters"""
+        count = self.meta["count"]
+        if count == 0:
+            return []
+
+        assignment = self._assignment[:count]
+        if self.centroids is not None and count >= IVF_MIN_VECTORS:
+            probes = np.argsort(-(self.centroids @ vector))[:nprobe]
+            candidates = np.flatnonzero(np.isin(assignment, probes) | (assignment < 0))
+        else:
+            candidates = np.arange(count)
+
+        scores = self._vectors[candidates] @ vector
+        exclude = set(exclude_ids)
+        order = np.argsort(-scores)[:top_k + len(exclude)]
+
+        rows = [int(candidates[i]) for i in order]
+        data_by_row = {
+            row: (tender_id, json.loads(data))
+            for row, tender_id, data in self._rows.execute(
+                f"SELECT row, tender_id, data FROM rows WHERE row IN ({','.join('?' * len(rows))})", rows
+            )
+        } if rows else {}
+
+        results = []
+        for i, row in zip(order, rows):
+            tender_id, data = data_by_row[row]
+            if tender_id in exclude:
+                continue
+            results.append({"id": tender_id, "score": round(float(scores[i]), 4), **data})
+            if len(results) >= top_k:
+                break
+        return results
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": self.embedder.name,
+            "model": self.embedder.model_name,
+            "dimension": self.meta["dim"],
+            "indexed_count": self.meta["count"],
+            "clusters": int(len(self.centroids)) if self.centroids is not None else 0,
+            "trained_count": self.meta["trained_count"],
+            "path": str(self.root)
+        }
+
+
+def _row_data(tender: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields returned with each similar tender"""
+    return {
+        "name": tender.get("name"),
+        "ikn": tender.get("ikn"),
+        "authority": tender.get("authority"),
+        "province": tender.get("province"),
+        "tender_datetime": tender.get("tender_datetime"),
+        "type": (tender.get("type") or {}).get("description")
+    }
+
+
+def index_items_from_tenders(tenders: Iterable[Dict[str, Any]]) -> List[Tuple[int, str, Dict[str, Any]]]:
+    """(tender_id, text, row data) items for formatted search_tenders rows"""
+    return [(tender["id"], tender_text(tender), _row_data(tender)) for tender in tenders if tender.get("id") is not None]
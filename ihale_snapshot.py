@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Offline snapshots of synced tender data
+A snapshot is one read-only SQLite file holding the TenderStore's search rows,
+details and announcements plus OKAS and DETSIS (authority) reference data.
+Records are stored as zlib-compressed JSON next to the columns needed for
+indexed lookups, and the file is opened immutable and memory-mapped, so
+worker processes share its pages through the OS cache. SnapshotClient
+answers the EKAPClient methods the tools use from such a file, for
+environments that can't reach ekapv2.kik.gov.tr
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from ihale_backend import iter_search_pages, resolve_document_urls
+from ihale_canonical import CanonicalQuery, PAGING_FIELDS, parse_tender_datetime
+from ihale_models import REGISTRY
+from ihale_text import fold, normalize_term
+
+# Bumped when the layout changes; older snapshots are refused rather than misread
+SNAPSHOT_FORMAT = 1
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE tenders (
+    id INTEGER PRIMARY KEY,
+    ikn TEXT,
+    tender_at TEXT,
+    tender_date TEXT,
+    type_code TEXT,
+    status_code TEXT,
+    province_key TEXT,
+    name_key TEXT,
+    authority_key TEXT,
+    document_url TEXT,
+    data BLOB NOT NULL
+);
+CREATE INDEX tenders_tender_at ON tenders (tender_at);
+CREATE INDEX tenders_province ON tenders (province_key, tender_at);
+CREATE INDEX tenders_type ON tenders (type_code, tender_at);
+CREATE INDEX tenders_status ON tenders (status_code, tender_at);
+CREATE INDEX tenders_ikn ON tenders (ikn);
+CREATE TABLE details (
+    tender_id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE announcements (
+    tender_id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE okas (
+    rowid INTEGER PRIMARY KEY,
+    code TEXT,
+    item_type INTEGER,
+    text_key TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX okas_code ON okas (code);
+CREATE TABLE authorities (
+    rowid INTEGER PRIMARY KEY,
+    authority_id INTEGER,
+    name_key TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX authorities_id ON authorities (authority_id);
+"""
+
+# Filters a snapshot can apply; any other search filter is reported as ignored
+SUPPORTED_FILTERS = {
+    "search_text", "search_type", "ikn_year", "ikn_number", "order_by", "sort_order",
+    "tender_types", "tender_statuses", "provinces", "tender_date_start", "tender_date_end",
+}
+
+_ORDER_COLUMNS = {"ihaleTarihi": "tender_at", "ihaleAdi": "name_key", "idareAdi": "authority_key"}
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _like_pattern(text: str) -> str:
+    """Substring LIKE pattern for folded text, with wildcards escaped"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _tender_row(tender: Dict[str, Any]) -> Tuple:
+    tender_datetime = parse_tender_datetime(tender.get("tender_datetime"))
+    type_code = (tender.get("type") or {}).get("code")
+    status_code = (tender.get("status") or {}).get("code")
+    return (
+        tender["id"],
+        tender.get("ikn"),
+        tender_datetime.isoformat() if tender_datetime else None,
+        tender_datetime.date().isoformat() if tender_datetime else None,
+        str(type_code) if type_code is not None else None,
+        str(status_code) if status_code is not None else None,
+        fold(tender.get("province") or ""),
+        fold(tender.get("name") or ""),
+        fold(tender.get("authority") or ""),
+        tender.get("document_url"),
+        _pack(tender),
+    )
+
+
+def build_snapshot(
+    store,
+    path: str,
+    okas_codes: Iterable[Dict[str, Any]] = (),
+    authorities: Iterable[Dict[str, Any]] = (),
+    extra_meta: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Write a snapshot of a TenderStore and reference data to `path`
+
+    The file is built next to the target and renamed into place, so a
+    server reading an older snapshot at the same path never sees a partial
+    one. Returns the snapshot's manifest.
+    """
+    target = Path(path).expanduser()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    building = target.with_name(target.name + ".building")
+    if building.exists():
+        building.unlink()
+
+    conn = sqlite3.connect(str(building))
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SNAPSHOT_SCHEMA)
+        counts = {"tenders": 0, "details": 0, "announcements": 0, "okas_codes": 0, "authorities": 0}
+
+        with conn:
+            batch = []
+            for tender in store.iter_tenders():
+                if tender.get("id") is None:
+                    continue
+                batch.append(_tender_row(tender))
+                if len(batch) >= 1000:
+                    conn.executemany("INSERT OR REPLACE INTO tenders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                    counts["tenders"] += len(batch)
+                    batch = []
+            conn.executemany("INSERT OR REPLACE INTO tenders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            counts["tenders"] += len(batch)
+
+            for tender_id, details in store.iter_details():
+                conn.execute("INSERT OR REPLACE INTO details VALUES (?, ?)", (tender_id, _pack(details)))
+                counts["details"] += 1
+            for tender_id, announcements in store.iter_announcements():
+                conn.execute("INSERT OR REPLACE INTO announcements VALUES (?, ?)", (tender_id, _pack(announcements)))
+                counts["announcements"] += 1
+
+            seen = set()
+            for item in okas_codes:
+                key = (item.get("id"), item.get("code"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                text_key = fold(" ".join(str(item.get(field) or "") for field in ("code", "description_tr", "description_en")))
+                conn.execute(
+                    "INSERT INTO okas (code, item_type, text_key, data) VALUES (?, ?, ?, ?)",
+                    (item.get("code"), (item.get("item_type") or {}).get("code"), text_key, _pack(item))
+                )
+                counts["okas_codes"] += 1
+
+            seen = set()
+            for item in authorities:
+                if item.get("id") in seen:
+                    continue
+                seen.add(item.get("id"))
+                conn.execute(
+                    "INSERT INTO authorities (authority_id, name_key, data) VALUES (?, ?, ?)",
+                    (item.get("id"), fold(item.get("name") or ""), _pack(item))
+                )
+                counts["authorities"] += 1
+
+            manifest = {
+                "format": SNAPSHOT_FORMAT,
+                "created_at": time.time(),
+                "counts": counts,
+                **(extra_meta or {})
+            }
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in manifest.items()]
+            )
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(building, target)
+    return manifest
+
+
+class SnapshotClient:
+    """Read-only backend (see ihale_backend) answering from a snapshot file
+
+    Implements the EKAPClient methods the MCP tools and bulk jobs call, with
+    the same result shapes. Tender searches apply the filters the snapshot
+    has columns for (text on name/authority/IKN, types, statuses, provinces,
+    tender dates) and list any others under `ignored_filters`. Tenders,
+    details and announcements missing from the snapshot come back as errors.
+    """
+
+    def __init__(self, path: str, mmap_bytes: Optional[int] = None):
+        self.path = Path(path).expanduser()
+        if not self.path.is_file():
+            raise FileNotFoundError(f"Snapshot not found: {self.path}")
+        # TenderBackend attributes: no response cache or request scheduler offline
+        self.offline = True
+        self.cache = None
+        self.document_url_cache = None
+        self.scheduler = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False
+        )
+        self._conn.execute(f"PRAGMA mmap_size={mmap_bytes or self.path.stat().st_size}")
+        self.manifest = {
+            key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM meta")
+        }
+        if self.manifest.get("format") != SNAPSHOT_FORMAT:
+            self._conn.close()
+            raise ValueError(
+                f"Unsupported snapshot format {self.manifest.get('format')!r} in {self.path} "
+                f"(expected {SNAPSHOT_FORMAT})"
+            )
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    async def _aquery(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        """_query in a worker thread, so large scans don't block the event loop"""
+        return await asyncio.to_thread(self._query, sql, params)
+
+    async def _get(self, table: str, tender_id: int) -> Optional[Any]:
+        rows = await self._aquery(f"SELECT data FROM {table} WHERE tender_id = ?", (tender_id,))
+        return _unpack(rows[0][0]) if rows else None
+
+    def _where(self, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """SQL condition for the filters a snapshot can apply"""
+        clauses, params = [], []
+        search_text = filters.get("search_text")
+        if search_text:
+            folded = fold(search_text)
+            terms = folded.split() if filters.get("search_type") == "TumKelimeler" else [folded]
+            for term in terms:
+                clauses.append(
+                    "(name_key LIKE ? ESCAPE '\\' OR authority_key LIKE ? ESCAPE '\\' OR ikn LIKE ? ESCAPE '\\')"
+                )
+                params.extend([_like_pattern(term)] * 3)
+        if filters.get("ikn_year") is not None:
+            if filters.get("ikn_number") is not None:
+                clauses.append("ikn = ?")
+                params.append(f"{filters['ikn_year']}/{filters['ikn_number']}")
+            else:
+                clauses.append("ikn LIKE ?")
+                params.append(f"{filters['ikn_year']}/%")
+        elif filters.get("ikn_number") is not None:
+            clauses.append("ikn LIKE ?")
+            params.append(f"%/{filters['ikn_number']}")
+        for field, column in (("tender_types", "type_code"), ("tender_statuses", "status_code")):
+            if filters.get(field):
+                clauses.append(f"{column} IN ({', '.join('?' * len(filters[field]))})")
+                params.extend(str(value) for value in filters[field])
+        if filters.get("provinces"):
+            names = [fold(name) for name in map(REGISTRY.provinces.name_for_api_id, filters["provinces"]) if name]
+            clauses.append(f"province_key IN ({', '.join('?' * len(names))})" if names else "0")
+            params.extend(names)
+        if filters.get("tender_date_start"):
+            clauses.append("tender_date >= ?")
+            params.append(filters["tender_date_start"])
+        if filters.get("tender_date_end"):
+            clauses.append("tender_date <= ?")
+            params.append(filters["tender_date_end"])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    async def search_tenders(self, skip: int = 0, limit: int = 10, **search_params) -> Dict[str, Any]:
+        """Search the snapshot's tenders; takes EKAPClient.search_tenders arguments"""
+        for name in PAGING_FIELDS:
+            search_params.pop(name, None)
+        try:
+            query = CanonicalQuery.from_params(search_params)
+        except ValueError as e:
+            return {"error": "Invalid search parameters", "message": str(e)}
+
+        filters = query.filters
+        where, params = self._where(filters)
+        order_column = _ORDER_COLUMNS.get(filters.get("order_by", "ihaleTarihi"), "tender_at")
+        direction = "ASC" if filters.get("sort_order") == "asc" else "DESC"
+        total_count = (await self._aquery(f"SELECT COUNT(*) FROM tenders{where}", params))[0][0]
+        rows = await self._aquery(
+            f"SELECT data, document_url FROM tenders{where} ORDER BY {order_column} {direction}, id {direction} "
+            "LIMIT ? OFFSET ?",
+            [*params, limit, max(0, skip)]
+        )
+        tenders = []
+        for data, document_url in rows:
+            tender = _unpack(data)
+            tender["document_url"] = document_url
+            tenders.append(tender)
+        result = {
+            "tenders": tenders,
+            "total_count": total_count,
+            "returned_count": len(tenders),
+            "snapshot": True
+        }
+        ignored = sorted(set(filters) - SUPPORTED_FILTERS)
+        if ignored:
+            result["ignored_filters"] = ignored
+        return result
+
+    def iter_tender_pages(
+        self,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+        concurrency: int = 4,
+        **search_params
+    ) -> AsyncIterator[Dict[str, Any]]:
+        return iter_search_pages(self.search_tenders, max_results, page_size, concurrency, **search_params)
+
+    async def search_all_tenders(
+        self,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+        concurrency: int = 4,
+        **search_params
+    ) -> Dict[str, Any]:
+        """Every matching tender up to max_results, like EKAPClient.search_all_tenders"""
+        if max_results is None:
+            max_results = -1  # SQLite: no limit
+        return await self.search_tenders(skip=0, limit=max_results, **search_params)
+
+    async def search_okas_codes(
+        self,
+        search_term: str = "",
+        kalem_turu: Optional[int] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        limit = min(max(limit, 1), 500)
+        normalized_term = normalize_term(search_term)
+        sql, params = "SELECT data FROM okas WHERE text_key LIKE ? ESCAPE '\\'", [_like_pattern(fold(normalized_term))]
+        if kalem_turu is not None:
+            sql += " AND item_type = ?"
+            params.append(kalem_turu)
+        results = [_unpack(data) for (data,) in await self._aquery(sql + " ORDER BY code LIMIT ?", [*params, limit])]
+        return {
+            "okas_codes": results,
+            "total_found": len(results),
+            "fuzzy_matches": False,
+            "search_params": {
+                "search_term": search_term,
+                "normalized_term": normalized_term,
+                "kalem_turu": kalem_turu,
+                "limit": limit
+            },
+            "item_type_legend": REGISTRY.okas_item_types.legend(),
+            "snapshot": True
+        }
+
+    async def search_authorities(self, search_term: str = "", limit: int = 50) -> Dict[str, Any]:
+        limit = min(max(limit, 1), 500)
+        normalized_term = normalize_term(search_term)
+        results = [
+            _unpack(data) for (data,) in await self._aquery(
+                "SELECT data FROM authorities WHERE name_key LIKE ? ESCAPE '\\' ORDER BY name_key LIMIT ?",
+                (_like_pattern(fold(normalized_term)), limit)
+            )
+        ]
+        return {
+            "authorities": results,
+            "total_found": len(results),
+            "fuzzy_matches": False,
+            "search_params": {
+                "search_term": search_term,
+                "normalized_term": normalized_term,
+                "limit": limit
+            },
+            "snapshot": True
+        }
+
+    async def get_reference_catalogs(self, okas_limit: int = 50000, authority_limit: int = 200000) -> Dict[str, Any]:
+        okas_codes = await self._aquery("SELECT data FROM okas ORDER BY code LIMIT ?", (okas_limit,))
+        authorities = await self._aquery("SELECT data FROM authorities ORDER BY name_key LIMIT ?", (authority_limit,))
+        return {
+            "okas_codes": [_unpack(data) for (data,) in okas_codes],
+            "authorities": [_unpack(data) for (data,) in authorities],
+            "errors": {}
+        }
+
+    async def get_tender_announcements(self, tender_id: int) -> Dict[str, Any]:
+        result = await self._get("announcements", tender_id)
+        if result is None:
+            return {"error": "Tender announcements not in snapshot", "tender_id": tender_id}
+        return result
+
+    async def get_tender_details(self, tender_id: int, convert_announcements: bool = True) -> Dict[str, Any]:
+        result = await self._get("details", tender_id)
+        if result is None:
+            return {"error": "Tender details not in snapshot", "tender_id": tender_id}
+        if not convert_announcements:
+            for announcement in (result.get("announcements") or []):
+                if isinstance(announcement, dict):
+                    announcement["markdown_content"] = None
+        return result
+
+    def get_cached_document_url(self, tender_id: int, islem_id: str = "1") -> Optional[str]:
+        rows = self._query("SELECT document_url FROM tenders WHERE id = ?", (tender_id,))
+        return rows[0][0] if rows else None
+
+    async def get_tender_document_urls(
+        self,
+        tender_ids: List[int],
+        islem_id: str = "1",
+        cache_only: bool = False,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        # Every URL the snapshot has is "cached"; the rest resolve to None without errors
+        return await resolve_document_urls(
+            self.get_cached_document_url, self.get_tender_document_url,
+            tender_ids, islem_id, True, concurrency
+        )
+
+    async def get_tender_document_url(self, tender_id: int, islem_id: str = "1") -> Dict[str, Any]:
+        document_url = self.get_cached_document_url(tender_id, islem_id)
+        if document_url:
+            return {"document_url": document_url, "tender_id": tender_id, "islem_id": islem_id, "success": True}
+        return {"error": "No document URL in snapshot", "tender_id": tender_id, "success": False}
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Local SQLite store for synced tender data
+Holds formatted search rows, tender details and announcements keyed by tender ID
+so bulk jobs and local tools can work without re-fetching from EKAP
+"""
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+# Directory for local data (store, caches); override with IHALE_DATA_DIR
+DATA_DIR = Path(os.environ.get("IHALE_DATA_DIR", "~/.ihale-mcp")).expanduser()
+
+# Default location of the store; override with IHALE_DB_PATH
+DEFAULT_DB_PATH = DATA_DIR / "ihale.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenders (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tender_details (
+    tender_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tender_announcements (
+    tender_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS result_announcements (
+    announcement_id INTEGER PRIMARY KEY,
+    tender_id INTEGER NOT NULL,
+    content_sha256 TEXT NOT NULL,
+    data TEXT NOT NULL,
+    parsed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contract_awards (
+    announcement_id INTEGER NOT NULL,
+    award_index INTEGER NOT NULL,
+    tender_id INTEGER NOT NULL,
+    lot TEXT,
+    winner TEXT,
+    winner_key TEXT,
+    authority TEXT,
+    authority_key TEXT,
+    province TEXT,
+    province_key TEXT,
+    tender_type TEXT,
+    tender_type_key TEXT,
+    contract_value REAL,
+    currency TEXT,
+    contract_date TEXT,
+    estimated_cost REAL,
+    total_bids INTEGER,
+    valid_bids INTEGER,
+    PRIMARY KEY (announcement_id, award_index)
+);
+CREATE INDEX IF NOT EXISTS contract_awards_winner ON contract_awards (winner_key);
+CREATE INDEX IF NOT EXISTS contract_awards_authority ON contract_awards (authority_key);
+CREATE INDEX IF NOT EXISTS contract_awards_value ON contract_awards (contract_value);
+CREATE TABLE IF NOT EXISTS contract_award_okas (
+    announcement_id INTEGER NOT NULL,
+    okas_code TEXT NOT NULL,
+    PRIMARY KEY (announcement_id, okas_code)
+);
+CREATE INDEX IF NOT EXISTS contract_award_okas_code ON contract_award_okas (okas_code);
+CREATE TABLE IF NOT EXISTS saved_searches (
+    name TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    max_results INTEGER NOT NULL,
+    interval_seconds REAL NOT NULL,
+    created_at REAL NOT NULL,
+    read_run_id INTEGER NOT NULL DEFAULT 0,
+    read_tender_id INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS saved_search_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    total_count INTEGER,
+    fetched_count INTEGER,
+    new_count INTEGER NOT NULL DEFAULT 0,
+    baseline INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS saved_search_runs_name ON saved_search_runs (name, id);
+CREATE TABLE IF NOT EXISTS saved_search_seen (
+    name TEXT NOT NULL,
+    tender_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    PRIMARY KEY (name, tender_id)
+);
+CREATE INDEX IF NOT EXISTS saved_search_seen_run ON saved_search_seen (name, run_id);
+CREATE TABLE IF NOT EXISTS saved_search_claims (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    claimed_until REAL NOT NULL
+);
+"""
+
+
+def default_db_path() -> Path:
+    """Resolve the store path from IHALE_DB_PATH or the data directory"""
+    return Path(os.environ.get("IHALE_DB_PATH", DEFAULT_DB_PATH)).expanduser()
+
+
+class TenderStore:
+    """SQLite-backed store of synced tenders, details and announcements"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path).expanduser() if path else default_db_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "TenderStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def upsert_tenders(self, tenders: List[Dict[str, Any]]) -> int:
+        """Insert or replace formatted search_tenders rows; returns rows written"""
+        now = time.time()
+        rows = [
+            (tender["id"], json.dumps(tender, ensure_ascii=False), now)
+            for tender in tenders if tender.get("id") is not None
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tenders (id, data, synced_at) VALUES (?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def upsert_details(self, tender_id: int, details: Dict[str, Any]) -> None:
+        """Store a formatted get_tender_details result"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tender_details (tender_id, data, synced_at) VALUES (?, ?, ?)",
+                (tender_id, json.dumps(details, ensure_ascii=False), time.time())
+            )
+
+    def upsert_announcements(self, tender_id: int, announcements: Dict[str, Any]) -> None:
+        """Store a formatted get_tender_announcements result"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tender_announcements (tender_id, data, synced_at) VALUES (?, ?, ?)",
+                (tender_id, json.dumps(announcements, ensure_ascii=False), time.time())
+            )
+
+    def _get(self, table: str, key_column: str, key: int) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            f"SELECT data FROM {table} WHERE {key_column} = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_tender(self, tender_id: int) -> Optional[Dict[str, Any]]:
+        return self._get("tenders", "id", tender_id)
+
+    def get_details(self, tender_id: int) -> Optional[Dict[str, Any]]:
+        return self._get("tender_details", "tender_id", tender_id)
+
+    def get_announcements(self, tender_id: int) -> Optional[Dict[str, Any]]:
+        return self._get("tender_announcements", "tender_id", tender_id)
+
+    def iter_tenders(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all stored search rows in tender ID order"""
+        for (data,) in self._conn.execute("SELECT data FROM tenders ORDER BY id"):
+            yield json.loads(data)
+
+    def iter_details(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Iterate over (tender_id, details) for all stored details"""
+        for tender_id, data in self._conn.execute("SELECT tender_id, data FROM tender_details"):
+            yield tender_id, json.loads(data)
+
+    def iter_announcements(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Iterate over (tender_id, announcements) for all stored announcements"""
+        for tender_id, data in self._conn.execute("SELECT tender_id, data FROM tender_announcements"):
+            yield tender_id, json.loads(data)
+
+    def version(self) -> Tuple[int, float, int, float]:
+        """Row count and last sync time of tenders and details; changes whenever either is written"""
+        row = self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM tenders), (SELECT COALESCE(MAX(synced_at), 0) FROM tenders), "
+            "(SELECT COUNT(*) FROM tender_details), (SELECT COALESCE(MAX(synced_at), 0) FROM tender_details)"
+        ).fetchone()
+        return tuple(row)
+
+    def get_result_hash(self, announcement_id: int) -> Optional[str]:
+        """Content hash of a parsed result announcement, if indexed"""
+        row = self._conn.execute(
+            "SELECT content_sha256 FROM result_announcements WHERE announcement_id = ?", (announcement_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_result(self, announcement_id: int) -> Optional[Dict[str, Any]]:
+        return self._get("result_announcements", "announcement_id", announcement_id)
+
+    def upsert_result(self, result: Dict[str, Any], awards: List[Dict[str, Any]], okas_codes: List[str]) -> None:
+        """Store a parsed result announcement and replace its rows in the award index
+
+        `awards` are contract_awards rows (without the key columns); `okas_codes`
+        are the tender's OKAS codes, indexed per announcement.
+        """
+        announcement_id = result["announcement_id"]
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_announcements "
+                "(announcement_id, tender_id, content_sha256, data, parsed_at) VALUES (?, ?, ?, ?, ?)",
+                (announcement_id, result["tender_id"], result["content_sha256"],
+                 json.dumps(result, ensure_ascii=False), time.time())
+            )
+            self._conn.execute("DELETE FROM contract_awards WHERE announcement_id = ?", (announcement_id,))
+            self._conn.execute("DELETE FROM contract_award_okas WHERE announcement_id = ?", (announcement_id,))
+            self._conn.executemany(
+                "INSERT INTO contract_awards (announcement_id, award_index, tender_id, lot, winner, winner_key, "
+                "authority, authority_key, province, province_key, tender_type, tender_type_key, contract_value, currency, contract_date, "
+                "estimated_cost, total_bids, valid_bids) "
+                "VALUES (:announcement_id, :award_index, :tender_id, :lot, :winner, :winner_key, :authority, "
+                ":authority_key, :province, :province_key, :tender_type, :tender_type_key, :contract_value, :currency, :contract_date, "
+                ":estimated_cost, :total_bids, :valid_bids)",
+                awards
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO contract_award_okas (announcement_id, okas_code) VALUES (?, ?)",
+                [(announcement_id, code) for code in okas_codes]
+            )
+
+    def query_awards(
+        self,
+        where: List[str],
+        params: List[Any],
+        group_by: Optional[str] = None,
+        order_by: str = "contract_value DESC",
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Run a filtered (optionally grouped) query over the contract award index"""
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        if group_by:
+            # Names are grouped on their normalized key so spelling/case variants merge
+            key_column = f"{group_by}_key" if group_by in ("winner", "authority") else group_by
+            sql = (
+                f"SELECT MIN({group_by}) AS name, COUNT(*) AS award_count, "
+                f"SUM(contract_value) AS total_value, AVG(contract_value) AS average_value, "
+                f"AVG(total_bids) AS average_bids "
+                f"FROM contract_awards {clause} GROUP BY {key_column} "
+                f"ORDER BY award_count DESC, total_value DESC LIMIT ?"
+            )
+        else:
+            sql = f"SELECT * FROM contract_awards {clause} ORDER BY {order_by} LIMIT ?"
+        cursor = self._conn.execute(sql, [*params, limit])
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def save_search(self, name: str, params: Dict[str, Any], max_results: int, interval_seconds: float) -> None:
+        """Create or update a saved search; its seen tender IDs are kept on update"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO saved_searches (name, params, max_results, interval_seconds, created_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET "
+                "params = excluded.params, max_results = excluded.max_results, "
+                "interval_seconds = excluded.interval_seconds",
+                (name, json.dumps(params, ensure_ascii=False), max_results, interval_seconds, time.time())
+            )
+
+    def delete_search(self, name: str) -> bool:
+        """Remove a saved search with its run history and seen IDs"""
+        with self._conn:
+            deleted = self._conn.execute("DELETE FROM saved_searches WHERE name = ?", (name,)).rowcount
+            self._conn.execute("DELETE FROM saved_search_runs WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM saved_search_seen WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM saved_search_claims WHERE name = ?", (name,))
+        return bool(deleted)
+
+    def list_searches(self) -> List[Dict[str, Any]]:
+        """Saved searches with their last run and unread new-tender count"""
+        cursor = self._conn.execute(
+            "SELECT s.name, s.params, s.max_results, s.interval_seconds, s.created_at, s.read_run_id, s.read_tender_id, "
+            "r.id, r.finished_at, r.total_count, r.new_count, r.error, "
+            "(SELECT COUNT(*) FROM saved_search_seen WHERE name = s.name), "
+            "(SELECT COUNT(*) FROM saved_search_seen seen JOIN saved_search_runs run ON run.id = seen.run_id "
+            " WHERE seen.name = s.name AND run.baseline = 0 AND (seen.run_id > s.read_run_id "
+            " OR (seen.run_id = s.read_run_id AND seen.tender_id > s.read_tender_id))) "
+            "FROM saved_searches s LEFT JOIN saved_search_runs r "
+            "ON r.id = (SELECT MAX(id) FROM saved_search_runs WHERE name = s.name) ORDER BY s.name"
+        )
+        return [
+            {
+                "name": name,
+                "search_params": json.loads(params),
+                "max_results": max_results,
+                "interval_seconds": interval_seconds,
+                "created_at": created_at,
+                "read_cursor": [read_run_id, read_tender_id],
+                "last_run": {
+                    "run_id": run_id,
+                    "finished_at": finished_at,
+                    "total_count": total_count,
+                    "new_count": new_count,
+                    "error": error
+                } if run_id is not None else None,
+                "seen_count": seen_count,
+                "unread_count": unread_count
+            }
+            for (name, params, max_results, interval_seconds, created_at, read_run_id, read_tender_id, run_id,
+                 finished_at, total_count, new_count, error, seen_count, unread_count) in cursor
+        ]
+
+    def get_search(self, name: str) -> Optional[Dict[str, Any]]:
+        return next((search for search in self.list_searches() if search["name"] == name), None)
+
+    def record_search_run(
+        self,
+        name: str,
+        started_at: float,
+        tender_ids: List[int],
+        total_count: Optional[int],
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Record a refresh of a saved search and mark its tender IDs as seen
+
+        The first successful run of a search is its baseline: its tenders are
+        marked seen without being reported as new. Returns the run ID and the
+        IDs seen for the first time.
+        """
+        with self._conn:
+            baseline = error is None and self._conn.execute(
+                "SELECT 1 FROM saved_search_runs WHERE name = ? AND error IS NULL LIMIT 1", (name,)
+            ).fetchone() is None
+            run_id = self._conn.execute(
+                "INSERT INTO saved_search_runs (name, started_at, finished_at, total_count, fetched_count, baseline, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, started_at, time.time(), total_count, len(tender_ids), int(baseline), error)
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO saved_search_seen (name, tender_id, run_id) VALUES (?, ?, ?)",
+                [(name, tender_id, run_id) for tender_id in tender_ids]
+            )
+            new_ids = [
+                tender_id for (tender_id,) in self._conn.execute(
+                    "SELECT tender_id FROM saved_search_seen WHERE name = ? AND run_id = ?", (name, run_id)
+                )
+            ]
+            if not baseline:
+                self._conn.execute(
+                    "UPDATE saved_search_runs SET new_count = ? WHERE id = ?", (len(new_ids), run_id)
+                )
+        return {"run_id": run_id, "baseline": baseline, "new_ids": [] if baseline else new_ids}
+
+    def claim_search(self, name: str, last_run_id: Optional[int], owner: str, lease_seconds: float) -> bool:
+        """Atomically take a due saved search for refreshing
+
+        Succeeds only if the search's last run is still `last_run_id` (no one
+        refreshed it since the caller looked) and no other owner holds an
+        unexpired claim, so schedulers in several server processes sharing
+        this store refresh each due search once. The lease lets another
+        process take over if the owner dies mid-refresh.
+        """
+        now = time.time()
+        with self._conn:
+            claimed = self._conn.execute(
+                "INSERT INTO saved_search_claims (name, owner, claimed_until) "
+                "SELECT ?, ?, ? WHERE (SELECT COALESCE(MAX(id), 0) FROM saved_search_runs WHERE name = ?) = ? "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, claimed_until = excluded.claimed_until "
+                "WHERE saved_search_claims.claimed_until < ?",
+                (name, owner, now + lease_seconds, name, last_run_id or 0, now)
+            ).rowcount
+        return bool(claimed)
+
+    def release_search(self, name: str, owner: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM saved_search_claims WHERE name = ? AND owner = ?", (name, owner))
+
+    def search_delta(
+        self,
+        name: str,
+        after: Tuple[int, int],
+        limit: int
+    ) -> Tuple[List[Dict[str, Any]], Tuple[int, int], bool]:
+        """Stored rows of tenders first seen by non-baseline runs after a read cursor
+
+        The cursor is a (run_id, tender_id) pair; rows come in that order.
+        Returns (rows, cursor after the last row, whether more rows remain).
+        """
+        run_id, tender_id = after
+        cursor = self._conn.execute(
+            "SELECT seen.tender_id, seen.run_id, t.data FROM saved_search_seen seen "
+            "JOIN saved_search_runs run ON run.id = seen.run_id "
+            "LEFT JOIN tenders t ON t.id = seen.tender_id "
+            "WHERE seen.name = ? AND run.baseline = 0 "
+            "AND (seen.run_id > ? OR (seen.run_id = ? AND seen.tender_id > ?)) "
+            "ORDER BY seen.run_id, seen.tender_id LIMIT ?",
+            (name, run_id, run_id, tender_id, limit + 1)
+        )
+        rows = [
+            {**(json.loads(data) if data else {"id": seen_id}), "run_id": seen_run}
+            for seen_id, seen_run, data in cursor
+        ]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            after = (rows[-1]["run_id"], rows[-1]["id"])
+        return rows, after, has_more
+
+    def mark_search_read(self, name: str, cursor: Tuple[int, int]) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE saved_searches SET read_run_id = ?, read_tender_id = ? WHERE name = ?",
+                (*cursor, name)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Row counts per table"""
+        return {
+            table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("tenders", "tender_details", "tender_announcements", "result_announcements", "contract_awards")
+        }
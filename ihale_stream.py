@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Incremental parsing of large EKAP responses
+A tender detail response carries every announcement's full HTML in one
+JSON document. Instead of decoding it whole, the response body is spooled
+(in memory up to a limit, then to a temporary file) and walked with ijson,
+building one array element at a time so each can be processed and
+released before the next is read. ijson is optional (the "streaming"
+extra); without it callers fall back to decoding the whole response
+"""
+
+import os
+import tempfile
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+# Response bytes kept in memory before spooling to a temporary file (IHALE_STREAM_SPOOL_BYTES)
+DEFAULT_SPOOL_BYTES = int(os.environ.get("IHALE_STREAM_SPOOL_BYTES", str(1024 * 1024)))
+
+# Whether tender details are parsed incrementally (IHALE_STREAM_DETAILS: auto, 1 or 0);
+# "auto" streams when ijson is installed
+STREAM_DETAILS = os.environ.get("IHALE_STREAM_DETAILS", "auto").lower()
+
+_available: Optional[bool] = None
+
+
+def streaming_available() -> bool:
+    """Whether ijson can be imported (checked once)"""
+    global _available
+    if _available is None:
+        try:
+            import ijson  # noqa: F401
+            _available = True
+        except ImportError:
+            _available = False
+    return _available
+
+
+def stream_details_enabled(setting: Optional[bool] = None) -> bool:
+    """Resolve an explicit on/off setting, or STREAM_DETAILS, against ijson being installed"""
+    if setting is None:
+        setting = STREAM_DETAILS not in ("0", "false", "no")
+    return setting and streaming_available()
+
+
+def spool_file(max_bytes: int = DEFAULT_SPOOL_BYTES) -> BinaryIO:
+    """A binary file that stays in memory up to `max_bytes`, then moves to disk"""
+    return tempfile.SpooledTemporaryFile(max_size=max_bytes, mode="w+b")
+
+
+def iter_members(fh: BinaryIO, object_path: str, array_key: str) -> Iterator[Tuple[str, Any]]:
+    """Walk the object at `object_path`, yielding its members as they are parsed
+
+    Yields ("field", (key, value)) for every member except `array_key`,
+    and ("item", value) for each element of the `array_key` array, built
+    one at a time. Nothing is yielded if the object is missing or null.
+    `object_path` is an ijson prefix ("" for the document root).
+    """
+    import ijson
+
+    array_path = f"{object_path}.{array_key}" if object_path else array_key
+    item_path = f"{array_path}.item"
+    field_prefix = f"{object_path}." if object_path else ""
+
+    key: Optional[str] = None
+    builder = None
+    element = None
+    for prefix, event, value in ijson.parse(fh, use_float=True):
+        if element is not None:
+            element.event(event, value)
+            if prefix == item_path and event in ("end_map", "end_array"):
+                yield "item", element.value
+                element = None
+            continue
+        if prefix == item_path:
+            # Scalar elements arrive as a single event
+            if event in ("start_map", "start_array"):
+                element = ijson.ObjectBuilder()
+                element.event(event, value)
+            else:
+                yield "item", value
+            continue
+        if prefix == object_path and event in ("map_key", "end_map"):
+            if builder is not None:
+                yield "field", (key, builder.value)
+                builder = None
+            if event == "map_key":
+                key = value
+                if key != array_key:
+                    builder = ijson.ObjectBuilder()
+            continue
+        if builder is not None and prefix.startswith(field_prefix):
+            builder.event(event, value)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Turkish-aware text normalization and fuzzy matching
+Python's str.lower()/upper() get the dotted/dotless I wrong for Turkish
+("İSTANBUL".lower() is "i̇stanbul"). These helpers case-map Turkish text
+correctly, build diacritic-insensitive keys, and provide a small trigram
+index for typo-tolerant lookups of provinces, authorities and OKAS codes
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_LOWER_MAP = str.maketrans({"İ": "i", "I": "ı"})
+_UPPER_MAP = str.maketrans({"i": "İ", "ı": "I"})
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def turkish_lower(text: str) -> str:
+    """Lowercase with Turkish rules (İ→i, I→ı)"""
+    return text.translate(_LOWER_MAP).lower()
+
+
+def turkish_upper(text: str) -> str:
+    """Uppercase with Turkish rules (i→İ, ı→I)"""
+    return text.translate(_UPPER_MAP).upper()
+
+
+def fold(text: str) -> str:
+    """Case- and diacritic-insensitive key for Turkish text
+
+    İ/I/ı/i all fold to "i", ç→c, ğ→g, ö→o, ş→s, ü→u, and whitespace is
+    collapsed, so "İSTANBUL", "istanbul" and "Istanbul" share one key.
+    """
+    text = text.replace("İ", "i").replace("I", "i").replace("ı", "i").lower()
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def fold_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """fold() a text, keeping the offset in `text` of every folded character
+
+    Whitespace runs are collapsed but not stripped, so the folded text still
+    lines up with the original; a match at folded[i:j] covers
+    text[offsets[i]:offsets[j - 1] + 1].
+    """
+    folded: List[str] = []
+    offsets: List[int] = []
+    char_keys: Dict[str, str] = {}
+    in_space = False
+    for index, char in enumerate(text):
+        if char.isspace():
+            if not in_space:
+                folded.append(" ")
+                offsets.append(index)
+            in_space = True
+            continue
+        in_space = False
+        key = char_keys.get(char)
+        if key is None:
+            key = char_keys[char] = fold(char)
+        folded.append(key)
+        offsets.extend([index] * len(key))
+    return "".join(folded), offsets
+
+
+def normalize_term(text: str) -> str:
+    """Trim and collapse whitespace in a user-typed search term"""
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def trigrams(key: str) -> Set[str]:
+    """Character trigrams of a folded key, padded so short words still match"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex(Generic[T]):
+    """In-memory fuzzy lookup of values by name
+
+    Names are folded and split into trigrams held in an inverted index; a
+    query scores candidates by trigram overlap (Dice coefficient), with exact
+    and substring matches ranked first.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._values: List[T] = []
+        self._grams: List[int] = []
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, name: str, value: T) -> None:
+        """Index `value` under `name`; re-adding a name replaces its value"""
+        key = fold(name)
+        if not key:
+            return
+        position = self._positions.get(key)
+        if position is not None:
+            self._values[position] = value
+            return
+        position = len(self._keys)
+        self._positions[key] = position
+        self._keys.append(key)
+        self._values.append(value)
+        grams = trigrams(key)
+        self._grams.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(position)
+
+    def get(self, name: str) -> Optional[T]:
+        """Exact lookup on the folded name"""
+        position = self._positions.get(fold(name))
+        return self._values[position] if position is not None else None
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.3) -> List[Tuple[float, T]]:
+        """Best matches for `query` as (score, value), highest score first"""
+        key = fold(query)
+        if not key:
+            return []
+
+        query_grams = trigrams(key)
+        shared: Dict[int, int] = {}
+        for gram in query_grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        scored = []
+        for position, count in shared.items():
+            candidate = self._keys[position]
+            if candidate == key:
+                score = 1.0
+            else:
+                score = 2.0 * count / (len(query_grams) + self._grams[position])
+                if key in candidate:
+                    # Substring hits ("belediyesi" in "ankara buyuksehir belediyesi") rank just below exact
+                    score = max(score, 0.9)
+            if score >= min_score:
+                scored.append((score, position))
+
+        scored.sort(key=lambda item: (-item[0], len(self._keys[item[1]])))
+        return [(round(score, 3), self._values[position]) for score, position in scored[:limit]]
+
+
+def best_match(index: TrigramIndex, query: str, min_score: float = 0.5) -> Optional[Any]:
+    """Single best match above `min_score`, or None"""
+    matches = index.search(query, limit=1, min_score=min_score)
+    return matches[0][1] if matches else None
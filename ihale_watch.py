@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Saved searches refreshed on a schedule, reporting only new tenders
+A saved search is a named set of search_tenders parameters kept in the
+TenderStore. Each refresh pulls its matching tenders, stores their rows and
+records which tender IDs were seen, so a refresh reports only tenders that
+had not matched before. SavedSearchScheduler refreshes due searches in the
+background, staggered so a large set of daily searches doesn't hit EKAP at
+the same moment. Server processes sharing a store claim each due search in
+SQLite before refreshing it, so it is refreshed once however many run
+"""
+
+import asyncio
+import os
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional
+
+from ihale_client import EKAPClient
+from ihale_query import prepare_search_params
+from ihale_scheduler import Priority, request_context
+from ihale_store import TenderStore
+
+# Default refresh interval of a saved search (IHALE_SAVED_SEARCH_INTERVAL, seconds)
+DEFAULT_INTERVAL_SECONDS = float(os.environ.get("IHALE_SAVED_SEARCH_INTERVAL", str(24 * 3600)))
+
+# Due searches are spread over this window, each at a fixed offset derived from its name
+DEFAULT_STAGGER_SECONDS = float(os.environ.get("IHALE_SAVED_SEARCH_STAGGER", "900"))
+
+# Saved searches refreshed at the same time; they share the client's pool and request budget
+DEFAULT_REFRESH_CONCURRENCY = int(os.environ.get("IHALE_SAVED_SEARCH_CONCURRENCY", "4"))
+
+# How long a claimed search stays with a scheduler that stopped before recording its run
+CLAIM_LEASE_SECONDS = 3600.0
+
+
+def validate_search_params(search_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Check saved parameters the way a refresh will use them; raises ValueError"""
+    params = dict(search_params or {})
+    params.pop("skip", None)
+    params.pop("limit", None)
+    prepare_search_params(params)
+    return params
+
+
+async def refresh_saved_search(
+    client: EKAPClient,
+    store: TenderStore,
+    name: str,
+    search: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Run a saved search now and return the tenders it found for the first time
+
+    Date shortcuts such as announcement_date_filter="today" are resolved at
+    refresh time. The first successful refresh only records a baseline.
+
+    Only the first `max_results` matching tenders are pulled, so `new`
+    covers those rows only: with `truncated` set, tenders past the cap are
+    neither checked nor marked seen. A refresh that runs out of time part
+    way is recorded as a failed run and marks nothing seen (otherwise the
+    tenders it missed would be reported as new next time); it is returned
+    with `partial` set.
+    """
+    search = search or store.get_search(name)
+    if search is None:
+        return {"error": "Saved search not found", "name": name}
+
+    started_at = time.time()
+    result = await client.search_all_tenders(
+        max_results=search["max_results"],
+        include_document_urls=False,
+        **prepare_search_params(search["search_params"])
+    )
+    if result.get("error"):
+        message = result.get("message") or result["error"]
+        run = store.record_search_run(name, started_at, [], None, error=message)
+        return {"name": name, "run_id": run["run_id"], "error": result["error"], "message": message}
+
+    tenders = result.get("tenders", [])
+    store.upsert_tenders(tenders)
+    if result.get("partial"):
+        message = (
+            f"Refresh ran out of time after {len(tenders)} of {result.get('total_count', 0)} tenders; "
+            "nothing was marked seen"
+        )
+        run = store.record_search_run(name, started_at, [], result.get("total_count"), error=message)
+        return {
+            "name": name,
+            "run_id": run["run_id"],
+            "error": "Refresh incomplete",
+            "message": message,
+            "partial": True,
+            "total_count": result.get("total_count", 0),
+            "fetched_count": len(tenders)
+        }
+
+    run = store.record_search_run(
+        name, started_at, [tender["id"] for tender in tenders if tender.get("id") is not None],
+        result.get("total_count", 0)
+    )
+    new_ids = set(run["new_ids"])
+    return {
+        "name": name,
+        "run_id": run["run_id"],
+        "baseline": run["baseline"],
+        "total_count": result.get("total_count", 0),
+        "fetched_count": len(tenders),
+        "truncated": result.get("total_count", 0) > len(tenders),
+        "new_count": len(new_ids),
+        "new_tenders": [tender for tender in tenders if tender.get("id") in new_ids]
+    }
+
+
+def _stagger_offset(name: str, window: float) -> float:
+    """Fixed per-search offset within the stagger window"""
+    return (zlib.crc32(name.encode("utf-8")) / 0xFFFFFFFF) * window
+
+
+class SavedSearchScheduler:
+    """Background refresher of saved searches
+
+    Each search is due `interval` seconds after its last run, shifted by a
+    stable offset inside the stagger window. Due searches are refreshed at
+    SYNC priority with bounded concurrency, so interactive tool calls keep
+    precedence on the shared request scheduler. A search is refreshed only
+    after claiming it in the store (TenderStore.claim_search); one claimed by
+    another process is left to it.
+    """
+
+    def __init__(
+        self,
+        client: EKAPClient,
+        store_path,
+        stagger: float = DEFAULT_STAGGER_SECONDS,
+        concurrency: int = DEFAULT_REFRESH_CONCURRENCY,
+        poll_interval: float = 60.0
+    ):
+        self.client = client
+        self.store_path = store_path
+        self.stagger = stagger
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._store: Optional[TenderStore] = None
+        self._running: set = set()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stats = {"refreshed": 0, "failed": 0, "new_tenders": 0, "claimed_elsewhere": 0}
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+    def wake(self) -> None:
+        """Re-check due searches now (e.g. after one was saved)"""
+        self._wake.set()
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def next_due(self, search: Dict[str, Any]) -> float:
+        last_run = search["last_run"]
+        base = last_run["finished_at"] + search["interval_seconds"] if last_run else search["created_at"]
+        return base + _stagger_offset(search["name"], min(self.stagger, search["interval_seconds"]))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._worker is not None and not self._worker.done(),
+            "refreshing": sorted(self._running),
+            **self.stats
+        }
+
+    async def _refresh(self, semaphore: asyncio.Semaphore, search: Dict[str, Any]) -> bool:
+        """Refresh a due search; False if another scheduler claimed it first"""
+        name = search["name"]
+        last_run_id = search["last_run"]["run_id"] if search["last_run"] else None
+        async with semaphore:
+            if not self._store.claim_search(name, last_run_id, self.owner, CLAIM_LEASE_SECONDS):
+                self.stats["claimed_elsewhere"] += 1
+                return False
+            self._running.add(name)
+            try:
+                with request_context(Priority.SYNC, session="saved-searches"):
+                    result = await refresh_saved_search(self.client, self._store, name, search)
+            except Exception as e:
+                # Recorded as a failed run so the search isn't retried until its next interval
+                self._store.record_search_run(name, time.time(), [], None, error=str(e))
+                self.stats["failed"] += 1
+                return True
+            finally:
+                self._running.discard(name)
+                self._store.release_search(name, self.owner)
+        if result.get("error"):
+            self.stats["failed"] += 1
+        else:
+            self.stats["refreshed"] += 1
+            self.stats["new_tenders"] += result["new_count"]
+        return True
+
+    async def _run(self) -> None:
+        # Own connection: refreshes run in a background task alongside tool calls
+        self._store = TenderStore(self.store_path)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            self._wake.clear()
+            now = time.time()
+            searches = [search for search in self._store.list_searches() if search["name"] not in self._running]
+            due = [search for search in searches if self.next_due(search) <= now]
+            if due:
+                claimed = await asyncio.gather(*(self._refresh(semaphore, search) for search in due))
+                if any(claimed):
+                    continue
+                # Other processes are refreshing these; look again once they have recorded their runs
+
+            upcoming = [self.next_due(search) - now for search in searches if search not in due]
+            delay = min([self.poll_interval, *upcoming])
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(delay, 0.01))
+            except asyncio.TimeoutError:
+                pass
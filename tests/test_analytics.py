@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from ihale_analytics import LocalTenderIndex  # noqa: E402
+
+
+def _tender(tender_id, province, tender_datetime, type_="Mal", name="Asfalt alımı", document_count=1):
+    return {
+        "id": tender_id,
+        "name": name,
+        "province": province,
+        "type": {"description": type_},
+        "tender_datetime": tender_datetime,
+        "document_count": document_count,
+    }
+
+
+@pytest.fixture
+def index():
+    tenders = [
+        _tender(1, "ANKARA", "10.03.2025 09:30"),
+        _tender(2, "İSTANBUL", "11.03.2025 14:00", type_="Yapım", name="Yol YAPIM işi"),
+        _tender(3, "ANKARA", None, type_="Hizmet", document_count=0),
+        _tender(4, "İZMİR", "09.03.2025 10:00", type_="Yapım"),
+        _tender(5, "ANKARA", "12.03.2025 16:45"),
+    ]
+    details = {1: {"okas_codes": [{"code": "44113620"}], "characteristics": ["Elektronik ihale"]}}
+    return LocalTenderIndex(tenders, details)
+
+
+def _ids(result):
+    return [tender["id"] for tender in result["tenders"]]
+
+
+def test_and_or_not_filter_trees(index):
+    where = {"and": [
+        {"or": [{"field": "province", "in": ["ANKARA"]}, {"field": "type", "in": ["Yapım"]}]},
+        {"not": {"field": "province", "in": ["İZMİR"]}},
+        {"not": {"field": "document_count", "lt": 1}},
+    ]}
+
+    assert _ids(index.query(where, sort_by="id")) == [1, 2, 5]
+    assert _ids(index.query({"field": "name", "contains": "yapim"})) == [2]
+    assert _ids(index.query({"field": "okas", "prefix": "4411"})) == [1]
+    assert _ids(index.query({"field": "characteristic", "any": "elektronik"})) == [1]
+
+
+def test_time_of_day_filter_skips_rows_without_a_time(index):
+    morning = index.query({"field": "tender_time", "lt": "12:00"}, sort_by="id")
+    afternoon = index.query({"field": "tender_time", "gte": "12:00"}, sort_by="id")
+
+    assert _ids(morning) == [1, 4]
+    assert _ids(afternoon) == [2, 5]
+    with pytest.raises(ValueError):
+        index.query({"field": "tender_time", "lt": "noon"})
+
+
+def test_date_bounds_and_missing_datetimes_sort_last_both_ways(index):
+    assert _ids(index.query({"field": "tender_datetime", "lte": "2025-03-11"}, sort_by="id")) == [1, 2, 4]
+
+    assert _ids(index.query(sort_by="tender_datetime")) == [4, 1, 2, 5, 3]
+    assert _ids(index.query(sort_by="-tender_datetime")) == [5, 2, 1, 4, 3]
+
+
+def test_paging_and_facets(index):
+    result = index.query({"field": "province", "in": ["ANKARA"]}, sort_by="id", limit=2, facets=["type"])
+
+    assert _ids(result) == [1, 3] and result["next_offset"] == 2 and result["matched_count"] == 3
+    assert result["facet_counts"]["type"] == [{"value": "Mal", "count": 2}, {"value": "Hizmet", "count": 1}]
@@ -0,0 +1,106 @@
+import pytest
+
+from ihale_backend import BackendLayer, CacheLayer, build_backend
+from ihale_cache import MemoryCache, cache_key
+from ihale_client import EKAPClient
+
+
+class PagedBackend:
+    """search_tenders over a fixed row list; pages from `fail_from` on return an error"""
+
+    def __init__(self, total, fail_from=None, **extra):
+        self.rows = [{"id": tender_id} for tender_id in range(total)]
+        self.fail_from = fail_from
+        self.extra = extra
+
+    async def search_tenders(self, skip=0, limit=10, **search_params):
+        if self.fail_from is not None and skip >= self.fail_from:
+            return {"error": "API request failed with status 503"}
+        tenders = self.rows[skip:skip + limit]
+        return {"tenders": tenders, "total_count": len(self.rows), "returned_count": len(tenders), **self.extra}
+
+
+@pytest.mark.asyncio
+async def test_search_all_tenders_collects_every_page():
+    result = await BackendLayer(PagedBackend(25)).search_all_tenders(page_size=10)
+
+    assert [tender["id"] for tender in result["tenders"]] == list(range(25))
+    assert result["total_count"] == result["returned_count"] == 25
+
+
+@pytest.mark.asyncio
+async def test_search_all_tenders_returns_error_page():
+    result = await BackendLayer(PagedBackend(25, fail_from=10)).search_all_tenders(page_size=10)
+
+    assert result == {"error": "API request failed with status 503"}
+
+
+@pytest.mark.asyncio
+async def test_search_all_tenders_keeps_subsumed_by():
+    result = await BackendLayer(PagedBackend(5, subsumed_by="abc")).search_all_tenders(page_size=10)
+
+    assert result["subsumed_by"] == "abc"
+
+
+def test_live_backend_rejects_an_argument():
+    with pytest.raises(ValueError):
+        build_backend("live:/data/ekap.db")
+
+
+@pytest.mark.parametrize("spec, cache_type", [
+    ("cache:none,live", None),
+    ("cache:memory,live", "MemoryCache"),
+    ("cache,live", "MemoryCache"),
+])
+def test_cache_layer_kind(monkeypatch, spec, cache_type):
+    monkeypatch.delenv("IHALE_CACHE", raising=False)
+    backend = build_backend(spec)
+
+    assert type(backend).__name__ == "CacheLayer"
+    assert (type(backend.cache).__name__ if backend.cache else None) == cache_type
+    assert (type(backend.document_url_cache).__name__ if backend.document_url_cache else None) == cache_type
+
+
+@pytest.mark.asyncio
+async def test_cache_none_passes_calls_through():
+    inner = PagedBackend(3)
+    backend = CacheLayer(inner, "none")
+    calls = []
+    original = inner.search_tenders
+
+    async def counting(**params):
+        calls.append(params)
+        return await original(**params)
+
+    inner.search_tenders = counting
+    await backend.search_tenders(search_text="asfalt")
+    await backend.search_tenders(search_text="asfalt")
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_document_urls_from_cache_only_never_fetch(monkeypatch):
+    cache = MemoryCache()
+    key = cache_key("document_url", {"tender_id": 1, "islem_id": "1"})
+    cache.set(key, {"success": True, "document_url": "u1"}, ttl=60)
+    client = EKAPClient(document_url_cache=cache)
+    fetched = []
+
+    async def get_tender_document_url(tender_id, islem_id="1"):
+        fetched.append(tender_id)
+        return {"success": True, "document_url": f"u{tender_id}"}
+
+    monkeypatch.setattr(client, "get_tender_document_url", get_tender_document_url)
+    try:
+        cache_only = await client.get_tender_document_urls([1, 2, 1], cache_only=True)
+        assert fetched == []
+        assert cache_only["document_urls"] == {1: "u1", 2: None}
+        assert cache_only["from_cache_count"] == 1 and cache_only["resolved_count"] == 1
+        assert cache_only["errors"] == {} and cache_only["cache_only"] is True
+
+        fetch = await client.get_tender_document_urls([1, 2])
+        assert fetched == [2]
+        assert fetch["document_urls"] == {1: "u1", 2: "u2"}
+    finally:
+        await client.aclose()
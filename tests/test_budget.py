@@ -0,0 +1,50 @@
+import json
+
+from ihale_budget import MARKER_KEY, budget_from_meta, fit_to_budget, json_size
+
+
+def _result(count=50, markdown_chars=4000):
+    return {
+        "tenders": [
+            {"id": index, "markdown_content": "x" * markdown_chars, "content_preview": "preview", "name": "ad " * 200}
+            for index in range(count)
+        ],
+        "total_count": 500,
+        "truncated": True,
+    }
+
+
+def test_json_size_matches_compact_json():
+    value = {"a": [1, 2.5, None, True, False, "İhale"], "b": {"c": "ş"}}
+    assert json_size(value) == len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def test_result_within_budget_is_untouched():
+    result = {"tenders": [{"id": 1}], "truncated": False}
+    assert fit_to_budget(result, 10_000) == (result, None)
+
+
+def test_over_budget_result_fits_and_keeps_tool_truncated_flag():
+    result = _result()
+    fitted, marker = fit_to_budget(result, 4000)
+
+    assert json_size(fitted) <= 4000
+    assert fitted["truncated"] is True
+    assert fitted[MARKER_KEY] is marker
+    assert marker["steps"][0] == "markdown_dropped"
+    assert "lists_capped" in marker["steps"]
+    # The caller's result is not modified
+    assert result["tenders"][0]["markdown_content"]
+
+
+def test_markdown_dropped_first_keeps_previews():
+    fitted, marker = fit_to_budget(_result(count=3), 3000)
+    assert marker["steps"] == ["markdown_dropped"]
+    assert all(tender["markdown_content"] is None and tender["content_preview"] for tender in fitted["tenders"])
+
+
+def test_budget_from_meta():
+    assert budget_from_meta({"max_response_bytes": 2000}) == 2000
+    assert budget_from_meta({"max_response_tokens": "500"}) == 2000
+    assert budget_from_meta({"max_response_bytes": "lots"}) is None
+    assert budget_from_meta(None) is None
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from ihale_cache import MemoryCache, cached
+from ihale_deadline import DeadlineExceeded, deadline, within_deadline
+from ihale_profile import collect_call_stats, timed
+
+
+class SlowSource:
+    """Minimal EKAPClient-like object with one cached method"""
+
+    def __init__(self, seconds):
+        self.cache = MemoryCache()
+        self._inflight = {}
+        self.seconds = seconds
+        self.calls = 0
+
+    @cached("details")
+    async def get_tender_details(self, tender_id):
+        self.calls += 1
+        try:
+            with timed("ekap"):
+                await within_deadline(asyncio.sleep(self.seconds))
+        except DeadlineExceeded:
+            return {"tender_id": tender_id, "partial": True}
+        return {"tender_id": tender_id}
+
+
+@pytest.mark.asyncio
+async def test_joining_caller_applies_its_own_deadline():
+    source = SlowSource(0.3)
+    background = asyncio.ensure_future(source.get_tender_details(1))
+    await asyncio.sleep(0)
+
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            await source.get_tender_details(1)
+
+    # The shared fetch keeps going for the caller that started it, and is cached
+    assert await background == {"tender_id": 1}
+    assert await source.get_tender_details(1) == {"tender_id": 1}
+    assert source.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_joining_caller_refetches_result_cut_short_by_starters_deadline():
+    source = SlowSource(0.1)
+
+    async def starter():
+        with deadline(0.03):
+            return await source.get_tender_details(1)
+
+    started = asyncio.ensure_future(starter())
+    await asyncio.sleep(0)
+    with deadline(5):
+        joined = await source.get_tender_details(1)
+
+    assert (await started).get("partial")
+    assert joined == {"tender_id": 1}
+    assert source.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_fetch_time_is_credited_to_each_waiting_call():
+    source = SlowSource(0.05)
+    background = asyncio.ensure_future(source.get_tender_details(1))
+    await asyncio.sleep(0)
+
+    with collect_call_stats() as stats:
+        await source.get_tender_details(1)
+    await background
+
+    assert stats.counts["ekap"] == 1
+    assert stats.seconds["ekap"] > 0
+
+
+class CatalogSource:
+    """search_okas_codes-like method whose fuzzy fallback depends on a growing catalog"""
+
+    def __init__(self):
+        self.cache = MemoryCache()
+        self._inflight = {}
+        self.catalog = []
+
+    @cached("okas")
+    async def search_okas_codes(self, search_term=""):
+        return {"okas_codes": list(self.catalog), "fuzzy_matches": True}
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_results_are_not_cached():
+    source = CatalogSource()
+    assert (await source.search_okas_codes("asfalt"))["okas_codes"] == []
+
+    source.catalog.append({"code": "44113600"})
+    assert (await source.search_okas_codes("asfalt"))["okas_codes"] == [{"code": "44113600"}]
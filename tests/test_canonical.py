@@ -0,0 +1,93 @@
+import pytest
+
+from ihale_cache import MemoryCache
+from ihale_canonical import CanonicalQuery, CompleteResults
+
+ANKARA, CANAKKALE, ISTANBUL = 251, 266, 284
+
+ROWS = [
+    {"id": 1, "province": "ANKARA", "tender_datetime": "03.06.2024 10:00", "type": {"code": 1}},
+    {"id": 2, "province": "Çanakkale", "tender_datetime": "15.06.2024 14:30", "type": {"code": 2}},
+    {"id": 3, "province": "İSTANBUL", "tender_datetime": "28.06.2024 09:00", "type": {"code": 1}},
+]
+
+
+def query(**params):
+    return CanonicalQuery.from_params({"search_text": "asfalt", **params})
+
+
+def test_equivalent_spellings_share_a_key():
+    assert query(provinces=[CANAKKALE, ANKARA, ANKARA]).key == query(provinces=[ANKARA, CANAKKALE]).key
+    assert query(sort_order="desc", tender_date_start="not a date") == query()
+
+
+@pytest.mark.parametrize("narrow, expected", [
+    ({"tender_date_start": "2024-06-10", "tender_date_end": "2024-06-20"}, True),
+    ({"tender_date_start": "2024-06-01", "tender_date_end": "2024-06-30"}, True),
+    ({"tender_date_start": "2024-05-31", "tender_date_end": "2024-06-20"}, False),
+    ({"tender_date_start": "2024-06-10"}, False),
+])
+def test_date_range_subsumption(narrow, expected):
+    broad = query(tender_date_start="2024-06-01", tender_date_end="2024-06-30")
+
+    assert broad.subsumes(query(**narrow)) is expected
+
+
+@pytest.mark.parametrize("narrow, expected", [
+    ([ANKARA], True),
+    ([ANKARA, CANAKKALE], True),
+    ([ANKARA, ISTANBUL], False),
+    (None, False),
+])
+def test_province_subset_subsumption(narrow, expected):
+    broad = query(provinces=[ANKARA, CANAKKALE])
+
+    assert broad.subsumes(query(provinces=narrow)) is expected
+
+
+def test_other_filters_must_match_exactly():
+    assert not query(provinces=[ANKARA]).subsumes(query(provinces=[ANKARA], e_ihale=True))
+    assert not query().subsumes(CanonicalQuery.from_params({"search_text": "yol"}))
+
+
+def test_filter_rows_checks_added_constraints():
+    broad = query()
+
+    by_province = query(provinces=[CANAKKALE, ISTANBUL]).filter_rows(ROWS, broad)
+    by_date = query(tender_date_start="2024-06-10", tender_date_end="2024-06-20").filter_rows(ROWS, broad)
+
+    assert [row["id"] for row in by_province] == [2, 3]
+    assert [row["id"] for row in by_date] == [2]
+
+
+def test_filter_rows_returns_none_when_a_row_lacks_the_field():
+    rows = ROWS + [{"id": 4, "tender_datetime": "20.06.2024 10:00"}]
+
+    assert query(provinces=[ANKARA]).filter_rows(rows, query()) is None
+    assert query(tender_date_start="2024-06-10").filter_rows([{"id": 5}], query()) is None
+
+
+def test_complete_results_answer():
+    cache = MemoryCache()
+    complete = CompleteResults()
+    broad = query(tender_date_start="2024-06-01", tender_date_end="2024-06-30")
+    complete.remember(cache, broad, [dict(row, document_url="https://ekap") for row in ROWS], ttl=60)
+
+    narrow = query(tender_date_start="2024-06-10", tender_date_end="2024-06-30", provinces=[ISTANBUL])
+
+    broader, rows = complete.answer(cache, narrow)
+
+    assert broader == broad
+    assert [row["id"] for row in rows] == [3]
+    assert "document_url" not in rows[0]
+    assert complete.answer(cache, query(tender_date_start="2024-05-01")) is None
+
+
+def test_complete_results_forget_expired_rows():
+    cache = MemoryCache()
+    complete = CompleteResults()
+    complete.remember(cache, query(), ROWS, ttl=60)
+    cache.delete(f"{CompleteResults.NAMESPACE}:{query().key}")
+
+    assert complete.answer(cache, query(provinces=[ANKARA])) is None
+    assert not complete._queries
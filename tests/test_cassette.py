@@ -0,0 +1,47 @@
+import httpx
+import pytest
+
+from ihale_cassette import CassetteMiss, RecordingTransport, ReplayTransport
+
+
+def _ekap(request):
+    payload = request.content.decode() or "{}"
+    return httpx.Response(200, json={"url": str(request.url), "payload": payload, "ad": "Ankara Büyükşehir"})
+
+
+async def _record(path, requests):
+    transport = RecordingTransport(httpx.MockTransport(_ekap), str(path))
+    async with httpx.AsyncClient(transport=transport) as client:
+        responses = [(await client.post(url, json=payload)).json() for url, payload in requests]
+    return transport, responses
+
+
+@pytest.mark.asyncio
+async def test_recorded_exchanges_replay_without_the_network(tmp_path):
+    path = tmp_path / "ekap.jsonl.gz"
+    requests = [("https://ekap.test/ihale", {"sayfa": 1}), ("https://ekap.test/ihale", {"sayfa": 2})]
+    transport, recorded = await _record(path, requests)
+
+    assert transport.recorded == 2
+    replay = ReplayTransport(str(path), latency=0)
+    async with httpx.AsyncClient(transport=replay) as client:
+        # Payload key order doesn't matter for matching
+        replayed = [(await client.post(url, json=payload)).json() for url, payload in reversed(requests)]
+        with pytest.raises(CassetteMiss):
+            await client.post("https://ekap.test/ihale", json={"sayfa": 3})
+
+    assert replayed == list(reversed(recorded))
+    assert replay.replayed == 2 and replay.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_sessions_append_and_a_cut_off_last_entry_is_skipped(tmp_path):
+    path = tmp_path / "ekap.jsonl.gz"
+    await _record(path, [("https://ekap.test/a", {})])
+    await _record(path, [("https://ekap.test/b", {})])
+    # A recorder killed mid-write leaves a truncated gzip member at the end
+    path.write_bytes(path.read_bytes() + path.read_bytes()[:20])
+
+    replay = ReplayTransport(str(path), latency=0)
+
+    assert len(replay) == 2
@@ -0,0 +1,41 @@
+from ihale_chunks import chunk_markdown, outline
+
+TABLE = "| Kalem | Miktar |\n|---|---|\n" + "".join(f"| Malzeme {n} | {n} adet |\n" for n in range(40))
+TEXT = "# Teknik Şartname\n\nGenel hükümler.\n\n## Malzeme Listesi\n\n" + TABLE + "\n## Teslim\n\nTeslim yeri.\n"
+
+
+def test_paging_with_next_offset_covers_the_text_exactly_once():
+    pieces = []
+    offset = 0
+    while offset is not None:
+        chunk = chunk_markdown(TEXT, offset, max_chars=200)
+        assert chunk["offset"] == offset and chunk["total_chars"] == len(TEXT)
+        body = chunk["content"]
+        if chunk["table_header_repeated"]:
+            body = body[len("| Kalem | Miktar |\n|---|---|\n"):]
+        pieces.append(body)
+        offset = chunk["next_offset"]
+
+    assert "".join(pieces) == TEXT
+    assert len(pieces) > 3
+
+
+def test_chunk_inside_a_table_repeats_its_header_and_ends_between_rows():
+    start = TEXT.index("| Malzeme 10 |")
+    chunk = chunk_markdown(TEXT, start, max_chars=200)
+
+    assert chunk["table_header_repeated"] is True
+    assert chunk["content"].startswith("| Kalem | Miktar |\n|---|---|\n| Malzeme 10 |")
+    assert chunk["content"].endswith(" adet |\n")
+    assert chunk["section"] == "Malzeme Listesi"
+
+
+def test_chunks_outside_tables_and_the_last_chunk():
+    first = chunk_markdown(TEXT, 0, max_chars=60)
+    last = chunk_markdown(TEXT, TEXT.index("## Teslim"), max_chars=1000)
+
+    assert not first["table_header_repeated"]
+    # Ends before the next heading rather than mid-paragraph
+    assert first["content"] == "# Teknik Şartname\n\nGenel hükümler.\n\n"
+    assert last["next_offset"] is None and last["section"] == "Teslim"
+    assert [heading["title"] for heading in outline(TEXT)] == ["Teknik Şartname", "Malzeme Listesi", "Teslim"]
@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+import pytest
+
+from ihale_cli import HANDLERS, build_parser
+
+
+class FakeClient:
+    """get_tender_details answering out of order; tender 404 doesn't exist"""
+
+    async def get_tender_details(self, tender_id, convert_announcements=True):
+        await asyncio.sleep(0.01 * (5 - tender_id % 5))
+        if tender_id == 404:
+            return {"error": "Tender not found"}
+        return {"id": tender_id, "markdown": convert_announcements}
+
+
+async def _run(argv):
+    args = build_parser().parse_args(argv)
+    return await HANDLERS[args.command](FakeClient(), args)
+
+
+@pytest.mark.asyncio
+async def test_details_reads_ids_and_search_rows_and_writes_jsonl_in_input_order(tmp_path):
+    input_path = tmp_path / "ids.txt"
+    input_path.write_text('# from a search\n3\n\n{"id": 2, "name": "İhale"}\n4\n', encoding="utf-8")
+    output_path = tmp_path / "details.jsonl"
+
+    status = await _run(["details", "1", "--input", str(input_path), "--no-markdown", "-o", str(output_path)])
+
+    rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert status == 0
+    assert [row["tender_id"] for row in rows] == [1, 3, 2, 4]
+    assert all(row["markdown"] is False for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_failed_rows_are_written_and_set_the_exit_status(tmp_path):
+    output_path = tmp_path / "details.jsonl"
+
+    status = await _run(["details", "1", "404", "-o", str(output_path)])
+
+    rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert status == 1
+    assert rows[1] == {"error": "Tender not found", "tender_id": 404}
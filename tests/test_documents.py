@@ -0,0 +1,156 @@
+import hashlib
+
+import httpx
+import pytest
+
+import ihale_documents
+from ihale_documents import DocumentStore
+
+URL = "https://ekap.example/documents/1"
+BODY = bytes(range(256)) * 40
+
+
+class FakeClient:
+    """get_tender_document_urls answering from a fixed tender -> URL map"""
+
+    def __init__(self, urls):
+        self.urls = urls
+
+    async def get_tender_document_urls(self, tender_ids, **kwargs):
+        return {"document_urls": {tender_id: self.urls.get(tender_id) for tender_id in tender_ids}, "errors": {}}
+
+
+class FakeServer:
+    """Serves BODY with an ETag, honouring Range only when If-Range matches"""
+
+    def __init__(self, body=BODY, etag='"v1"', range_start_offset=0):
+        self.body = body
+        self.etag = etag
+        self.range_start_offset = range_start_offset
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        headers = {"etag": self.etag, "content-type": "application/pdf"}
+        range_header = request.headers.get("range")
+        if range_header and request.headers.get("if-range") == self.etag:
+            start = int(range_header.split("=")[1].rstrip("-")) + self.range_start_offset
+            headers["content-range"] = f"bytes {start}-{len(self.body) - 1}/{len(self.body)}"
+            return httpx.Response(206, headers=headers, content=self.body[start:])
+        return httpx.Response(200, headers=headers, content=self.body)
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    stores = []
+
+    def make(server, urls=None):
+        store = DocumentStore(FakeClient(urls or {1: URL}), root=str(tmp_path / "documents"))
+        store._http_client = httpx.AsyncClient(transport=httpx.MockTransport(server))
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store._index.close()
+
+
+def _leave_partial(store, content, validator='"v1"'):
+    partial_path = store._partial_path(URL)
+    partial_path.write_bytes(content)
+    if validator:
+        store._validator_path(partial_path).write_text(validator)
+    return partial_path
+
+
+def _stored(store, handle):
+    return store.resolve_handle(handle["handle"]).read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_partial_file(make_store):
+    server = FakeServer()
+    store = make_store(server)
+    _leave_partial(store, BODY[:1000])
+
+    handle = await store.download(1, URL)
+
+    assert handle["resumed"]
+    assert server.requests[0].headers["range"] == "bytes=1000-"
+    assert handle["handle"] == "sha256:" + hashlib.sha256(BODY).hexdigest()
+    assert _stored(store, handle) == BODY
+
+
+@pytest.mark.asyncio
+async def test_changed_document_restarts_from_scratch(make_store):
+    # The server's ETag moved on, so If-Range fails and it sends the whole new file
+    server = FakeServer(etag='"v2"')
+    store = make_store(server)
+    _leave_partial(store, b"stale bytes of the old version")
+
+    handle = await store.download(1, URL)
+
+    assert not handle["resumed"]
+    assert _stored(store, handle) == BODY
+
+
+@pytest.mark.asyncio
+async def test_partial_without_validator_is_not_resumed(make_store):
+    server = FakeServer()
+    store = make_store(server)
+    _leave_partial(store, BODY[:1000], validator=None)
+
+    handle = await store.download(1, URL)
+
+    assert "range" not in server.requests[0].headers
+    assert _stored(store, handle) == BODY
+
+
+@pytest.mark.asyncio
+async def test_mismatched_content_range_is_not_appended(make_store):
+    server = FakeServer(range_start_offset=10)
+    store = make_store(server)
+    _leave_partial(store, BODY[:1000])
+
+    handle = await store.download(1, URL)
+
+    assert len(server.requests) == 2
+    assert _stored(store, handle) == BODY
+
+
+@pytest.mark.asyncio
+async def test_identical_documents_are_stored_once(make_store):
+    other_url = "https://ekap.example/documents/2"
+    store = make_store(FakeServer(), urls={1: URL, 2: other_url})
+
+    result = await store.download_tender_documents([1, 2], concurrency=1)
+
+    first, second = result["documents"][1][0], result["documents"][2][0]
+    assert first["handle"] == second["handle"]
+    assert [first["deduplicated"], second["deduplicated"]] == [False, True]
+    assert len(list(store.objects_dir.rglob("*"))) == 2  # one prefix directory, one object
+
+
+@pytest.mark.asyncio
+async def test_refresh_downloads_again(make_store):
+    server = FakeServer()
+    store = make_store(server)
+
+    await store.download_tender_documents([1])
+    cached = await store.download_tender_documents([1])
+    refreshed = await store.download_tender_documents([1], refresh=True)
+
+    assert len(server.requests) == 2
+    assert cached["downloaded_count"] == 0
+    assert refreshed["downloaded_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_oversized_download_leaves_no_partial(make_store, monkeypatch):
+    monkeypatch.setattr(ihale_documents, "MAX_DOCUMENT_BYTES", 1000)
+    store = make_store(FakeServer())
+
+    result = await store.download_tender_documents([1])
+
+    assert "exceeds" in result["errors"][1]
+    assert not list(store.partial_dir.iterdir())
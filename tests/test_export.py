@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+from ihale_export import resolve_export_path
+
+
+def test_relative_names_stay_inside_export_dir(tmp_path):
+    assert resolve_export_path("tenders.jsonl", tmp_path) == tmp_path.resolve() / "tenders.jsonl"
+    assert resolve_export_path("ankara/tenders.csv", tmp_path) == tmp_path.resolve() / "ankara" / "tenders.csv"
+
+
+@pytest.mark.parametrize("name", ["/etc/passwd", "~/.bashrc", "../outside.jsonl", "a/../../outside.jsonl", "", "."])
+def test_paths_outside_export_dir_are_rejected(tmp_path, name):
+    with pytest.raises(ValueError):
+        resolve_export_path(name, tmp_path)
+
+
+def test_symlink_out_of_export_dir_is_rejected(tmp_path):
+    root = tmp_path / "exports"
+    root.mkdir()
+    os.symlink(tmp_path, root / "escape")
+    with pytest.raises(ValueError):
+        resolve_export_path("escape/tenders.jsonl", root)
@@ -0,0 +1,83 @@
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from ihale_extract import DocumentExtractor, search_texts
+
+
+def _write_archive(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("teknik_sartname.txt", "Teknik şartname metni")
+        archive.writestr("idari_sartname.txt", "İdari şartname metni")
+        archive.writestr("sifreli.txt", "gizli")
+    data = bytearray(path.read_bytes())
+    # Corrupt the idari_sartname.txt data so its CRC check fails
+    data[data.index("İdari".encode())] = ord("X")
+    # Mark sifreli.txt encrypted in the central directory: reading it needs a password
+    header = data.index(b"sifreli.txt", data.index(b"PK\x01\x02")) - 46
+    data[header + 8] |= 0x1
+    path.write_bytes(bytes(data))
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    extractor = DocumentExtractor(SimpleNamespace(root=tmp_path), max_workers=1)
+    yield extractor
+    extractor._get_pool().shutdown()
+
+
+def _handle(path):
+    return {"handle": "sha256:" + "0" * 64, "path": str(path), "filename": path.name}
+
+
+@pytest.mark.asyncio
+async def test_damaged_zip_entries_are_reported_per_file(tmp_path, extractor):
+    archive = tmp_path / "dokuman.zip"
+    _write_archive(archive)
+
+    files = {file["name"]: file for file in await extractor.extract(_handle(archive))}
+
+    assert files["teknik_sartname.txt"]["error"] is None
+    assert "Teknik şartname" in extractor.read_text(files["teknik_sartname.txt"]["sha256"])
+    assert files["idari_sartname.txt"]["error"].startswith("BadZipFile")
+    assert files["sifreli.txt"]["error"].startswith("RuntimeError")
+    # A listing with failures isn't cached
+    assert not list(extractor.manifest_dir.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_unreadable_central_directory_is_an_error_record(tmp_path, extractor):
+    archive = tmp_path / "dokuman.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("sartname.txt", "metin")
+    data = archive.read_bytes()
+    position = data.index(b"PK\x01\x02")
+    archive.write_bytes(data[:position] + b"XXXX" + data[position + 4:])
+
+    files = await extractor.extract(_handle(archive))
+
+    assert len(files) == 1
+    assert files[0]["name"] == "dokuman.zip"
+    assert files[0]["error"].startswith("BadZipFile")
+
+
+def test_search_ignores_turkish_case_and_diacritics():
+    text = "Giriş\nİHALE konusu: ŞARTNAME\nşartnamede yazan"
+    result = search_texts({"a.txt": text}, "ihale konusu: sartname", context_chars=0)
+
+    assert result["total_matches"] == 1
+    match = result["matches"][0]
+    assert match["snippet"] == "İHALE konusu: ŞARTNAME"
+    assert match["offset"] == text.index("İHALE")
+    assert match["line"] == 2
+
+    assert search_texts({"a.txt": text}, "Sartname")["match_counts"] == {"a.txt": 2}
+
+
+def test_search_matches_across_line_breaks_and_maps_offsets_back():
+    text = "birim   fiyat\n\nteklif cetveli"
+    result = search_texts({"a.txt": text}, "FİYAT TEKLİF", context_chars=0)
+
+    assert result["matches"][0]["snippet"] == "fiyat\n\nteklif"
+    assert search_texts({"a.txt": text}, "   ")["total_matches"] == 0
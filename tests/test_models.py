@@ -0,0 +1,43 @@
+import pytest
+
+from ihale_models import PLATE_TO_API_ID, REGISTRY, CodeTable
+
+
+def test_code_table_codes_and_descriptions_both_ways():
+    types = REGISTRY.tender_types
+
+    assert types.code("2") == types.code(2) == 2
+    assert types.description(2) == "Yapım (Construction/Infrastructure projects)"
+    assert types.description(9, default="?") == "?"
+    assert types.code_for("YAPIM") == types.code_for("construction/infrastructure projects") == 2
+    assert types.resolve("danismanlik") == 4 and types.resolve(5) is None
+    assert 3 in types and "Hizmet" not in types
+
+    methods = REGISTRY.tender_methods
+    assert methods.code("AÇIK") == "Açık"
+    assert methods.resolve("open tender method") == "Açık"
+
+
+def test_code_table_aliases_keep_the_first_code():
+    table = CodeTable("t", {1: "Mal (Goods)", 2: "Mal"})
+
+    assert table.code_for("mal") == 1
+    assert table.as_list()[0] == {"code": 1, "description": "Mal (Goods)"}
+
+
+@pytest.mark.parametrize("plate, api_id, name", [(6, 251, "ANKARA"), (34, 284, "İSTANBUL"), (17, 266, "ÇANAKKALE")])
+def test_plate_and_api_id_lookups_round_trip(plate, api_id, name):
+    provinces = REGISTRY.provinces
+
+    assert provinces.api_id(plate) == api_id
+    assert provinces.plate(api_id) == plate
+    assert provinces.name(plate) == provinces.name_for_api_id(api_id) == name
+    assert provinces.resolve(str(plate).zfill(2)) == provinces.resolve(name.lower()) == plate
+
+
+def test_every_province_maps_one_to_one():
+    provinces = REGISTRY.provinces
+
+    assert len(provinces) == 81 == len(set(PLATE_TO_API_ID.values()))
+    assert all(provinces.plate(provinces.api_id(plate)) == plate for plate in range(1, 82))
+    assert provinces.api_id(None) is None and provinces.resolve(82) is None and provinces.resolve("Atlantis") is None
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from ihale_deadline import deadline, within_deadline
+from ihale_prefetch import Prefetcher
+
+
+class FakeClient:
+    """Stands in for EKAPClient: each fetch honours the current deadline"""
+
+    def __init__(self):
+        self.cache = object()
+        self.fetched = []
+
+    async def get_tender_details(self, tender_id):
+        await within_deadline(asyncio.sleep(0.01))
+        self.fetched.append(("details", tender_id))
+
+    async def get_tender_announcements(self, tender_id):
+        await within_deadline(asyncio.sleep(0.01))
+        self.fetched.append(("announcements", tender_id))
+
+
+async def _drain(prefetcher):
+    for _ in range(100):
+        if not prefetcher.status()["queued"] and not prefetcher.status()["active"]:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_prefetch_does_not_inherit_scheduling_calls_deadline():
+    client = FakeClient()
+    prefetcher = Prefetcher(client, top_k=5, idle_delay=0)
+    try:
+        with deadline(0.05):
+            prefetcher.schedule([1])
+        await _drain(prefetcher)
+        await asyncio.sleep(0.1)
+
+        # Scheduled after the first call's deadline has long passed
+        prefetcher.schedule([2])
+        await _drain(prefetcher)
+    finally:
+        await prefetcher.aclose()
+
+    assert prefetcher.stats["failed"] == 0
+    assert prefetcher.stats["completed"] == 2
+    assert ("details", 2) in client.fetched and ("announcements", 2) in client.fetched
+
+
+@pytest.mark.asyncio
+async def test_search_with_prefetch_top_k_zero_cancels_queued_prefetches(monkeypatch):
+    from fastmcp import Client
+
+    import ihale_mcp
+
+    async def search_tenders(**params):
+        return {"tenders": [{"id": 3}], "total_count": 1, "returned_count": 1}
+
+    monkeypatch.setattr(ihale_mcp.ekap_client, "search_tenders", search_tenders)
+    prefetcher = ihale_mcp.prefetcher
+    async with Client(ihale_mcp.mcp) as client:
+        prefetcher._queue.extend([1, 2])
+        cancelled = prefetcher.stats["cancelled"]
+
+        await client.call_tool("search_tenders", {"search_text": "asfalt", "prefetch_top_k": 0})
+
+        assert not prefetcher._queue
+        assert prefetcher.stats["cancelled"] == cancelled + 2
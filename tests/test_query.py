@@ -0,0 +1,38 @@
+import pytest
+
+from ihale_query import plates_to_api_ids, prepare_search_params
+
+
+def test_skip_and_limit_are_dropped():
+    params = prepare_search_params({"search_text": "asfalt", "skip": 20, "limit": 5})
+
+    assert "skip" not in params and "limit" not in params
+    assert params["search_text"] == "asfalt"
+
+
+def test_unknown_parameters_are_rejected():
+    with pytest.raises(ValueError, match="Unknown search parameters: pagesize"):
+        prepare_search_params({"pagesize": 5})
+
+
+def test_provinces_resolve_from_plates_and_names():
+    assert plates_to_api_ids([6, "istanbul", "ANKARA"]) == [251, 284]
+
+
+@pytest.mark.parametrize("provinces", [["Xyzzy"], [6, "Xyzzy"], [99]])
+def test_unresolved_provinces_are_an_error(provinces):
+    with pytest.raises(ValueError, match="Unknown provinces"):
+        plates_to_api_ids(provinces)
+
+
+@pytest.mark.asyncio
+async def test_search_tenders_tool_reports_unknown_provinces():
+    from fastmcp import Client
+
+    import ihale_mcp
+
+    async with Client(ihale_mcp.mcp) as client:
+        result = await client.call_tool("search_tenders", {"provinces": ["Xyzzy"]})
+
+    assert result.data["error"] == "Invalid search parameters"
+    assert "Xyzzy" in result.data["message"]
@@ -0,0 +1,82 @@
+import pytest
+
+from ihale_results import parse_amount, parse_result_announcement
+
+# Excerpt of a KİK Sonuç İlanı as served by EKAP (table rows of "label | : | value")
+KIK_RESULT_HTML = """
+<p><b>ASFALT YAMA İŞİ</b></p>
+<table>
+<tr><td>İhale Kayıt Numarası</td><td>:</td><td>2024/123456</td></tr>
+<tr><td>1-İdarenin adı</td><td>:</td><td>Çanakkale İl Özel İdaresi</td></tr>
+<tr><td>5-Yaklaşık maliyeti</td><td>:</td><td>4.250.000,00 TRY</td></tr>
+<tr><td>8-Toplam teklif sayısı</td><td>:</td><td>7</td></tr>
+<tr><td>9-Geçerli teklif sayısı</td><td>:</td><td>5</td></tr>
+<tr><td>10-Sözleşme tarihi</td><td>:</td><td>12.07.2024</td></tr>
+<tr><td>11-Sözleşme bedeli</td><td>:</td><td>3.987.650,50 TRY</td></tr>
+<tr><td>12-Yüklenicinin adı</td><td>:</td><td>ÖRNEK YAPI İNŞAAT A.Ş.</td></tr>
+<tr><td>13-Yüklenicinin uyruğu</td><td>:</td><td>Türkiye</td></tr>
+</table>
+"""
+
+# Markdown conversion of a partial tender's result announcement, one block per lot
+KIK_PARTIAL_MARKDOWN = """
+**İhale Kayıt Numarası :** 2024/654321
+
+| Kısım No | : | 1 |
+| a) Sözleşme bedeli | : | 150.000 TL |
+| b) Yüklenicinin adı | : | Birinci Ltd. Şti. |
+| Kısım No | : | 2 |
+| a) Sözleşme bedeli | : | 95.500,25 TL |
+| b) Yüklenicinin adı | : | İkinci Gıda San. |
+"""
+
+
+def test_parses_kik_result_template():
+    result = parse_result_announcement(1001, 55, KIK_RESULT_HTML, date="15.07.2024")
+
+    assert result.ikn == "2024/123456"
+    assert result.date == "15.07.2024"
+    assert len(result.awards) == 1
+    award = result.awards[0]
+    assert award.winner == "ÖRNEK YAPI İNŞAAT A.Ş."
+    assert award.winner_nationality == "Türkiye"
+    assert award.contract_value == 3987650.5
+    assert award.currency == "TRY"
+    assert award.contract_date == "12.07.2024"
+    assert award.estimated_cost == 4250000.0
+    assert (award.total_bids, award.valid_bids) == (7, 5)
+
+
+def test_partial_tender_yields_one_award_per_lot():
+    result = parse_result_announcement(1002, 56, KIK_PARTIAL_MARKDOWN)
+
+    assert result.ikn == "2024/654321"
+    assert [(award.lot, award.winner, award.contract_value) for award in result.awards] == [
+        ("1", "Birinci Ltd. Şti.", 150000.0),
+        ("2", "İkinci Gıda San.", 95500.25),
+    ]
+    assert {award.currency for award in result.awards} == {"TRY"}
+
+
+def test_bidder_name_fills_in_a_missing_winner():
+    result = parse_result_announcement(1003, 57, "Sözleşme bedeli : 10.000,00 TRY", bidder_name="Üçüncü A.Ş.")
+
+    assert [(award.winner, award.contract_value) for award in result.awards] == [("Üçüncü A.Ş.", 10000.0)]
+
+
+def test_content_hash_changes_with_content():
+    first = parse_result_announcement(1, 1, KIK_RESULT_HTML)
+    second = parse_result_announcement(1, 1, KIK_RESULT_HTML.replace("7</td>", "8</td>"))
+
+    assert first.content_sha256 != second.content_sha256
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1.234.567,89 TRY", (1234567.89, "TRY")),
+    ("250.000 TL", (250000.0, "TRY")),
+    ("€ 1.500,5", (1500.5, "EUR")),
+    ("12 USD", (12.0, "USD")),
+    ("belirtilmemiş", (None, None)),
+])
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == expected
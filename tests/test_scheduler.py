@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from ihale_scheduler import Priority, RequestScheduler, request_context
+
+
+async def _request(scheduler, session):
+    with request_context(Priority.INTERACTIVE, session=session):
+        async with scheduler.slot():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_session_history_is_capped_least_recently_served_first(monkeypatch):
+    monkeypatch.setattr(RequestScheduler, "SESSION_HISTORY", 3)
+    scheduler = RequestScheduler(max_concurrency=1)
+
+    for session in ["a", "b", "c", "a", "d"]:
+        await _request(scheduler, session)
+
+    assert list(scheduler._session_served) == ["c", "a", "d"]
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_by_priority_then_least_recently_served_session():
+    scheduler = RequestScheduler(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot():
+            await release.wait()
+
+    async def request(priority, session, label):
+        with request_context(priority, session=session):
+            async with scheduler.slot():
+                order.append(label)
+
+    # "a" was served most recently, so "b" goes ahead of it within a class
+    await _request(scheduler, "b")
+    await _request(scheduler, "a")
+    holder = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    waiters = [
+        asyncio.ensure_future(request(Priority.PREFETCH, "b", "prefetch-b")),
+        asyncio.ensure_future(request(Priority.INTERACTIVE, "a", "interactive-a1")),
+        asyncio.ensure_future(request(Priority.INTERACTIVE, "a", "interactive-a2")),
+        asyncio.ensure_future(request(Priority.INTERACTIVE, "b", "interactive-b")),
+        asyncio.ensure_future(request(Priority.SYNC, "c", "sync-c")),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.metrics()["queue_depth"]["interactive"] == 3
+
+    release.set()
+    await asyncio.gather(holder, *waiters)
+
+    # Interactive first, b ahead of the more recently served a, then arrival order within a session
+    assert order == ["interactive-b", "interactive-a1", "interactive-a2", "prefetch-b", "sync-c"]
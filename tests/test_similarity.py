@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from ihale_similarity import HashingEmbedder, SimilarityIndex
+
+
+class FakeSentenceEmbedder:
+    """SentenceEmbedder stand-in with a fixed dimension and no model download"""
+
+    name = "sentence"
+    dim = 4
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def embed(self, texts):
+        return np.ones((len(texts), self.dim), dtype=np.float32) / 2
+
+
+def test_sentence_models_get_separate_indexes(tmp_path):
+    first = SimilarityIndex(str(tmp_path), FakeSentenceEmbedder("org/model-a"))
+    second = SimilarityIndex(str(tmp_path), FakeSentenceEmbedder("org/model-b"))
+
+    assert first.root != second.root
+    assert first.root.parent == second.root.parent == tmp_path
+    assert first.status()["model"] == "org/model-a"
+
+
+def test_hashing_index_keeps_its_directory(tmp_path):
+    index = SimilarityIndex(str(tmp_path), HashingEmbedder(dim=16))
+
+    assert index.root == tmp_path / "hashing"
+
+
+def test_index_refuses_a_different_model(tmp_path):
+    index = SimilarityIndex(str(tmp_path), FakeSentenceEmbedder("org/model-a"))
+    index.close()
+    index.meta_path.write_text(index.meta_path.read_text().replace("org/model-a", "org/model-b"))
+
+    with pytest.raises(ValueError):
+        SimilarityIndex(str(tmp_path), FakeSentenceEmbedder("org/model-a"))
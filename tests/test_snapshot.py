@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from ihale_snapshot import SnapshotClient, build_snapshot
+from ihale_store import TenderStore
+
+OKAS_CODES = [
+    {"id": 1, "code": "45233222", "description_tr": "Asfalt kaplama işleri", "item_type": {"code": 3}},
+    {"id": 2, "code": "33141000", "description_tr": "Tıbbi sarf malzemeleri", "item_type": {"code": 1}},
+]
+AUTHORITIES = [{"id": 10, "name": "Ankara Büyükşehir Belediyesi"}]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "snapshot.db"
+    with TenderStore(str(tmp_path / "ihale.db")) as store:
+        store.upsert_tenders([{"id": 1, "name": "Asfalt yapım işi", "ikn": "2024/1", "province": "Ankara"}])
+        build_snapshot(store, str(path), OKAS_CODES, AUTHORITIES)
+    client = SnapshotClient(str(path))
+    yield client
+    client._conn.close()
+
+
+@pytest.mark.asyncio
+async def test_reference_catalogs_round_trip(snapshot):
+    catalogs = await snapshot.get_reference_catalogs()
+
+    assert [item["code"] for item in catalogs["okas_codes"]] == ["33141000", "45233222"]
+    assert catalogs["authorities"] == AUTHORITIES
+    assert catalogs["errors"] == {}
+
+
+@pytest.mark.asyncio
+async def test_queries_run_off_the_event_loop(snapshot):
+    query = snapshot._query
+    threads = []
+
+    def recording_query(sql, params=()):
+        threads.append(threading.get_ident())
+        return query(sql, params)
+
+    snapshot._query = recording_query
+    result = await snapshot.search_tenders(search_text="asfalt")
+
+    assert result["total_count"] == 1
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,15 @@
+import json
+import subprocess
+import sys
+
+from ihale_bench import DEFERRED_MODULES, PACKAGE_DIR
+
+
+def test_server_import_does_not_load_heavy_modules():
+    # A fresh interpreter: the test session itself imports some of these
+    modules = list(DEFERRED_MODULES) + ["sentence_transformers", "ihale_similarity"]
+    completed = subprocess.run(
+        [sys.executable, "-c", f"import sys, json, ihale_mcp; print(json.dumps([m for m in {modules!r} if m in sys.modules]))"],
+        cwd=PACKAGE_DIR, capture_output=True, text=True, check=True
+    )
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,53 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip("ijson")
+
+from ihale_stream import iter_members  # noqa: E402
+
+DETAILS = {
+    "item": {
+        "ihaleAdi": "Asfalt alımı – İSTANBUL",
+        "ihaleBilgi": {"ikn": "2025/123", "kalemler": [{"kod": "44113620", "miktar": 2.5}], "bos": []},
+        "ilanList": [
+            {"ilanId": 1, "veriHtml": "<p>İlan</p>", "ekler": [[1, 2], []]},
+            [1, [2, 3]],
+            7,
+            None,
+            {},
+        ],
+        "iptal": None,
+        "tutar": 1234.56,
+        "sonAlan": True,
+    },
+    "sonuc": "ok",
+}
+
+
+def _rebuild(document, object_path, array_key):
+    fields, items = {}, []
+    for kind, value in iter_members(io.BytesIO(json.dumps(document).encode("utf-8")), object_path, array_key):
+        if kind == "field":
+            fields[value[0]] = value[1]
+        else:
+            items.append(value)
+    return fields, items
+
+
+def test_members_match_a_full_parse():
+    expected = json.loads(json.dumps(DETAILS))["item"]
+    fields, items = _rebuild(DETAILS, "item", "ilanList")
+
+    assert items == expected.pop("ilanList")
+    assert fields == expected
+    assert list(fields) == list(expected)
+
+
+def test_document_root_and_missing_objects():
+    fields, items = _rebuild({"a": {"b": [1]}, "list": [{"x": 1}], "z": "son"}, "", "list")
+
+    assert fields == {"a": {"b": [1]}, "z": "son"} and items == [{"x": 1}]
+    assert _rebuild({"item": None}, "item", "ilanList") == ({}, [])
+    assert _rebuild({"other": {}}, "item", "ilanList") == ({}, [])
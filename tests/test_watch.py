@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from ihale_store import TenderStore
+from ihale_watch import SavedSearchScheduler, refresh_saved_search
+
+
+class FakeClient:
+    """search_all_tenders answering from a fixed list of results, one per refresh"""
+
+    def __init__(self, results):
+        self.results = list(results)
+
+    async def search_all_tenders(self, max_results=None, include_document_urls=False, **params):
+        await asyncio.sleep(0.01)
+        return self.results.pop(0)
+
+
+def _page(ids, total_count=None, **extra):
+    tenders = [{"id": tender_id, "name": f"İhale {tender_id}"} for tender_id in ids]
+    return {"tenders": tenders, "total_count": len(tenders) if total_count is None else total_count, **extra}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TenderStore(str(tmp_path / "ihale.db"))
+    store.save_search("asfalt", {"search_text": "asfalt"}, max_results=100, interval_seconds=3600)
+    yield store
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_is_baseline_then_only_new_ids_reported(store):
+    client = FakeClient([_page([1, 2]), _page([1, 2, 3])])
+
+    first = await refresh_saved_search(client, store, "asfalt")
+    second = await refresh_saved_search(client, store, "asfalt")
+
+    assert first["baseline"] and first["new_count"] == 0
+    assert not second["baseline"]
+    assert [tender["id"] for tender in second["new_tenders"]] == [3]
+
+
+@pytest.mark.asyncio
+async def test_partial_refresh_marks_nothing_seen(store):
+    client = FakeClient([
+        _page([1]),
+        _page([2], total_count=3, returned_count=1, partial=True),
+        _page([2, 3]),
+    ])
+
+    await refresh_saved_search(client, store, "asfalt")
+    partial = await refresh_saved_search(client, store, "asfalt")
+    after = await refresh_saved_search(client, store, "asfalt")
+
+    assert partial["partial"] and partial["error"]
+    assert "new_tenders" not in partial
+    # Tenders the partial run did or didn't reach are reported once, by the next complete run
+    assert sorted(tender["id"] for tender in after["new_tenders"]) == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_capped_refresh_reports_truncated(store):
+    client = FakeClient([_page([1, 2], total_count=10)])
+
+    result = await refresh_saved_search(client, store, "asfalt")
+
+    assert result["truncated"] is True
+    assert result["fetched_count"] == 2
+
+
+def test_claim_is_taken_once_until_released_or_expired(store):
+    assert store.claim_search("asfalt", None, "a", lease_seconds=60)
+    assert not store.claim_search("asfalt", None, "b", lease_seconds=60)
+
+    store.release_search("asfalt", "a")
+    assert store.claim_search("asfalt", None, "b", lease_seconds=-1)
+    # b's lease has run out, e.g. its process died mid-refresh
+    assert store.claim_search("asfalt", None, "a", lease_seconds=60)
+
+
+def test_claim_fails_once_someone_recorded_a_newer_run(store):
+    run = store.record_search_run("asfalt", time.time(), [1], 1)
+
+    assert not store.claim_search("asfalt", None, "a", lease_seconds=60)
+    assert store.claim_search("asfalt", run["run_id"], "a", lease_seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_schedulers_sharing_a_store_refresh_a_due_search_once(store):
+    clients = [FakeClient([_page([1])]), FakeClient([_page([1])])]
+    schedulers = [SavedSearchScheduler(client, store.path, stagger=0, poll_interval=0.05) for client in clients]
+    for scheduler in schedulers:
+        scheduler.start()
+    try:
+        await asyncio.sleep(0.3)
+    finally:
+        for scheduler in schedulers:
+            await scheduler.aclose()
+
+    assert sum(scheduler.stats["refreshed"] for scheduler in schedulers) == 1
+    assert sum(scheduler.stats["claimed_elsewhere"] for scheduler in schedulers) >= 1
+    assert sum(len(client.results) for client in clients) == 1